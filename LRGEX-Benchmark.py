@@ -1,601 +1,147 @@
+import argparse
+import base64
+import compileall
+import csv
+import hashlib
+import heapq
+import importlib.util
+import itertools
+import json
+import math
 import os
+import platform
+import re
+import socket
+import sqlite3
+import statistics
 import subprocess
 import sys
+import tomllib
+import zipfile
+from io import BytesIO
 from pathlib import Path
 import time
 
 # Version information
 VERSION = "v1.0.1"
 
-# Pre-defined test templates - FIXED VERSION
+# Templates whose page and ID picks follow the traffic distribution
+POPULARITY_TEMPLATES = ["smart", "website", "api", "ecommerce", "support", "forms"]
+
+# Runtime package holding the user classes - tests/ files only import from it
+RUNTIME_PACKAGE = "lrgex_runtime"
+
+# Distributed runs - set on each machine instead of asked by the wizard
+ROLE = os.environ.get("LRGEX_ROLE", "standalone").lower()  # "standalone", "master" or "worker"
+MASTER_HOST = os.environ.get("LRGEX_MASTER_HOST", "127.0.0.1")  # Where workers find the master
+MASTER_PORT = int(os.environ.get("LRGEX_MASTER_PORT", "5557"))
+EXPECT_WORKERS = max(1, int(os.environ.get("LRGEX_EXPECT_WORKERS", "1")))
+EXPECT_WORKERS_MAX_WAIT = int(os.environ.get("LRGEX_EXPECT_WORKERS_MAX_WAIT", "300"))
+
+# How single-process automatic tests run: "auto" drives Locust inside this process
+# when it can be imported, "subprocess" always starts "uv run --module locust"
+LOCUST_RUNNER = os.environ.get("LRGEX_LOCUST_RUNNER", "auto").lower()
+
+# A sync is skipped while these files match the fingerprint saved after the last one
+DEPENDENCY_FILES = ["pyproject.toml", "uv.lock"]
+DEPENDENCY_FINGERPRINT = Path(".venv") / ".lrgex_dependencies"
+
+# Pre-defined test templates - the code lives in lrgex_runtime/<module>.py
 TEST_TEMPLATES = {
     "custom_form": {
         "name": "Smart Form Builder",
         "description": "I'll ask you questions and build a custom form test for you!",
         "filename": "custom_form_test.py",
+        "module": "custom_form",
+        "user_class": "CustomFormUser",
         "interactive": True,  # Special flag for interactive creation
     },
     "smart": {
         "name": "Smart Website Test",
         "description": "Automatically finds what exists and ONLY tests that",
         "filename": "smart_test.py",
-        "code": '''from locust import HttpUser, task, between
-import random
-import time
-import os
-import threading
-import re
-from urllib.parse import urljoin
-
-# Global discovery state - shared across ALL users
-_discovery_lock = threading.Lock()
-_discovery_done = False
-_working_paths = set()
-_protected_paths = set()  # Pages that exist but require auth (401/403)
-
-class SmartWebsiteUser(HttpUser):
-    wait_time = between(1, 3)
-    
-    def on_start(self):
-        """Find what actually exists on this website - but only once globally"""
-        global _discovery_done, _working_paths, _protected_paths, _discovery_lock
-        
-        # Check if there's a duration limit set via environment variable
-        if hasattr(self.environment, 'parsed_options') and hasattr(self.environment.parsed_options, 'run_time'):
-            self.run_time = self.environment.parsed_options.run_time
-        else:
-            self.run_time = None
-        
-        self.start_time = time.time()
-        
-        # Only do discovery once across ALL users
-        with _discovery_lock:
-            if not _discovery_done:
-                print("Discovering what exists on this website...")
-                print("=" * 50)
-                
-                # Always test homepage first
-                _working_paths.add("/")
-                print("Found: / (homepage)")
-                
-                # Comprehensive path discovery - including more admin variations
-                test_paths = [
-                    # Standard pages
-                    "/about", "/about.html", "/about.php", "/about-us",
-                    "/contact", "/contact.html", "/contact.php", "/contact-us",
-                    "/services", "/products", "/shop", "/store",
-                    "/help", "/support", "/blog", "/news", "/faq", 
-                    "/login", "/signin", "/api", "/search",
-                    
-                    # Admin and management pages - comprehensive list
-                    "/admin", "/admin.html", "/admin.php", "/admin/", 
-                    "/administrator", "/administration", "/administrator.html",
-                    "/dashboard", "/dashboard.html", "/dashboard.php",
-                    "/panel", "/control", "/manage", "/manager",
-                    "/wp-admin", "/wp-admin/", "/wp-login.php",
-                    "/phpmyadmin", "/phpmyadmin/", "/pma",
-                    "/cpanel", "/webmail", "/plesk",
-                    "/admin-console", "/admin-panel", "/admin-login",
-                    "/backend", "/management", "/console",
-                    
-                    # Security and system pages
-                    "/login.html", "/login.php", "/signin.html",
-                    "/auth", "/authentication", "/secure",
-                    "/user", "/profile", "/account", "/settings",
-                    
-                    # Common additional pages
-                    "/docs", "/documentation", "/privacy", "/terms",
-                    "/sitemap", "/sitemap.xml", "/robots.txt",
-                    "/test", "/demo", "/example", "/sample"
-                ]
-                
-                # Try to find additional URLs from homepage links
-                try:
-                    homepage_response = self.client.get("/", catch_response=True, name="discovery")
-                    if homepage_response.status_code == 200:
-                        # Extract links from homepage HTML
-                        links1 = re.findall(r'href="([^"]+)"', homepage_response.text, re.IGNORECASE)
-                        links2 = re.findall(r"href='([^']+)'", homepage_response.text, re.IGNORECASE)
-                        links = links1 + links2
-                        for link in links:
-                            if link.startswith('/') and not link.startswith('//'):
-                                # Clean the link - remove anchors and query params
-                                clean_link = link.split('#')[0].split('?')[0]
-                                if 1 < len(clean_link) < 100 and clean_link not in test_paths:
-                                    test_paths.append(clean_link)
-                    homepage_response.success()
-                except Exception:
-                    pass
-                
-                # Test all discovered paths - only show what we FIND
-                found_pages = []
-                for path in test_paths:
-                    try:
-                        # Silent test - don't count as requests in report
-                        response = self.client.get(path, catch_response=True, name="discovery")
-                        status = response.status_code
-                        
-                        if status == 200:
-                            _working_paths.add(path)
-                            found_pages.append(f"Found: {path} (accessible)")
-                        elif status in [301, 302]:
-                            _working_paths.add(path)
-                            found_pages.append(f"Found: {path} (redirects)")
-                        elif status in [401, 403]:
-                            _protected_paths.add(path)
-                            found_pages.append(f"Found: {path} (protected)")
-                        # Skip showing 404s and errors - nobody cares what doesn't exist!
-                        
-                        response.success()  # Always mark discovery as success
-                    except Exception:
-                        pass  # Silently ignore errors during discovery
-                
-                # Only show what we actually found
-                if found_pages:
-                    for page in found_pages:
-                        print(page)
-                else:
-                    print("Only homepage found - simple website detected")
-                
-                print("=" * 50)
-                total_found = len(_working_paths) + len(_protected_paths)
-                if total_found > 1:
-                    print(f"Discovery Results: Found {total_found} testable pages on this website")
-                else:
-                    print("Discovery Results: Simple website - focusing on homepage performance")
-                print("=" * 50)
-                
-                # Include protected pages in testing (they exist, just require auth)
-                all_testable = _working_paths.union(_protected_paths)
-                
-                if len(all_testable) == 1:
-                    print("Simple website detected - focusing on homepage performance")
-                else:
-                    print(f"Will test {len(all_testable)} pages that exist on this website")
-                
-                _discovery_done = True
-    
-    @task
-    def visit_pages(self):
-        """Visit pages that actually exist (including protected ones)"""
-        global _working_paths, _protected_paths, _discovery_lock
-        
-        # Safely get current paths
-        with _discovery_lock:
-            all_testable = _working_paths.union(_protected_paths)
-        
-        if len(all_testable) <= 1:
-            # Only homepage exists - just test that
-            self.client.get("/")
-        else:
-            # Multiple pages exist - test them all
-            path = random.choice(list(all_testable))
-            
-            # Test the page but handle expected auth responses
-            with self.client.get(path, catch_response=True) as response:
-                if response.status_code in [200, 301, 302, 401, 403]:
-                    # These are all "expected" responses for pages that exist
-                    response.success()
-                elif response.status_code == 404:
-                    # Page disappeared - remove from future testing
-                    with _discovery_lock:
-                        _working_paths.discard(path)
-                        _protected_paths.discard(path)
-                    response.failure("Page no longer exists")
-                else:
-                    # Server errors or other issues
-                    response.failure(f"Unexpected status: {response.status_code}")
-''',
+        "module": "smart",
+        "user_class": "SmartWebsiteUser",
     },
     "website": {
         "name": "Website Load Test",
         "description": "Test homepage and discover available pages",
         "filename": "website_test.py",
-        "code": '''from locust import HttpUser, task, between
-import random
-import re
-from urllib.parse import urljoin, urlparse
-
-class SmartWebsiteUser(HttpUser):
-    wait_time = between(1, 3)
-    discovered_links = set()
-    safe_paths = ["/", "/home", "/index", "/main"]
-    
-    def on_start(self):
-        """Discover available links from homepage"""
-        try:
-            response = self.client.get("/", catch_response=True)
-            if response.status_code == 200:
-                # Extract links from HTML - handle both quote types
-                links1 = re.findall(r'href="([^"]+)"', response.text)
-                links2 = re.findall(r"href='([^']+)'", response.text)
-                links = links1 + links2
-                for link in links:
-                    if link.startswith('/') and not link.startswith('//'):
-                        # Only internal links, avoid anchors and external
-                        clean_link = link.split('#')[0].split('?')[0]
-                        if len(clean_link) > 1 and len(clean_link) < 50:
-                            self.discovered_links.add(clean_link)
-                
-                # Add some common fallback paths
-                common_paths = ["/about", "/contact", "/services", "/products", 
-                              "/help", "/support", "/blog", "/news"]
-                self.discovered_links.update(common_paths)
-            response.success()
-        except Exception:
-            # If discovery fails, use safe defaults
-            self.discovered_links = {"/", "/home", "/about", "/contact"}
-    
-    @task(5)
-    def homepage(self):
-        """Visit homepage - always safe"""
-        self.client.get("/")
-    
-    @task(3)
-    def browse_discovered_pages(self):
-        """Visit discovered pages with error handling"""
-        if self.discovered_links:
-            path = random.choice(list(self.discovered_links))
-            with self.client.get(path, catch_response=True) as response:
-                if response.status_code == 404:
-                    # Remove 404 pages from future requests
-                    self.discovered_links.discard(path)
-                    response.failure("Page not found - removed from rotation")
-                elif response.status_code >= 500:
-                    response.failure("Server error")
-                else:
-                    response.success()
-        else:
-            # Fallback to homepage
-            self.client.get("/")
-    
-    @task(1)
-    def safe_navigation(self):
-        """Always use known safe paths"""
-        safe_path = random.choice(self.safe_paths)
-        with self.client.get(safe_path, catch_response=True) as response:
-            if response.status_code >= 400:
-                response.failure(f"Error {response.status_code}")
-            else:
-                response.success()
-''',
+        "module": "website",
+        "user_class": "SmartWebsiteUser",
     },
     "api": {
         "name": "API Load Test",
         "description": "Test REST API endpoints",
         "filename": "api_test.py",
-        "code": '''from locust import HttpUser, task, between
-import json
-import random
-
-class APIUser(HttpUser):
-    wait_time = between(0.5, 2)
-    
-    def on_start(self):
-        """Setup headers for API calls"""
-        self.client.headers.update({"Content-Type": "application/json"})
-    
-    @task(3)
-    def get_users(self):
-        """Get list of users"""
-        self.client.get("/api/users")
-    
-    @task(2)
-    def get_user_by_id(self):
-        """Get specific user"""
-        user_id = random.randint(1, 100)
-        self.client.get(f"/api/users/{user_id}")
-    
-    @task(1)
-    def create_user(self):
-        """Create new user"""
-        user_data = {
-            "name": f"TestUser{random.randint(1000, 9999)}",
-            "email": f"test{random.randint(1000, 9999)}@example.com"
-        }
-        self.client.post("/api/users", json=user_data)
-    
-    @task(1)
-    def health_check(self):
-        """Check API health"""
-        self.client.get("/api/health")
-''',
+        "module": "api",
+        "user_class": "APIUser",
     },
     "ecommerce": {
         "name": "E-commerce Test",
         "description": "Test shopping, cart, and checkout",
         "filename": "ecommerce_test.py",
-        "code": '''from locust import HttpUser, task, between
-import random
-
-class ShopperUser(HttpUser):
-    wait_time = between(1, 4)
-    
-    @task(4)
-    def browse_products(self):
-        """Browse product catalog"""
-        categories = ["electronics", "clothing", "books", "sports"]
-        category = random.choice(categories)
-        self.client.get(f"/products?category={category}")
-    
-    @task(3)
-    def view_product(self):
-        """View product details"""
-        product_id = random.randint(1, 50)
-        self.client.get(f"/product/{product_id}")
-    
-    @task(2)
-    def add_to_cart(self):
-        """Add item to cart"""
-        product_id = random.randint(1, 50)
-        self.client.post(f"/cart/add/{product_id}")
-    
-    @task(1)
-    def view_cart(self):
-        """View shopping cart"""
-        self.client.get("/cart")
-    
-    @task(1)
-    def search_products(self):
-        """Search for products"""
-        search_terms = ["laptop", "phone", "book", "shoes", "watch"]
-        term = random.choice(search_terms)
-        self.client.get(f"/search?q={term}")
-''',
+        "module": "ecommerce",
+        "user_class": "ShopperUser",
     },
     "support": {
         "name": "Support Portal Test",
         "description": "Test help desk and support features",
         "filename": "support_test.py",
-        "code": '''from locust import HttpUser, task, between
-import random
-
-class SupportUser(HttpUser):
-    wait_time = between(1, 3)
-    
-    @task(4)
-    def view_knowledge_base(self):
-        """Browse help articles"""
-        self.client.get("/help")
-    
-    @task(3)
-    def search_help(self):
-        """Search for help topics"""
-        search_terms = ["password", "login", "billing", "account", "error"]
-        term = random.choice(search_terms)
-        self.client.get(f"/help/search?q={term}")
-    
-    @task(2)
-    def view_article(self):
-        """Read specific help article"""
-        article_id = random.randint(1, 20)
-        self.client.get(f"/help/article/{article_id}")
-    
-    @task(1)
-    def contact_form(self):
-        """Submit contact form with test data"""
-        # First get the contact form page
-        response = self.client.get("/contact")
-        
-        # Submit the form with test data
-        form_data = {
-            "name": f"Test User {random.randint(1000, 9999)}",
-            "email": f"test{random.randint(100, 999)}@example.com",
-            "subject": random.choice([
-                "Technical Support Request",
-                "Billing Question", 
-                "General Inquiry",
-                "Feature Request",
-                "Bug Report"
-            ]),
-            "message": "This is a test message from load testing. Please ignore."
-        }
-        self.client.post("/contact", data=form_data)
-    
-    @task(1)
-    def newsletter_signup(self):
-        """Test newsletter subscription form"""
-        signup_data = {
-            "email": f"newsletter{random.randint(1000, 9999)}@example.com",
-            "name": f"Test Subscriber {random.randint(100, 999)}"
-        }
-        self.client.post("/newsletter/subscribe", data=signup_data)
-    
-    @task(1)
-    def search_form_submit(self):
-        """Submit search form"""
-        search_terms = ["password", "login", "billing", "account", "error", "help"]
-        search_data = {
-            "q": random.choice(search_terms),
-            "category": random.choice(["all", "technical", "billing", "general"])
-        }
-        self.client.post("/search", data=search_data)
-    
-    @task(1)
-    def faq(self):
-        """View FAQ section"""
-        self.client.get("/faq")
-''',
+        "module": "support",
+        "user_class": "SupportUser",
     },
     "forms": {
         "name": "Form Submission Test",
         "description": "Test various form submissions (contact, login, signup, etc.)",
         "filename": "forms_test.py",
-        "code": '''from locust import HttpUser, task, between
-import random
-import string
-
-class FormTestUser(HttpUser):
-    wait_time = between(1, 3)
-    
-    # CUSTOM FORM URLS - Edit these for your specific website
-    CUSTOM_FORMS = {
-        # Format: "form_name": {"get_url": "page_url", "post_url": "submit_url"}
-        "contact": {"get_url": "/contact", "post_url": "/contact"},
-        "login": {"get_url": "/login", "post_url": "/login"},
-        "newsletter": {"get_url": "/newsletter", "post_url": "/newsletter"},
-        "search": {"get_url": "/search", "post_url": "/search"},
-        # Add your custom forms here:
-        # "custom_form": {"get_url": "/your-form-page", "post_url": "/submit-url"},
-        # "feedback": {"get_url": "/feedback", "post_url": "/submit-feedback"},
-        # "quote": {"get_url": "/quote", "post_url": "/process-quote"},
-    }
-    
-    def generate_fake_email(self):
-        """Generate a fake email for testing"""
-        domains = ["example.com", "test.com", "fake.org", "demo.net"]
-        username = ''.join(random.choices(string.ascii_lowercase, k=8))
-        return f"{username}@{random.choice(domains)}"
-    
-    def generate_fake_name(self):
-        """Generate a fake name for testing"""
-        first_names = ["John", "Jane", "Mike", "Sarah", "David", "Lisa", "Chris", "Emma"]
-        last_names = ["Smith", "Johnson", "Brown", "Davis", "Wilson", "Moore", "Taylor", "Anderson"]
-        return f"{random.choice(first_names)} {random.choice(last_names)}"
-    
-    def get_form_data_for_type(self, form_type):
-        """Generate appropriate form data based on form type"""
-        base_data = {
-            "name": self.generate_fake_name(),
-            "email": self.generate_fake_email(),
-        }
-        
-        if form_type == "contact":
-            base_data.update({
-                "subject": random.choice([
-                    "Technical Support", "General Inquiry", "Bug Report",
-                    "Feature Request", "Billing Question"
-                ]),
-                "message": "This is a test message from automated load testing. Please disregard.",
-                "phone": f"555-{random.randint(100, 999)}-{random.randint(1000, 9999)}"
-            })
-        elif form_type == "newsletter":
-            base_data.update({
-                "subscribe": "1"
-            })
-        elif form_type == "search":
-            base_data = {
-                "q": random.choice(["help", "support", "contact", "about", "services"]),
-                "category": random.choice(["all", "pages", "products", "help"])
-            }
-        else:
-            # Generic form data for custom forms
-            base_data.update({
-                "message": f"Test submission to {form_type} form",
-                "subject": f"Test {form_type}",
-                "comments": "This is a test submission from load testing",
-                "phone": f"555-{random.randint(100, 999)}-{random.randint(1000, 9999)}",
-                "company": "Test Company Inc.",
-                "submit": "1"
-            })
-        
-        return base_data
-    
-    def try_form_submission(self, form_name, fallback_urls=None):
-        """Helper method to try form submission with custom or fallback URLs"""
-        # Try custom form first
-        if form_name in self.CUSTOM_FORMS:
-            custom = self.CUSTOM_FORMS[form_name]
-            with self.client.get(custom["get_url"], catch_response=True) as response:
-                if response.status_code == 200:
-                    form_data = self.get_form_data_for_type(form_name)
-                    with self.client.post(custom["post_url"], data=form_data, catch_response=True) as post_response:
-                        if post_response.status_code in [200, 201, 302, 422]:
-                            post_response.success()
-                            return True
-                response.success()
-                return True
-        
-        # Try fallback URLs if custom form not found and fallbacks provided
-        if fallback_urls:
-            for url in fallback_urls:
-                with self.client.get(url, catch_response=True) as response:
-                    if response.status_code == 200:
-                        form_data = self.get_form_data_for_type(form_name)
-                        
-                        # Try multiple post URLs
-                        post_urls = [url, f"{url}/submit", f"/{form_name}/submit", f"/submit-{form_name}"]
-                        for post_url in post_urls:
-                            with self.client.post(post_url, data=form_data, catch_response=True) as post_response:
-                                if post_response.status_code in [200, 201, 302, 422]:
-                                    post_response.success()
-                                    return True
-                    response.success()
-                    break
-        return False
-    
-    @task(3)
-    def contact_form_submission(self):
-        """Submit contact form"""
-        fallback_urls = ["/contact", "/contact-us", "/support", "/help/contact"]
-        self.try_form_submission("contact", fallback_urls)
-    
-    @task(2)
-    def newsletter_signup(self):
-        """Test newsletter/email subscription forms"""
-        fallback_urls = ["/newsletter", "/subscribe", "/signup", "/newsletter/signup"]
-        self.try_form_submission("newsletter", fallback_urls)
-    
-    @task(2)
-    def search_form_test(self):
-        """Test search forms"""
-        fallback_urls = ["/search", "/find", "/query"]
-        self.try_form_submission("search", fallback_urls)
-    
-    @task(2)
-    def custom_form_test(self):
-        """Test any custom forms you've defined"""
-        # Skip standard forms as they have dedicated tasks
-        custom_forms = {k: v for k, v in self.CUSTOM_FORMS.items() 
-                       if k not in ["contact", "login", "newsletter", "search"]}
-        
-        if not custom_forms:
-            return  # No custom forms defined
-            
-        form_name = random.choice(list(custom_forms.keys()))
-        self.try_form_submission(form_name)
-    
-    @task(1)
-    def login_form_test(self):
-        """Test login forms (with fake data)"""
-        fallback_urls = ["/login", "/signin", "/auth", "/login.html"]
-        
-        # Special handling for login - use fake but realistic data
-        if "login" in self.CUSTOM_FORMS:
-            custom = self.CUSTOM_FORMS["login"]
-            with self.client.get(custom["get_url"], catch_response=True) as response:
-                if response.status_code == 200:
-                    login_data = {
-                        "username": f"testuser{random.randint(1000, 9999)}",
-                        "password": "testpassword123",
-                        "email": self.generate_fake_email(),
-                        "login": "1"
-                    }
-                    with self.client.post(custom["post_url"], data=login_data, catch_response=True) as post_response:
-                        # Login will likely fail with fake data, but that's expected
-                        if post_response.status_code in [200, 201, 302, 401, 422]:
-                            post_response.success()
-                response.success()
-        else:
-            # Try fallback URLs
-            for url in fallback_urls:
-                with self.client.get(url, catch_response=True) as response:
-                    if response.status_code == 200:
-                        login_data = {
-                            "username": f"testuser{random.randint(1000, 9999)}",
-                            "password": "testpassword123",
-                            "email": self.generate_fake_email()
-                        }
-                        with self.client.post(url, data=login_data, catch_response=True) as post_response:
-                            # Expect login to fail with fake data
-                            if post_response.status_code in [200, 201, 302, 401, 422]:
-                                post_response.success()
-                        break
-                    response.success()
-''',
+        "module": "forms",
+        "user_class": "FormTestUser",
     },
 }
 
+# Wizard choices that are passed to the runtime through the scenario file
+SCENARIO_SETTINGS = [
+    "popularity",
+    "zipf_exponent",
+    "popularity_file",
+    "form_token_cache",
+    "feeder_file",
+    "feeder_strategy",
+    "custom_urls",
+    "engine",
+    "load_shape",
+]
+
+# Automatic mode presets - open-model load shapes in requests per second
+LOAD_SHAPE_PRESETS = {
+    "1": {
+        "name": "Steady Light",
+        "description": "constant 5 requests/second for 30s",
+        "shape": {"type": "constant", "rate": 5, "duration": 30, "max_users": 50},
+    },
+    "2": {
+        "name": "Step Up",
+        "description": "10 to 100 requests/second, +10 every 10s",
+        "shape": {"type": "step", "start": 10, "step": 10, "every": 10, "steps": 10, "max_users": 500},
+    },
+    "3": {
+        "name": "Spike",
+        "description": "20 requests/second with a 15s spike to 200 after 30s",
+        "shape": {"type": "spike", "base": 20, "peak": 200, "at": 30, "length": 15, "duration": 75, "max_users": 1000},
+    },
+    "4": {
+        "name": "Ramp-Hold-Ramp",
+        "description": "ramp to 100 requests/second over 20s, hold 60s, ramp down",
+        "shape": {"type": "ramp-hold-ramp", "rate": 100, "ramp": 20, "hold": 60, "max_users": 1000},
+    },
+}
+
+# HTTP client engines the runtime can build every template on
+ENGINES = {
+    "requests": "Standard (requests) - most compatible",
+    "fast": "Fast client (geventhttpclient) - several times more requests per CPU core",
+}
 
 def build_custom_form_test(existing_host=None, auto_config=None):
     """Interactive form builder - asks user questions and generates custom test"""
@@ -668,17 +214,32 @@ def build_custom_form_test(existing_host=None, auto_config=None):
         print("  5. Phone number (e.g., 555-123-4567)")
         print("  6. Text message (e.g., 'Test submission')")
         print("  7. Custom text (I'll ask you what to send)")
+        print("  8. Column from your data file (CSV/JSONL with real test data)")
 
         try:
-            data_type = int(input("Choose type (1-7): ").strip())
+            data_type = int(input("Choose type (1-8): ").strip())
         except ValueError:
             data_type = 6  # Default to text message
 
+        if data_type == 8 and "data_file" not in form_info:
+            data_file = choose_data_file()
+            if data_file:
+                form_info["data_file"], form_info["data_strategy"] = data_file
+            else:
+                print("No data file - using a text message for this field")
+                data_type = 6
+
         field_info = {"name": field_name, "type": data_type}
 
         if data_type == 7:  # Custom text
             custom_text = input("What text should I send for this field? ").strip()
             field_info["custom_text"] = custom_text
+        elif data_type == 8:  # Data file column
+            columns = data_file_columns(form_info["data_file"])
+            if columns:
+                print(f"Columns in your file: {', '.join(columns)}")
+            column = input(f"Which column? (Enter for '{field_name}'): ").strip()
+            field_info["column"] = column or field_name
 
         fields.append(field_info)
         print(f"Added field '{field_name}'")
@@ -720,9 +281,7 @@ def build_custom_form_test(existing_host=None, auto_config=None):
             form_info["duration"] = "60m"
 
     form_info["max_users"] = max_users
-
-    print("\nGENERATING YOUR CUSTOM TEST...")
-    test_code = generate_custom_form_code(form_info)
+    form_info["form_page_reuse"] = choose_form_page_reuse()
 
     # Summary
     print("\n" + "=" * 50)
@@ -733,161 +292,60 @@ def build_custom_form_test(existing_host=None, auto_config=None):
     print(f"Submit: {form_info['submit_url']}")
     print(f"Fields: {len(fields)} custom fields")
     print(f"Max Users: {max_users}")
-    print(f"Duration: {duration_minutes} minutes")
+    print(f"Duration: {form_info['duration']}")
     print()
 
-    return {"code": test_code, "form_info": form_info}
+    return {"form_info": form_info}
 
 
-def sanitize_field_name_for_function(field_name):
-    """Convert field name to valid Python function name"""
-    # Replace spaces and special characters with underscores
-    import re
-
-    sanitized = re.sub(r"[^a-zA-Z0-9]", "_", field_name.lower())
-    # Remove multiple consecutive underscores
-    sanitized = re.sub(r"_+", "_", sanitized)
-    # Remove leading/trailing underscores
-    sanitized = sanitized.strip("_")
-    # Ensure it doesn't start with a number
-    if sanitized and sanitized[0].isdigit():
-        sanitized = "field_" + sanitized
-    return sanitized
-
-
-def generate_custom_form_code(form_info):
-    """Generate Python code for the custom form test"""
-
-    # Build field generators
-    field_generators = []
-    form_data_fields = []
-
-    for field in form_info["fields"]:
-        field_name = field["name"]
-        field_type = field["type"]
-        # Create a safe function name
-        safe_function_name = sanitize_field_name_for_function(field_name)
-
-        if field_type == 1:  # Student ID
-            field_generators.append(
-                f"""
-    def generate_{safe_function_name}(self):
-        \"\"\"Generate fake {field_name} for testing\"\"\"
-        return f"{{random.randint(10000, 99999)}}\""""
-            )
-            form_data_fields.append(
-                f'        "{field_name}": self.generate_{safe_function_name}(),'
-            )
-
-        elif field_type == 2:  # University ID
-            field_generators.append(
-                f"""
-    def generate_{safe_function_name}(self):
-        \"\"\"Generate fake {field_name} for testing\"\"\"
-        return f"UNI{{random.randint(10000, 99999)}}\""""
-            )
-            form_data_fields.append(
-                f'        "{field_name}": self.generate_{safe_function_name}(),'
-            )
-
-        elif field_type == 3:  # Name
-            form_data_fields.append(
-                f'        "{field_name}": self.generate_fake_name(),'
-            )
-
-        elif field_type == 4:  # Email
-            form_data_fields.append(
-                f'        "{field_name}": self.generate_fake_email(),'
-            )
+def choose_data_file():
+    """Ask for a CSV/JSONL data file and how rows are handed out - None to skip"""
+    while True:
+        data_file = input("Path to your data file (.csv or .jsonl, Enter to skip): ").strip()
+        if not data_file:
+            return None
+        if os.path.exists(data_file):
+            break
+        print("File not found - please try again")
 
-        elif field_type == 5:  # Phone
-            field_generators.append(
-                f"""
-    def generate_{safe_function_name}(self):
-        \"\"\"Generate fake {field_name} for testing\"\"\"
-        return f"555-{{random.randint(100, 999)}}-{{random.randint(1000, 9999)}}\""""
-            )
-            form_data_fields.append(
-                f'        "{field_name}": self.generate_{safe_function_name}(),'
-            )
+    print("\nHow should rows be handed out?")
+    print("  1. In order, shared by all users - every row used once per pass (default)")
+    print("  2. One row per user - e.g. each user logs in with its own account")
+    print("  3. Random rows - rows can repeat")
 
-        elif field_type == 6:  # Text message
-            form_data_fields.append(
-                f'        "{field_name}": "Test submission from load testing - please disregard",'
-            )
+    strategies = {"1": "sequential", "2": "per-user", "3": "random"}
+    while True:
+        choice = input("Select option (1-3, Enter for 1): ").strip() or "1"
+        if choice in strategies:
+            return os.path.abspath(data_file), strategies[choice]
+        print("Please enter 1, 2, or 3")
 
-        elif field_type == 7:  # Custom text
-            custom_text = form_info["fields"][
-                next(
-                    i
-                    for i, f in enumerate(form_info["fields"])
-                    if f["name"] == field_name
-                )
-            ][
-                "custom_text"
-            ]  # Ensure correct custom_text access
-            form_data_fields.append(f'        "{field_name}": "{custom_text}",')
-
-    # Build the complete test code
-    test_code = f'''from locust import HttpUser, task, between
-import random
-import string
-
-class CustomFormUser(HttpUser):
-    wait_time = between(1, 3)
-    
-    def generate_fake_email(self):
-        """Generate a fake email for testing"""
-        domains = ["example.com", "test.com", "fake.org", "demo.net"]
-        username = ''.join(random.choices(string.ascii_lowercase, k=8))
-        return f"{{username}}@{{random.choice(domains)}}"
-    
-    def generate_fake_name(self):
-        """Generate a fake name for testing"""
-        first_names = ["John", "Jane", "Mike", "Sarah", "David", "Lisa", "Chris", "Emma"]
-        last_names = ["Smith", "Johnson", "Brown", "Davis", "Wilson", "Moore", "Taylor", "Anderson"]
-        return f"{{random.choice(first_names)}} {{random.choice(last_names)}}"
-{''.join(field_generators)}
-    
-    @task
-    def submit_custom_form(self):
-        """Submit your custom form with realistic test data"""
-        # Load the form page first
-        with self.client.get("{form_info['form_page']}", catch_response=True) as response:
-            if response.status_code == 200:
-                # Prepare form data with your specific fields
-                form_data = {{
-{chr(10).join(form_data_fields)}
-        "submit": "1"
-                }}
-                  # Submit the form
-                with self.client.post("{form_info['submit_url']}", data=form_data, catch_response=True) as post_response:
-                    if post_response.status_code in [200, 201, 302, 422]:     
-                        post_response.success()
-                        # print(f"Form submitted successfully! Response: {{post_response.status_code}}") # Suppressed for brevity during load
-                    else:
-                        post_response.failure(f"Form submission failed: {{post_response.status_code}}")
-                        print(f"Form submission failed: {{post_response.status_code}}") # Keep this for critical errors
-            else:
-                response.failure(f"Could not load form page: {{response.status_code}}")
-                print(f"Could not load form page: {{response.status_code}}") # Keep this for critical errors
-            # Only mark the overall transaction as success if form page loaded (even if submission fails)
-            # Or consider handling this more granularly based on your test goals.
-            response.success() 
-
-# Configuration for your test:
-# Website: {form_info['website']}
-# Expected Users: {form_info['max_users']}
-# Duration: {form_info['duration']} minutes
-# 
-# Recommended Locust settings:
-# - Start with 10 users
-# - Ramp up to {min(form_info['max_users'] // 4, 100)} users over 2 minutes  
-# - Test for {form_info['duration']} minutes
-# - Monitor your database and server performance!
-'''
 
-    return test_code
+def data_file_columns(data_file):
+    """Column names from a CSV header or the first JSONL record"""
+    try:
+        with open(data_file, "r", encoding="utf-8-sig") as f:
+            first_line = f.readline()
+        if data_file.lower().endswith((".jsonl", ".ndjson")):
+            return list(json.loads(first_line).keys())
+        return next(csv.reader([first_line]))
+    except (OSError, ValueError, AttributeError, StopIteration):
+        return []
+
+
+def choose_form_page_reuse():
+    """Ask how often users load the form page before submitting (Enter keeps every time)"""
+    print("\nHow often should each user load the form page before submitting?")
+    print("  1. Before every submission - like a real visitor (default)")
+    print("  2. Once per user - reuse its hidden fields and CSRF token")
+    print("  3. Once for all users - fastest, only if tokens aren't tied to a login/session")
+
+    modes = {"1": "off", "2": "session", "3": "global"}
+    while True:
+        choice = input("Select option (1-3, Enter for 1): ").strip() or "1"
+        if choice in modes:
+            return modes[choice]
+        print("Please enter 1, 2, or 3")
 
 
 def get_user_input():
@@ -1002,53 +460,10 @@ def get_user_input():
             break
         elif mode == "2":
             config["headless"] = True
-            print("Automatic mode - Now let's set intensity...")
-
-            # Only ask for intensity in automatic mode
-            print("\nHow intense should the test be?")
-            test_levels = {
-                "1": {
-                    "name": "Light Test",
-                    "users": 5,
-                    "spawn": 1,
-                    "duration": "15s",
-                },
-                "2": {
-                    "name": "Medium Test",
-                    "users": 25,
-                    "spawn": 3,
-                    "duration": "30s",
-                },
-                "3": {
-                    "name": "Heavy Test",
-                    "users": 100,
-                    "spawn": 10,
-                    "duration": "1m",
-                },
-                "4": {
-                    "name": "Extreme Test",
-                    "users": 500,
-                    "spawn": 20,
-                    "duration": "2m",
-                },
-            }
-
-            for key, level in test_levels.items():
-                print(
-                    f"  {key}. {level['name']} - {level['users']} users, {level['duration']}"
-                )
+            print("Automatic mode - Now let's set the load...")
 
-            while True:
-                choice = input("\nSelect intensity (1-4): ").strip()
-                if choice in test_levels:
-                    selected_level = test_levels[choice]
-                    config["users"] = selected_level["users"]
-                    config["spawn_rate"] = selected_level["spawn"]
-                    config["duration"] = selected_level["duration"]
-                    print(f"Selected: {selected_level['name']}")
-                    break
-                else:
-                    print("Please enter 1, 2, 3, or 4")
+            # Only ask for the load shape in automatic mode
+            choose_load_shape(config)
 
             # Ask for specific URLs/forms to test in automatic mode
             print()
@@ -1112,9 +527,22 @@ def get_user_input():
 
             break
         else:
-            print(
-                "Please enter 1 or 2"
-            )  # 5. Always generate reports in auto mode - in reports folder
+            print("Please enter 1 or 2")
+
+    # 4. Traffic distribution - how evenly visits spread over pages and IDs
+    if config["template"] in POPULARITY_TEMPLATES:
+        choose_traffic_distribution(config)
+    if config["template"] == "forms":
+        config["form_token_cache"] = choose_form_page_reuse()
+    if config["template"] == "api":
+        print("\nUse a data file for the create-user payloads? (random data otherwise)")
+        data_file = choose_data_file()
+        if data_file:
+            config["feeder_file"], config["feeder_strategy"] = data_file
+    choose_engine(config)
+    choose_processes(config)
+
+    # 5. Always generate reports in auto mode - in reports folder
     if config["headless"]:
         # Create reports folder if it doesn't exist
         os.makedirs("reports", exist_ok=True)
@@ -1128,6 +556,212 @@ def get_user_input():
     return config
 
 
+def load_shape_duration(shape):
+    """Total seconds a load shape runs for - the longest it can run for a capacity search"""
+    if shape["type"] == "capacity-search":
+        return shape.get("step_seconds", 30) * shape.get("max_steps", 12)
+    if shape["type"] == "step":
+        return shape["every"] * shape["steps"]
+    if shape["type"] == "ramp-hold-ramp":
+        return 2 * shape["ramp"] + shape["hold"]
+    return shape["duration"]
+
+
+def describe_load_shape(shape):
+    """One-line description of a load shape for the summary"""
+    if shape["type"] == "constant":
+        return f"Constant {shape['rate']} req/s"
+    if shape["type"] == "step":
+        top = shape["start"] + shape["step"] * (shape["steps"] - 1)
+        return f"Stepped {shape['start']}-{top} req/s (+{shape['step']} every {shape['every']}s)"
+    if shape["type"] == "spike":
+        return f"Spike {shape['base']} -> {shape['peak']} req/s for {shape['length']}s"
+    if shape["type"] == "capacity-search":
+        return (
+            f"Capacity search from {shape.get('start', 10)} req/s (p95 <= {shape.get('p95_ms', 500):g}ms, "
+            f"p99 <= {shape.get('p99_ms', 1000):g}ms, errors <= {shape.get('error_percent', 1):g}%)"
+        )
+    return f"Ramp-hold-ramp to {shape['rate']} req/s (hold {shape['hold']}s)"
+
+
+def choose_load_shape(config):
+    """Ask how requests should arrive - the rate is held however slowly the server answers"""
+    print("\nHow should the load be applied? (requests per second, kept up even if your site slows down)")
+    for key, preset in LOAD_SHAPE_PRESETS.items():
+        print(f"  {key}. {preset['name']} - {preset['description']}")
+    custom_key = str(len(LOAD_SHAPE_PRESETS) + 1)
+    search_key = str(len(LOAD_SHAPE_PRESETS) + 2)
+    print(f"  {custom_key}. Custom - your own constant rate and duration")
+    print(f"  {search_key}. Capacity Search - find the highest rate your site handles within your limits")
+
+    while True:
+        choice = input(f"\nSelect load (1-{search_key}): ").strip()
+        if choice in LOAD_SHAPE_PRESETS:
+            preset = LOAD_SHAPE_PRESETS[choice]
+            shape = dict(preset["shape"])
+            print(f"Selected: {preset['name']}")
+            break
+        if choice == custom_key:
+            try:
+                rate = float(input("Requests per second (e.g., 50): ").strip())
+                duration = int(input("Duration in seconds (e.g., 120): ").strip())
+            except ValueError:
+                print("Please enter numbers")
+                continue
+            shape = {"type": "constant", "rate": rate, "duration": duration, "max_users": 1000}
+            break
+        if choice == search_key:
+            shape = choose_capacity_limits()
+            break
+        print(f"Please enter a number between 1 and {search_key}")
+
+    config["load_shape"] = shape
+    # The shape decides users and timing - these are for the summary and the Form Builder
+    config["users"] = shape["max_users"]
+    config["spawn_rate"] = "Auto"
+    config["duration"] = f"{load_shape_duration(shape)}s"
+
+
+def choose_capacity_limits():
+    """Ask for the SLOs a capacity search step must meet to count as sustainable"""
+    print("\nThe test raises the rate step by step and narrows in on the highest rate")
+    print("that stays within these limits (Enter keeps the default):")
+    limits = {}
+    for key, question, default in (
+        ("p95_ms", "95% of responses faster than (ms)", 500),
+        ("p99_ms", "99% of responses faster than (ms)", 1000),
+        ("error_percent", "Failed requests at most (%)", 1),
+        ("max_rate", "Highest rate to try (req/s)", 1000),
+    ):
+        try:
+            value = input(f"{question} [{default}]: ").strip()
+            limits[key] = float(value) if value else default
+        except ValueError:
+            limits[key] = default
+    shape = {"type": "capacity-search", "start": 10, "step_seconds": 30, "max_steps": 12, "max_users": 2000, **limits}
+    print(f"Each step runs {shape['step_seconds']}s - the search takes at most {load_shape_duration(shape) // 60} minutes")
+    return shape
+
+
+def choose_engine(config):
+    """Ask which HTTP client the simulated users send requests with"""
+    print("\nWhich HTTP client should the simulated users use?")
+    engines = list(ENGINES)
+    for i, engine in enumerate(engines, 1):
+        print(f"  {i}. {ENGINES[engine]}{' (default)' if i == 1 else ''}")
+    print("The fast client lets one computer simulate far more traffic - pick it for")
+    print("heavy tests, or keep the standard client if a test behaves differently.")
+    while True:
+        choice = input(f"Select option (1-{len(engines)}, Enter for 1): ").strip() or "1"
+        if choice.isdigit() and 1 <= int(choice) <= len(engines):
+            config["engine"] = engines[int(choice) - 1]
+            return
+        print(f"Please enter a number between 1 and {len(engines)}")
+
+
+def choose_processes(config):
+    """Ask how many CPU cores generate load - more than one runs a master plus one worker per core"""
+    config["processes"] = 1
+    cores = os.cpu_count() or 1
+    if cores < 2 or ROLE == "master":
+        return  # A distributed master leaves the load to its remote workers
+
+    print(f"\nHow many CPU cores should generate load? (this computer has {cores})")
+    print("One core is enough for most tests - use more for heavy tests where")
+    print("this computer, not your website, would otherwise be the bottleneck.")
+    while True:
+        choice = input(f"Cores to use (1-{cores}, Enter for 1): ").strip() or "1"
+        if choice.isdigit() and 1 <= int(choice) <= cores:
+            config["processes"] = int(choice)
+            return
+        print(f"Please enter a number between 1 and {cores}")
+
+
+def choose_traffic_distribution(config):
+    """Ask how skewed page and ID picks should be (Enter keeps it even)"""
+    print("\nHow should visits be spread across your pages and items?")
+    print("  1. Even - every page/item is equally likely (default)")
+    print("  2. Realistic - a few popular pages get most visits (Zipf)")
+    print("  3. Hot and cold - most visits go to a small hot set")
+    print("  4. From a file - your own popularity numbers (CSV: item,weight)")
+
+    while True:
+        choice = input("\nSelect distribution (1-4, Enter for 1): ").strip() or "1"
+        if choice == "1":
+            config["popularity"] = "uniform"
+            break
+        elif choice == "2":
+            config["popularity"] = "zipf"
+            try:
+                exponent = input("How skewed? Zipf exponent (Enter for 1.0): ").strip()
+                config["zipf_exponent"] = float(exponent) if exponent else 1.0
+            except ValueError:
+                config["zipf_exponent"] = 1.0
+            break
+        elif choice == "3":
+            config["popularity"] = "hotset"
+            break
+        elif choice == "4":
+            popularity_file = input("Path to your popularity CSV file: ").strip()
+            if popularity_file and os.path.exists(popularity_file):
+                config["popularity"] = "empirical"
+                config["popularity_file"] = os.path.abspath(popularity_file)
+                break
+            print("File not found - please try again")
+        else:
+            print("Please enter 1, 2, 3, or 4")
+
+    print(f"Traffic distribution: {describe_traffic_distribution(config)}")
+
+
+def describe_traffic_distribution(config):
+    """One-line description of the chosen traffic distribution"""
+    model = config.get("popularity", "uniform")
+    if model == "zipf":
+        return f"Zipf (exponent {config.get('zipf_exponent', 1.0):g})"
+    if model == "hotset":
+        return "Hot/cold (80% of traffic to 20% of items)"
+    if model == "empirical":
+        return f"Empirical (from {config.get('popularity_file')})"
+    return "Uniform"
+
+
+def install_runtime():
+    """Copy the runtime package next to tests/ and precompile it for every run"""
+    source = Path(getattr(sys, "_MEIPASS", Path(__file__).resolve().parent)) / RUNTIME_PACKAGE
+    target = Path.cwd() / RUNTIME_PACKAGE
+    if source.resolve() != target.resolve():
+        target.mkdir(exist_ok=True)
+        for module in source.glob("*.py"):
+            copy = target / module.name
+            if not copy.exists() or copy.read_bytes() != module.read_bytes():
+                copy.write_bytes(module.read_bytes())
+    # Compile once here so Locust (and each of its workers) loads cached bytecode
+    compileall.compile_dir(str(target), quiet=1)
+
+
+def write_scenario(config, scenario_path, form_info=None):
+    """Write the wizard choices for this test as a JSON scenario file"""
+    scenario = {"template": config["template"], "host": config.get("host")}
+    for name in SCENARIO_SETTINGS:
+        if config.get(name) not in (None, "", []):
+            scenario[name] = config[name]
+
+    if form_info:
+        scenario["form"] = {
+            "form_page": form_info["form_page"],
+            "submit_url": form_info["submit_url"],
+            "fields": form_info["fields"],
+        }
+        scenario["form_token_cache"] = form_info.get("form_page_reuse", "off")
+        if form_info.get("data_file"):
+            scenario["feeder_file"] = form_info["data_file"]
+            scenario["feeder_strategy"] = form_info["data_strategy"]
+
+    with open(scenario_path, "w", encoding="utf-8") as f:
+        json.dump(scenario, f, indent=2)
+
+
 def create_test_file(config):
     """Create the test file based on selected template"""
     template_key = config["template"]
@@ -1136,28 +770,30 @@ def create_test_file(config):
     # Create tests directory if it doesn't exist
     tests_dir = "tests"
     os.makedirs(tests_dir, exist_ok=True)
+    install_runtime()
+
+    # Create the file path in the tests directory - matrix cells name their own files
+    test_name = config.get("test_name")
+    test_file_path = os.path.join(tests_dir, f"{test_name}_test.py" if test_name else template["filename"])
+    scenario_name = f"{test_name or template_key}_scenario.json"
+    scenario_path = os.path.join(tests_dir, scenario_name)
 
-    # Create the file path in the tests directory
-    test_file_path = os.path.join(
-        tests_dir, template["filename"]
-    )  # Handle interactive custom form creation
-    if template.get("interactive", False):
+    form_info = config.get("form")  # A form described up front (matrix files) needs no questions
+    # Handle interactive custom form creation
+    if template.get("interactive", False) and not form_info:
         print("\nStarting Smart Form Builder...")
         # Pass existing host AND the current config to the custom form builder
         existing_host = config.get("host", None)
         custom_result = build_custom_form_test(
             existing_host, config
         )  # Pass config here
+        form_info = custom_result["form_info"]
 
         print(f"\nCreating custom test file: {test_file_path}")
-        with open(test_file_path, "w", encoding="utf-8") as f:
-            f.write(custom_result["code"])
-
         print("Custom form test created successfully!")
         print(
             "This test is perfectly tailored for YOUR form!"
         )  # Update config with custom form info
-        form_info = custom_result["form_info"]
         if "website" in form_info and form_info["website"]:
             config["host"] = form_info["website"]
             print(f"Auto-set target to: {config['host']}")
@@ -1168,10 +804,9 @@ def create_test_file(config):
             print(f"Auto-set users to: {config['users']}")
 
         if "duration" in form_info:
-            # Convert minutes (from form_info) to Locust's 'm' duration string
-            duration_locust_format = f"{form_info['duration']}m"
-            config["duration"] = duration_locust_format
-            print(f"Auto-set duration to: {form_info['duration']} minutes")
+            # Already in Locust's format ('60m', '30s') - don't add another unit
+            config["duration"] = form_info["duration"]
+            print(f"Auto-set duration to: {form_info['duration']}")
 
         # Set a reasonable spawn rate (10% of max users, minimum 1, maximum 50)
         # This will only be set if not already determined by automatic mode intensity
@@ -1186,68 +821,34 @@ def create_test_file(config):
     else:
         # Regular template creation
         print(f"\nCreating test file: {test_file_path}")
-
-        # Get the template code
-        template_code = template["code"]
-
-        # Inject custom URLs if provided
         if config.get("custom_urls"):
-            custom_urls = config["custom_urls"]
-            print(f"Using your custom URLs: {', '.join(custom_urls)}")
-
-            # Add custom URLs to the template
-            if template_key == "forms":
-                # Add custom form URLs to the forms template
-                custom_forms_code = f'''
-    # Custom form URLs specified by user
-    CUSTOM_FORM_URLS = {custom_urls}
-    
-    def get_custom_form_urls(self):
-        """Use user-specified form URLs"""
-        return self.CUSTOM_FORM_URLS'''
-
-                # Insert after the class definition
-                template_code = template_code.replace(
-                    "class FormTestUser(HttpUser):",
-                    f"class FormTestUser(HttpUser):{custom_forms_code}",
-                )
+            print(f"Using your custom URLs: {', '.join(config['custom_urls'])}")
 
-            elif template_key == "ecommerce":
-                # Add custom e-commerce URLs
-                custom_urls_code = f"""
-    # Custom e-commerce URLs specified by user  
-    CUSTOM_ECOMMERCE_URLS = {custom_urls}"""
+    # The settings go to the scenario file, the test file only imports the user class
+    write_scenario(config, scenario_path, form_info)
+    config["scenario_file"] = scenario_path
+    with open(test_file_path, "w", encoding="utf-8") as f:
+        f.write(
+            f'''"""{template["name"]} - generated by LRGEX Web Benchmark
 
-                template_code = template_code.replace(
-                    "class EcommerceUser(HttpUser):",
-                    f"class EcommerceUser(HttpUser):{custom_urls_code}",
-                )
-
-            elif template_key == "support":
-                # Add custom support URLs
-                custom_urls_code = f"""
-    # Custom support URLs specified by user
-    CUSTOM_SUPPORT_URLS = {custom_urls}"""
-
-                template_code = template_code.replace(
-                    "class SupportUser(HttpUser):",
-                    f"class SupportUser(HttpUser):{custom_urls_code}",
-                )
+The user class lives in the {RUNTIME_PACKAGE} package and reads its settings
+from {scenario_name}. Edit the scenario (or set LRGEX_* environment
+variables) to change the test, or subclass the user class here.
+"""
 
-            elif template_key == "api":
-                # Add custom API endpoints
-                custom_urls_code = f"""
-    # Custom API endpoints specified by user
-    CUSTOM_API_ENDPOINTS = {custom_urls}"""
+import os
+import sys
 
-                template_code = template_code.replace(
-                    "class APIUser(HttpUser):",
-                    f"class APIUser(HttpUser):{custom_urls_code}",
-                )
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+os.environ.setdefault("LRGEX_SCENARIO", os.path.join(HERE, "{scenario_name}"))
 
-        with open(test_file_path, "w", encoding="utf-8") as f:
-            f.write(template_code)
+from {RUNTIME_PACKAGE}.{template["module"]} import {template["user_class"]}  # noqa: E402,F401
+from {RUNTIME_PACKAGE}.arrival import LoadShape  # noqa: E402,F401 - None unless the scenario sets a load_shape
+'''
+        )
 
+    if not form_info:
         print("Test file created successfully!")
         print(f"The test will simulate users {template['description'].lower()}")
 
@@ -1266,7 +867,11 @@ def build_command(config):
     cmd.extend(["--host", config["host"]])
 
     # Add headless mode options
-    if config["headless"]:
+    if config["headless"] and config.get("load_shape"):
+        # The load shape in the scenario sets users and stops the test itself
+        cmd.append("--headless")
+        print(f"Load shape: {describe_load_shape(config['load_shape'])}, {config['duration']}")
+    elif config["headless"]:
         cmd.append("--headless")
         cmd.extend(["-u", str(config["users"])])
         cmd.extend(["-r", str(config["spawn_rate"])])
@@ -1305,6 +910,23 @@ def build_command(config):
 
     # Add log level
     cmd.extend(["--loglevel", config["log_level"]])
+    if config.get("only_summary"):
+        cmd.append("--only-summary")  # No stats table every 2s - matrix runs print their own summary
+
+    # Several cores or machines: this process becomes the master that the workers report to
+    max_wait = 60
+    if ROLE == "master":
+        config["master_port"] = MASTER_PORT
+        config["expect_workers"] = EXPECT_WORKERS
+        max_wait = EXPECT_WORKERS_MAX_WAIT
+    elif config.get("processes", 1) > 1:
+        config["master_port"] = free_port()
+        config["expect_workers"] = config["processes"]
+    if config.get("expect_workers"):
+        cmd.extend(["--master", "--master-bind-port", str(config["master_port"])])
+        if config["headless"]:
+            cmd.extend(["--expect-workers", str(config["expect_workers"])])
+            cmd.extend(["--expect-workers-max-wait", str(max_wait)])
 
     # Debug: Show the command being executed
     print(f"\nDEBUG: Running command: {' '.join(cmd)}")
@@ -1312,6 +934,270 @@ def build_command(config):
     return cmd
 
 
+def free_port():
+    """A free local TCP port for the master - avoids clashing with another run"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def create_bundle_file(config):
+    """Self-contained test file for a distributed master - workers download it with "-f -"
+
+    Locust only sends the test file itself to remote workers, so the runtime
+    package and the scenario travel inside it and are unpacked on import.
+    """
+    template = TEST_TEMPLATES[config["template"]]
+    runtime = BytesIO()
+    with zipfile.ZipFile(runtime, "w", zipfile.ZIP_DEFLATED) as bundle:
+        for module in sorted((Path.cwd() / RUNTIME_PACKAGE).glob("*.py")):
+            bundle.write(module, f"{RUNTIME_PACKAGE}/{module.name}")
+    with open(config["scenario_file"], "r", encoding="utf-8") as f:
+        scenario = f.read()
+
+    bundle_path = os.path.join("tests", template["filename"].replace("_test.py", "_bundle.py"))
+    with open(bundle_path, "w", encoding="utf-8") as f:
+        f.write(
+            f'''"""{template["name"]} - distributed test generated by LRGEX Web Benchmark
+
+Carries the {RUNTIME_PACKAGE} package and the scenario so workers that download
+this file from the master ("locust -f - --worker") need nothing else.
+"""
+
+import base64
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import zipfile
+
+RUNTIME_ZIP = "{base64.b64encode(runtime.getvalue()).decode("ascii")}"
+SCENARIO = {scenario!r}
+
+bundle_dir = os.path.join(
+    tempfile.gettempdir(), "lrgex_bundle_" + hashlib.sha256((RUNTIME_ZIP + SCENARIO).encode()).hexdigest()[:16]
+)
+if not os.path.isdir(bundle_dir):
+    unpack_dir = f"{{bundle_dir}}.{{os.getpid()}}"
+    zipfile.ZipFile(io.BytesIO(base64.b64decode(RUNTIME_ZIP))).extractall(unpack_dir)
+    with open(os.path.join(unpack_dir, "scenario.json"), "w", encoding="utf-8") as f:
+        f.write(SCENARIO)
+    try:
+        os.replace(unpack_dir, bundle_dir)
+    except OSError:
+        pass  # Another worker on this machine unpacked it first
+sys.path.insert(0, bundle_dir)
+os.environ["LRGEX_SCENARIO"] = os.path.join(bundle_dir, "scenario.json")
+
+from {RUNTIME_PACKAGE}.{template["module"]} import {template["user_class"]}  # noqa: E402,F401
+from {RUNTIME_PACKAGE}.arrival import LoadShape  # noqa: E402,F401 - None unless the scenario sets a load_shape
+'''
+        )
+    return bundle_path
+
+
+def run_worker():
+    """Worker role - fetch the test from the master and generate load until it finishes"""
+    print(f"Worker mode - connecting to master at {MASTER_HOST}:{MASTER_PORT}")
+    print("The master sends the test and its settings, and decides when to start and stop.")
+    cmd = [
+        "uv", "run", "--module", "locust", "-f", "-",
+        "--worker",
+        "--master-host", MASTER_HOST,
+        "--master-port", str(MASTER_PORT),
+        "--loglevel", "INFO",
+    ]
+    result = subprocess.run(cmd, check=False)
+    if result.returncode != 0:
+        print(f"\nWarning: Locust worker exited with code {result.returncode}")
+
+
+def build_worker_command(config):
+    """Locust command for one worker process of a multi-core run"""
+    return [
+        "uv", "run", "--module", "locust", "-f", config["test_file"],
+        "--worker",
+        "--master-host", "127.0.0.1",
+        "--master-port", str(config["master_port"]),
+        "--host", config["host"],
+        "--loglevel", config["log_level"],
+    ]
+
+
+def build_environment(config, worker_index=None):
+    """Environment for a Locust process - points the runtime at this test's scenario"""
+    env = os.environ.copy()
+    if config.get("scenario_file"):
+        env["LRGEX_SCENARIO"] = os.path.abspath(config["scenario_file"])
+    if worker_index is not None:
+        # Workers split the data file and ID ranges by index and share one discovery
+        env["LRGEX_WORKER_INDEX"] = str(worker_index)
+        env["LRGEX_WORKER_COUNT"] = str(config["processes"])
+        if "csv" in config:
+            env["LRGEX_CSV_PREFIX"] = config["csv"].replace(".csv", "")
+    return env
+
+
+def can_run_in_process(config):
+    """Single-process automatic tests run inside this process when Locust is importable here"""
+    return (
+        LOCUST_RUNNER == "auto"
+        and config["headless"]
+        and config.get("processes", 1) <= 1
+        and ROLE == "standalone"
+        and importlib.util.find_spec("locust") is not None
+    )
+
+
+def run_locust_in_process(config, cmd):
+    """Run the test on Locust's runner API in this process - same reports as the CLI
+
+    Skips the uv environment resolution and interpreter start-up of a subprocess.
+    The runtime is imported fresh with its own event hooks for every test,
+    because it reads the scenario when it is imported.
+    """
+    import gevent
+    import locust
+    from locust import stats
+    from locust.argument_parser import parse_options
+    from locust.env import Environment
+    from locust.html import get_html_report, process_html_filename
+    from locust.log import setup_logging
+    from locust.util.load_locustfile import load_locustfile
+
+    options = parse_options(cmd[cmd.index("locust") + 1:])  # The arguments the CLI would get
+    setup_logging(options.loglevel, options.logfile)
+    os.environ["LRGEX_SCENARIO"] = os.path.abspath(config["scenario_file"])
+    test_module = os.path.splitext(os.path.basename(config["test_file"]))[0]
+    for name in list(sys.modules):
+        if name == test_module or name == RUNTIME_PACKAGE or name.startswith(RUNTIME_PACKAGE + "."):
+            del sys.modules[name]
+    locust.events = locust.Events()  # The runtime's listeners attach to whatever this is on import
+
+    user_classes, shape_classes = load_locustfile(config["test_file"])
+    environment = Environment(
+        locustfile=os.path.basename(config["test_file"]),
+        user_classes=list(user_classes.values()),
+        shape_class=shape_classes[0] if shape_classes else None,
+        events=locust.events,
+        host=options.host,
+        parsed_options=options,
+    )
+    runner = environment.create_local_runner()
+    environment.events.init.fire(environment=environment, runner=runner, web_ui=None)
+
+    greenlets = [gevent.spawn(stats.stats_history, runner)]
+    if not options.only_summary:
+        greenlets.append(gevent.spawn(stats.stats_printer(runner.stats)))
+    csv_writer = None
+    if options.csv_prefix:
+        os.makedirs(os.path.dirname(options.csv_prefix) or ".", exist_ok=True)
+        csv_writer = stats.StatsCSVFileWriter(
+            environment, stats.PERCENTILES_TO_REPORT, options.csv_prefix, options.stats_history_enabled
+        )
+        greenlets.append(gevent.spawn(csv_writer.stats_writer))
+
+    try:
+        if environment.shape_class:
+            runner.start_shape()
+            runner.shape_greenlet.join()
+        else:
+            greenlets.append(gevent.spawn(runner.start, options.num_users, options.spawn_rate))
+            if options.run_time:  # Already in seconds - without one the test runs until it is stopped
+                gevent.spawn_later(options.run_time, runner.quit)
+            runner.greenlet.join()
+    except KeyboardInterrupt:
+        print("\nTest stopped by user - saving the results so far")
+    finally:
+        runner.quit()
+        environment.events.quitting.fire(environment=environment, reverse=True)
+        if csv_writer:
+            gevent.sleep(stats.CSV_STATS_INTERVAL_SEC)  # One more pass of the writer, after the last request
+        gevent.killall(greenlets)
+        if csv_writer:
+            csv_writer.close_files()
+
+    if options.html_file:
+        process_html_filename(options)
+        with open(options.html_file, "w", encoding="utf-8") as f:
+            f.write(get_html_report(environment, show_download_link=False))
+    stats.print_stats(runner.stats, current=False)
+    stats.print_percentile_stats(runner.stats)
+    stats.print_error_report(runner.stats)
+
+    if environment.process_exit_code is not None:
+        code = environment.process_exit_code
+    elif runner.errors or runner.exceptions:
+        code = options.exit_code_on_error
+    else:
+        code = 0
+    environment.events.quit.fire(exit_code=code)
+    result = subprocess.CompletedProcess(cmd, code)
+    result.environment = environment  # Live stats stay available to the caller
+    return result
+
+
+def clear_raw_samples(config):
+    """Remove the last run's raw samples files - a run with fewer processes would not overwrite them all"""
+    if "csv" not in config:
+        return
+    prefix = Path(config["csv"].replace(".csv", ""))
+    for path in prefix.parent.glob(f"{prefix.name}_samples*.lrs"):
+        path.unlink()
+
+
+def run_locust(config, cmd):
+    """Run Locust and wait for it - multi-core runs also start one worker per core"""
+    processes = config.get("processes", 1)
+    clear_raw_samples(config)
+    if can_run_in_process(config):
+        return run_locust_in_process(config, cmd)
+    if processes <= 1:
+        return subprocess.run(cmd, check=False, env=build_environment(config))
+
+    print(f"Starting 1 master and {processes} worker processes...")
+    master = subprocess.Popen(cmd, env=build_environment(config))
+    workers = [
+        subprocess.Popen(build_worker_command(config), env=build_environment(config, index))
+        for index in range(processes)
+    ]
+    try:
+        master.wait()
+    finally:
+        # Workers quit with the master - stop any that are still hanging on
+        for worker in workers:
+            try:
+                worker.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                worker.terminate()
+        if master.poll() is None:
+            master.terminate()
+    return master
+
+
+def save_run_settings(config, settings_file="reports/benchmark_settings.json"):
+    """Record the settings of this run next to its reports"""
+    os.makedirs(os.path.dirname(settings_file), exist_ok=True)
+    settings = {
+        "version": VERSION,
+        "template": config["template"],
+        "host": config["host"],
+        "users": config.get("users"),
+        "spawn_rate": config.get("spawn_rate"),
+        "duration": config.get("duration"),
+        "load_shape": config.get("load_shape"),
+        "processes": config.get("processes", 1),
+        "engine": config.get("engine", "requests"),
+        "role": ROLE,
+        "expected_workers": config.get("expect_workers", 0),
+        "traffic_distribution": describe_traffic_distribution(config),
+        "started_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    with open(settings_file, "w", encoding="utf-8") as f:
+        json.dump(settings, f, indent=2)
+
+
 def display_summary(config):
     """Display test configuration summary"""
     print("\n" + "=" * 70)
@@ -1320,9 +1206,23 @@ def display_summary(config):
     print(f"Test Type: {TEST_TEMPLATES[config['template']]['name']}")
     print(f"Target: {config['host']}")
     print(f"Mode: {'Interactive (Browser)' if not config['headless'] else 'Automatic'}")
+    if config["template"] in POPULARITY_TEMPLATES:
+        print(f"Traffic: {describe_traffic_distribution(config)}")
+    print(f"HTTP Client: {ENGINES[config.get('engine', 'requests')].split(' - ')[0]}")
+    if ROLE == "master":
+        print(f"Load Generators: waiting for {EXPECT_WORKERS} workers on port {MASTER_PORT}")
+    elif config.get("processes", 1) > 1:
+        print(f"Load Generators: {config['processes']} worker processes (one per core)")
 
     # Show different info for Interactive vs Automatic mode
-    if config["headless"]:
+    if config["headless"] and config.get("load_shape"):
+        # Open-model load - users are added automatically to hold the rate
+        print(f"Load: {describe_load_shape(config['load_shape'])}")
+        print(f"Max Users: {config['users']} (added automatically as needed)")
+        print(f"Duration: {config['duration']}")
+        print(f"CSV Report: {config['csv']}")
+        print(f"HTML Report: {config['html']}")
+    elif config["headless"]:
         # Automatic mode - show actual values
         print(f"Users: {config['users']}")
         print(f"Spawn Rate: {config['spawn_rate']}/second")
@@ -1350,8 +1250,664 @@ def display_summary(config):
     print("=" * 70)
 
 
+# Percentiles shown by the analysis, and the SLOs its verdict is based on (LRGEX_SLO_P<N>_MS)
+ANALYSIS_PERCENTILES = ["50%", "90%", "95%", "99%", "99.9%"]
+DEFAULT_SLOS = {"50%": 200, "95%": 500, "99%": 1000}
+ERROR_RATE_SLO = float(os.environ.get("LRGEX_SLO_ERROR_PERCENT", "1"))
+TOP_ENDPOINTS = 5
+
+
+def percentile_slos():
+    """Latency SLOs in ms by percentile column - LRGEX_SLO_P95_MS=800 changes one, =0 drops it"""
+    slos = {}
+    for name in ANALYSIS_PERCENTILES:
+        env_name = f"LRGEX_SLO_P{name.rstrip('%').replace('.', '')}_MS"
+        limit = float(os.environ.get(env_name, DEFAULT_SLOS.get(name, 0)))
+        if limit > 0:
+            slos[name] = limit
+    return slos
+
+
+def describe_ms(value):
+    return "n/a" if value is None else f"{value:.0f}ms"
+
+
+def read_endpoint_stats(csv_file, top=TOP_ENDPOINTS):
+    """One streaming pass over a Locust stats CSV
+
+    Returns the aggregated row, the endpoints with the worst p99 and the ones
+    taking the most total response time (top of each only), and how many
+    endpoints miss an SLO - memory stays flat with thousands of stat names.
+    """
+    slos = percentile_slos()
+    result = {"aggregated": None, "slowest": [], "busiest": [], "endpoints": 0, "missing_slo": 0, "total_time": 0.0}
+    slowest, busiest = [], []  # Min-heaps of (key, tie-breaker, endpoint)
+    with open(csv_file, "r", newline="", encoding="utf-8") as f:
+        for number, row in enumerate(csv.DictReader(f)):
+            requests = int(row.get("Request Count") or 0)
+            average = float(row.get("Average Response Time") or 0)
+            endpoint = {
+                "name": f"{row.get('Type', '')} {row.get('Name', '')}".strip(),
+                "requests": requests,
+                "failures": int(row.get("Failure Count") or 0),
+                "average": average,
+                "min": float(row.get("Min Response Time") or 0),
+                "max": float(row.get("Max Response Time") or 0),
+                "time": requests * average,
+                "percentiles": {
+                    name: float(row[name]) for name in ANALYSIS_PERCENTILES if row.get(name) not in (None, "", "N/A")
+                },
+            }
+            if row.get("Name") == "Aggregated":
+                result["aggregated"] = endpoint
+                continue
+            if not requests:
+                continue
+            result["endpoints"] += 1
+            result["total_time"] += endpoint["time"]
+            if any(endpoint["percentiles"].get(name, 0) > limit for name, limit in slos.items()):
+                result["missing_slo"] += 1
+            # Rank by p99, then by request count - a single slow request matters less than many
+            tail = (endpoint["percentiles"].get("99%", endpoint["max"]), requests)
+            for heap, key in ((slowest, tail), (busiest, endpoint["time"])):
+                if len(heap) < top:
+                    heapq.heappush(heap, (key, number, endpoint))
+                elif key > heap[0][0]:
+                    heapq.heapreplace(heap, (key, number, endpoint))
+    result["slowest"] = [endpoint for _, _, endpoint in sorted(slowest, key=lambda item: item[:2], reverse=True)]
+    result["busiest"] = [endpoint for _, _, endpoint in sorted(busiest, key=lambda item: item[:2], reverse=True)]
+    return result
+
+
+# Time series - users, throughput and latency second by second from Locust's stats history
+LEVEL_MIN_SECONDS = 5  # A user count held this long is one load level
+LEVEL_SETTLE_SECONDS = 3  # Skipped at the start of a level - the new users are still starting
+LEVEL_BINS = 8  # Load levels made from a smooth ramp, which has no plateaus
+KNEE_EFFICIENCY = 0.5  # Throughput grew by less than half of what the added users should bring...
+KNEE_LATENCY_GROWTH = 1.2  # ...while p95 rose by 20% or more - the server is saturated
+STEADY_MIN_SECONDS = 30  # Shorter plateaus are too short to judge drift
+STEADY_SETTLE_SECONDS = 10  # Locust's latency percentiles cover the last 10s - skip the previous level
+DRIFT_PERCENT = 20  # Trend over the steady state that counts as drift
+DRIFT_CORRELATION = 0.5  # ...and how steadily it has to move that way
+
+
+def read_stats_history(history_file):
+    """Aggregated rows of a stats history CSV as per-second samples
+
+    Requests/second comes from the growth of the total request count, so it is
+    exact for each interval instead of Locust's moving average. On a master
+    the count only moves when the workers report (every 3 seconds), so each
+    jump is spread over the seconds since the count last moved. Seconds after
+    the last jump have no rate (None).
+    """
+    samples = []
+    waiting = []  # Samples since the count last moved - their share of the next jump is still unknown
+    moved = None  # (timestamp, requests, failures) when the count last moved
+    previous_time = None
+    with open(history_file, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row.get("Name") != "Aggregated":
+                continue
+            timestamp = int(row["Timestamp"])
+            requests, failures = int(row["Total Request Count"]), int(row["Total Failure Count"])
+            if moved is not None and timestamp > previous_time and int(row["User Count"]) > 0:
+
+                def percentile(column):
+                    return float(row[column]) if row.get(column) not in (None, "", "N/A") else None
+
+                sample = {
+                    "time": timestamp, "users": int(row["User Count"]), "rps": None, "failure_rps": None,
+                    "error_percent": None, "p50": percentile("50%"), "p95": percentile("95%"), "p99": percentile("99%"),
+                }
+                samples.append(sample)
+                waiting.append(sample)
+            if moved is None or requests < moved[1]:
+                # First row, or the stats were reset - rates start over from here
+                moved = timestamp, requests, failures
+                waiting = []
+            elif requests > moved[1] and timestamp > moved[0]:
+                seconds = timestamp - moved[0]
+                rps = (requests - moved[1]) / seconds
+                failure_rps = (failures - moved[2]) / seconds
+                for sample in waiting:
+                    sample.update(rps=rps, failure_rps=failure_rps, error_percent=failure_rps / rps * 100)
+                waiting = []
+                moved = timestamp, requests, failures
+            previous_time = timestamp
+    if samples:
+        start = samples[0]["time"] - 1
+        for sample in samples:
+            sample["seconds"] = sample["time"] - start
+    return samples
+
+
+def summarize_level(users, samples):
+    """Median throughput and latency of the samples taken at one load level"""
+    def median(name):
+        values = [sample[name] for sample in samples if sample[name] is not None]
+        return statistics.median(values) if values else None
+
+    return {"users": users, "seconds": len(samples), "rps": median("rps"), "p50": median("p50"),
+            "p95": median("p95"), "error_percent": median("error_percent")}
+
+
+def plateaus(samples):
+    """Runs of consecutive samples at the same user count"""
+    return [list(group) for _, group in itertools.groupby(samples, key=lambda sample: sample["users"])]
+
+
+def load_levels(samples):
+    """Load levels sorted by user count - plateaus if the test held several, else bins of a ramp"""
+    by_users = {}
+    for plateau in plateaus(samples):
+        if len(plateau) >= LEVEL_MIN_SECONDS:
+            settle = min(LEVEL_SETTLE_SECONDS, len(plateau) // 2)
+            by_users.setdefault(plateau[0]["users"], []).extend(plateau[settle:])
+    if len(by_users) < 3:
+        # A smooth ramp: split the user range into equal bins instead
+        low, high = min(sample["users"] for sample in samples), max(sample["users"] for sample in samples)
+        width = max(1, math.ceil((high - low + 1) / LEVEL_BINS))
+        bins = {}
+        for sample in samples:
+            bins.setdefault((sample["users"] - low) // width, []).append(sample)
+        by_users = {round(statistics.median(sample["users"] for sample in group)): group
+                    for group in bins.values() if len(group) >= 2}
+    return [summarize_level(users, group) for users, group in sorted(by_users.items())]
+
+
+def find_knee(levels):
+    """(last level that scaled, first saturated level) - None when throughput kept up with users"""
+    for previous, level in zip(levels, levels[1:]):
+        if not (previous["rps"] and previous["p95"] and level["p95"] is not None and level["rps"] is not None):
+            continue
+        user_growth = level["users"] / previous["users"] - 1
+        efficiency = (level["rps"] / previous["rps"] - 1) / user_growth if user_growth > 0 else 1.0
+        if efficiency < KNEE_EFFICIENCY and level["p95"] / previous["p95"] >= KNEE_LATENCY_GROWTH:
+            return previous, level
+    return None
+
+
+def trend(samples, name):
+    """(percent change over the samples, correlation with time) of a least-squares line - None if flat/unknown"""
+    points = [(sample["seconds"], sample[name]) for sample in samples if sample[name] is not None]
+    if len(points) < 3:
+        return None
+    times, values = zip(*points)
+    try:
+        slope, intercept = statistics.linear_regression(times, values)
+        correlation = statistics.correlation(times, values)
+    except statistics.StatisticsError:  # Constant values - no trend
+        return None
+    start = intercept + slope * times[0]
+    end = intercept + slope * times[-1]
+    return ((end - start) / start * 100 if start > 0 else 0.0), correlation, start, end
+
+
+def steady_state_drift(samples):
+    """Latency and throughput trend over the longest stretch at a constant user count"""
+    steady = max(plateaus(samples), key=len)
+    steady = steady[min(STEADY_SETTLE_SECONDS, len(steady) // 3):]
+    if len(steady) < STEADY_MIN_SECONDS:
+        return None
+    drift = {"users": steady[0]["users"], "seconds": len(steady), "from": steady[0]["seconds"],
+             "to": steady[-1]["seconds"], "latency": trend(steady, "p95"), "throughput": trend(steady, "rps")}
+    latency, throughput = drift["latency"], drift["throughput"]
+    drift["latency_drift"] = bool(latency and latency[0] >= DRIFT_PERCENT and latency[1] >= DRIFT_CORRELATION)
+    drift["throughput_drop"] = bool(
+        throughput and throughput[0] <= -DRIFT_PERCENT and throughput[1] <= -DRIFT_CORRELATION
+    )
+    return drift
+
+
+def analyze_stats_history(prefix):
+    """Line up users, throughput, latency and errors over time, find the knee and steady-state drift
+
+    Saves the per-second table as <prefix>_timeline.csv and returns the
+    samples, load levels, knee and drift - None without a stats history.
+    """
+    history_file = f"{prefix}_stats_history.csv"
+    if not os.path.exists(history_file):
+        return None
+    samples = read_stats_history(history_file)
+    if not samples:
+        return None
+    levels = load_levels(samples)
+    result = {
+        "samples": samples,
+        "levels": levels,
+        "knee": find_knee(levels) if len(levels) >= 3 else None,
+        "peak": max(levels, key=lambda level: level["rps"] or 0) if levels else None,
+        "drift": steady_state_drift(samples),
+    }
+    drift = result["drift"]
+    with open(f"{prefix}_timeline.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Seconds", "Users", "Requests/s", "Failures/s", "Error %", "50%", "95%", "99%", "Steady State"])
+        for sample in samples:
+            steady = drift is not None and drift["from"] <= sample["seconds"] <= drift["to"]
+            writer.writerow([sample["seconds"], sample["users"]]
+                            + ["" if sample[name] is None else round(sample[name], 2)
+                               for name in ("rps", "failure_rps", "error_percent", "p50", "p95", "p99")]
+                            + [int(steady)])
+    return result
+
+
+# Run history - every automatic run is kept in SQLite and compared with earlier runs of the same setup
+HISTORY_DB = os.environ.get("LRGEX_HISTORY_DB", "reports/benchmark_history.db")
+HISTORY_ENABLED = os.environ.get("LRGEX_HISTORY", "1").strip().lower() not in ("0", "false", "no", "off", "")
+BASELINE = os.environ.get("LRGEX_BASELINE", "rolling")  # "rolling", "last", a run number or a run label
+BASELINE_RUNS = int(os.environ.get("LRGEX_BASELINE_RUNS", "5"))  # Runs merged into the rolling baseline
+RUN_LABEL = os.environ.get("LRGEX_RUN_LABEL", "")  # e.g. the version you just deployed
+REGRESSION_ALPHA = float(os.environ.get("LRGEX_REGRESSION_ALPHA", "0.01"))
+REGRESSION_MIN_CHANGE = float(os.environ.get("LRGEX_REGRESSION_MIN_CHANGE", "10"))  # % p50/p95 change that matters
+REGRESSION_MIN_MS = float(os.environ.get("LRGEX_REGRESSION_MIN_MS", "5"))  # ...and at least this many ms
+REGRESSION_MIN_ERROR_POINTS = 1.0  # Error rate rise (percentage points) that matters
+REGRESSION_MIN_REQUESTS = 20  # Fewer requests on either side are not compared
+REGRESSION_EXIT_CODE = 3  # Locust itself exits with 1 (failed requests) or 2 (errors)
+
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recorded_at TEXT, started_at TEXT, label TEXT, setup TEXT,
+    template TEXT, host TEXT, engine TEXT, settings TEXT,
+    git_commit TEXT, git_branch TEXT, git_dirty INTEGER,
+    hostname TEXT, platform TEXT, python TEXT,
+    requests INTEGER, failures INTEGER, p50 REAL, p95 REAL, p99 REAL,
+    baseline TEXT, verdict TEXT
+);
+CREATE TABLE IF NOT EXISTS endpoints (
+    run_id INTEGER REFERENCES runs(id), method TEXT, name TEXT,
+    requests INTEGER, failures INTEGER, average REAL, min REAL, max REAL,
+    p50 REAL, p90 REAL, p95 REAL, p99 REAL, p999 REAL, histogram TEXT,
+    PRIMARY KEY (run_id, method, name)
+);
+CREATE TABLE IF NOT EXISTS verdicts (
+    run_id INTEGER REFERENCES runs(id), method TEXT, name TEXT, verdict TEXT,
+    p50_change REAL, p95_change REAL, slower_share REAL, latency_p REAL, tail_p REAL,
+    error_percent REAL, baseline_error_percent REAL, errors_p REAL, detail TEXT,
+    PRIMARY KEY (run_id, method, name)
+);
+CREATE INDEX IF NOT EXISTS runs_by_setup ON runs (setup, id);
+"""
+
+REGRESSION_COLUMNS = ["Run", "Baseline Runs", "Type", "Name", "Verdict", "Requests", "Baseline Requests",
+                      "p50 ms", "Baseline p50 ms", "p50 Change %", "p95 ms", "Baseline p95 ms", "p95 Change %",
+                      "Slower Share", "Latency p-value", "Tail p-value", "Error %", "Baseline Error %", "Errors p-value", "Detail"]
+
+
+def open_history(db_file=HISTORY_DB):
+    os.makedirs(os.path.dirname(db_file) or ".", exist_ok=True)
+    db = sqlite3.connect(db_file, timeout=30)  # Matrix lanes record at the same time
+    db.row_factory = sqlite3.Row
+    db.executescript(HISTORY_SCHEMA)
+    return db
+
+
+def run_setup(settings):
+    """Runs with the same setup key are comparable - same test, target, load and load generator"""
+    load = settings.get("load_shape") or {
+        "users": settings.get("users"), "spawn_rate": settings.get("spawn_rate"), "duration": settings.get("duration"),
+    }
+    key = json.dumps([settings.get("template"), settings.get("host"), load, settings.get("engine"),
+                      settings.get("processes"), settings.get("traffic_distribution")], sort_keys=True)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def git_metadata():
+    """(commit, branch, dirty) of LRGEX_GIT_DIR (default: here) - the code the run was tested against"""
+    git_dir = os.environ.get("LRGEX_GIT_DIR", ".")
+    try:
+        def git(*args):
+            return subprocess.run(["git", "-C", git_dir, *args], capture_output=True, text=True,
+                                  timeout=5, check=True).stdout.strip()
+
+        return git("rev-parse", "HEAD"), git("rev-parse", "--abbrev-ref", "HEAD"), int(bool(git("status", "--porcelain")))
+    except (OSError, subprocess.SubprocessError):
+        return None, None, None
+
+
+def hdr_correction(prefix):
+    """How the run's HDR percentiles were corrected for coordinated omission, as saved with the histograms"""
+    try:
+        with open(f"{prefix}_hdr.json", "r", encoding="utf-8") as f:
+            correction = json.load(f).get("correction")
+    except (OSError, ValueError):
+        correction = None
+    return correction or {"method": "unknown", "description": "corrected for coordinated omission"}
+
+
+def read_run_endpoints(prefix, settings_file):
+    """Every stats row of a finished run, with its uncorrected HDR histogram when the run recorded one
+
+    The percentiles come from the corrected file. The histogram is the one
+    without coordinated-omission samples - the significance tests need one
+    sample per request. It is marked so the history can tell it from the
+    corrected histograms that older runs stored.
+    """
+    hdr_file = f"{prefix}_hdr_percentiles.csv"
+    fresh = os.path.exists(hdr_file) and os.path.getmtime(hdr_file) >= os.path.getmtime(settings_file)
+    histograms = {}
+    if fresh and os.path.exists(f"{prefix}_hdr.json"):
+        with open(f"{prefix}_hdr.json", "r", encoding="utf-8") as f:
+            histograms = {(method, name): {**data["uncorrected"], "uncorrected": True}
+                          for method, name, data in json.load(f)["endpoints"] if "uncorrected" in data}
+    endpoints = []
+    with open(hdr_file if fresh else f"{prefix}_stats.csv", "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            key = (row["Type"], row["Name"])
+
+            def number(column):
+                return float(row[column]) if row.get(column) not in (None, "", "N/A") else None
+
+            endpoints.append({
+                "method": key[0], "name": key[1],
+                "requests": int(row["Request Count"]), "failures": int(row["Failure Count"]),
+                "average": number("Average Response Time"), "min": number("Min Response Time"),
+                "max": number("Max Response Time"), "p50": number("50%"), "p90": number("90%"),
+                "p95": number("95%"), "p99": number("99%"), "p999": number("99.9%"),
+                "histogram": histograms.get(key),
+            })
+    return endpoints
+
+
+def select_baseline(db, run_id, setup, baseline=None):
+    """(description, run ids) of the runs this one is compared with - no ids when there are none"""
+    baseline = str(baseline or BASELINE).strip()
+    if baseline.isdigit():
+        found = db.execute("SELECT id FROM runs WHERE id = ? AND id != ?", (int(baseline), run_id)).fetchone()
+        return f"run #{baseline}", [found["id"]] if found else []
+    if baseline == "last":
+        rows = db.execute("SELECT id FROM runs WHERE setup = ? AND id < ? ORDER BY id DESC LIMIT 1",
+                          (setup, run_id)).fetchall()
+        return "previous comparable run", [row["id"] for row in rows]
+    if baseline != "rolling":
+        rows = db.execute("SELECT id FROM runs WHERE label = ? AND id < ? ORDER BY setup = ? DESC, id DESC LIMIT 1",
+                          (baseline, run_id, setup)).fetchall()
+        return f"latest run labelled {baseline!r}", [row["id"] for row in rows]
+    # Rolling: the latest runs that didn't regress themselves - one bad deploy doesn't become the norm
+    rows = db.execute(
+        "SELECT id FROM runs WHERE setup = ? AND id < ? AND COALESCE(verdict, '') != 'regressed' "
+        "ORDER BY id DESC LIMIT ?", (setup, run_id, BASELINE_RUNS)
+    ).fetchall()
+    ids = sorted(row["id"] for row in rows)
+    if not ids:
+        return "earlier runs with the same test, host, load and engine", ids
+    return f"last {len(ids)} comparable run{'s' if len(ids) != 1 else ''}", ids
+
+
+def merge_histogram_counts(histograms):
+    """Bucket index -> count over several serialized HDR histograms - exact, buckets line up"""
+    counts = {}
+    for histogram in histograms:
+        flat = histogram["counts"]
+        for index, count in zip(flat[::2], flat[1::2]):
+            counts[index] = counts.get(index, 0) + count
+    return counts
+
+
+def mann_whitney(new, base):
+    """One-sided Mann-Whitney U test on two bucketed samples (bucket index -> count)
+
+    Returns (share of new/baseline pairs where the new request was slower, ties
+    counting half; p-value for "new is slower"; p-value for "new is faster").
+    Buckets keep the value order, so each bucket is one group of ties.
+    """
+    n1, n2 = sum(new.values()), sum(base.values())
+    below = u = ties = 0
+    for index in sorted(set(new) | set(base)):
+        in_new, in_base = new.get(index, 0), base.get(index, 0)
+        u += in_new * (below + in_base / 2)
+        below += in_base
+        tied = in_new + in_base
+        ties += tied ** 3 - tied
+    n = n1 + n2
+    mean = n1 * n2 / 2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 0.5, 1.0, 1.0
+    sd = variance ** 0.5
+    p_slower = 0.5 * math.erfc((u - mean - 0.5) / sd / math.sqrt(2))
+    p_faster = 0.5 * math.erfc((mean - u - 0.5) / sd / math.sqrt(2))
+    return u / (n1 * n2), min(1.0, p_slower), min(1.0, p_faster)
+
+
+def tail_test(new, base, fraction=0.95):
+    """p-value for "more new requests are slower than the baseline's p95" - the rank test misses tail-only changes
+
+    None when the baseline is too small to place its p95.
+    """
+    base_total = sum(base.values())
+    if base_total * (1 - fraction) < 10:
+        return None  # Too few baseline requests past its p95 for the normal approximation
+    seen = 0
+    for threshold in sorted(base):
+        seen += base[threshold]
+        if seen >= fraction * base_total:
+            break
+    over = sum(count for index, count in new.items() if index > threshold)
+    base_over = sum(count for index, count in base.items() if index > threshold)
+    return proportion_test(over, sum(new.values()), base_over, base_total)
+
+
+def proportion_test(count, total, base_count, base_total):
+    """One-sided two-proportion z-test - p-value for "the share went up" """
+    pooled = (count + base_count) / (total + base_total)
+    se = (pooled * (1 - pooled) * (1 / total + 1 / base_total)) ** 0.5
+    if se == 0:
+        return 1.0
+    z = (count / total - base_count / base_total) / se
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def holm_significant(p_values, alpha=REGRESSION_ALPHA):
+    """Which of the p-values hold up after Holm's correction for testing many endpoints at once"""
+    significant = [False] * len(p_values)
+    order = sorted(range(len(p_values)), key=lambda i: p_values[i])
+    for rank, i in enumerate(order):
+        if p_values[i] > alpha / (len(p_values) - rank):
+            break
+        significant[i] = True
+    return significant
+
+
+def percent_change(new, base):
+    return (new - base) / base * 100 if new is not None and base else None
+
+
+def compare_endpoints(db, endpoints, baseline_ids):
+    """Regression verdict for every endpoint of this run against the baseline runs"""
+    marks = ",".join("?" * len(baseline_ids))
+    baseline = {}
+    for row in db.execute(f"SELECT * FROM endpoints WHERE run_id IN ({marks})", baseline_ids):
+        baseline.setdefault((row["method"], row["name"]), []).append(row)
+
+    results = []
+    for endpoint in endpoints:
+        base_rows = baseline.get((endpoint["method"], endpoint["name"]), [])
+        base_requests = sum(row["requests"] for row in base_rows)
+        base_failures = sum(row["failures"] for row in base_rows)
+        base_p50 = statistics.median([row["p50"] for row in base_rows if row["p50"] is not None] or [0])
+        base_p95s = [row["p95"] for row in base_rows if row["p95"] is not None]
+        result = {
+            "endpoint": endpoint, "verdict": "unchanged", "base_requests": base_requests,
+            "base_p50": base_p50 or None, "base_p95": statistics.median(base_p95s) if base_p95s else None,
+            "error_percent": endpoint["failures"] / endpoint["requests"] * 100 if endpoint["requests"] else 0.0,
+            "base_error_percent": base_failures / base_requests * 100 if base_requests else None,
+            "slower_share": None, "p_slower": None, "p_faster": None, "p_tail": None, "errors_p": None, "detail": "",
+        }
+        result["p50_change"] = percent_change(endpoint["p50"], result["base_p50"])
+        result["p95_change"] = percent_change(endpoint["p95"], result["base_p95"])
+        results.append(result)
+        if not base_rows:
+            result["verdict"], result["detail"] = "new", "not in the baseline"
+            continue
+        if endpoint["requests"] < REGRESSION_MIN_REQUESTS or base_requests < REGRESSION_MIN_REQUESTS:
+            result["verdict"], result["detail"] = "too few requests", ""
+            continue
+        # Corrected histograms (stored by older runs) add samples that aren't independent - not tested
+        histograms = [json.loads(row["histogram"]) for row in base_rows if row["histogram"]]
+        histograms = [histogram for histogram in histograms if histogram.get("uncorrected")]
+        if endpoint["histogram"] and len(histograms) == len(base_rows):
+            new = merge_histogram_counts([endpoint["histogram"]])
+            base = merge_histogram_counts(histograms)
+            result["slower_share"], result["p_slower"], result["p_faster"] = mann_whitney(new, base)
+            result["p_tail"] = tail_test(new, base)
+        else:
+            result["detail"] = "latency not tested - no uncorrected HDR histogram on one side"
+        result["errors_p"] = proportion_test(endpoint["failures"], endpoint["requests"], base_failures, base_requests)
+        result["base_p95_range"] = (min(base_p95s), max(base_p95s)) if len(base_p95s) >= 3 else None
+
+    # Holm's correction per test, over the endpoints - the aggregate is judged on its own
+    tests = ("p_slower", "p_faster", "p_tail", "errors_p")
+    for test in tests:
+        members = [result for result in results
+                   if result[test] is not None and result["endpoint"]["name"] != "Aggregated"]
+        for result, significant in zip(members, holm_significant([result[test] for result in members])):
+            result[test + "_significant"] = significant
+    for result in results:
+        if result["endpoint"]["name"] == "Aggregated":
+            for test in tests:
+                result[test + "_significant"] = result[test] is not None and result[test] <= REGRESSION_ALPHA
+        judge_endpoint(result)
+    return results
+
+
+def meaningful_change(new, base, direction=1):
+    """Did a percentile move far enough to matter - by REGRESSION_MIN_CHANGE % and REGRESSION_MIN_MS?"""
+    if new is None or not base:
+        return False
+    return direction * (new - base) >= max(REGRESSION_MIN_MS, base * REGRESSION_MIN_CHANGE / 100)
+
+
+def judge_endpoint(result):
+    """Significant AND big enough AND outside the baseline's run-to-run spread - only then a verdict"""
+    if result["verdict"] != "unchanged":
+        return
+    endpoint = result["endpoint"]
+    spread = result.get("base_p95_range")
+    p95 = endpoint["p95"]
+    reasons = []
+    # Slower overall (rank test, judged on p50) or in the tail (requests past the baseline's p95, judged on p95)
+    slower = (result.get("p_slower_significant") and meaningful_change(endpoint["p50"], result["base_p50"])) or (
+        result.get("p_tail_significant") and meaningful_change(p95, result["base_p95"])
+    )
+    if slower and (spread is None or p95 is None or p95 > spread[1]):
+        reasons.append(f"slower: p95 {describe_ms(p95)} vs {describe_ms(result['base_p95'])}")
+    if (
+        result.get("errors_p_significant")
+        and result["error_percent"] - (result["base_error_percent"] or 0) >= REGRESSION_MIN_ERROR_POINTS
+    ):
+        reasons.append(f"errors {result['error_percent']:.1f}% vs {result['base_error_percent']:.1f}%")
+    if reasons:
+        result["verdict"], result["detail"] = "regressed", "; ".join(reasons)
+    elif (
+        result.get("p_faster_significant")
+        and meaningful_change(endpoint["p50"], result["base_p50"], -1)
+        and (spread is None or p95 is None or p95 < spread[0])
+    ):
+        result["verdict"] = "improved"
+
+
+def record_run(config, baseline=None):
+    """Save this run to the history database and compare it with its baseline
+
+    Writes the per-endpoint verdicts to <csv prefix>_regressions.csv for the
+    analysis and returns (run number, regressed endpoint count) - None when the
+    run left no stats or history is turned off.
+    """
+    prefix = config["csv"].replace(".csv", "")
+    settings_file = os.path.join(os.path.dirname(config["csv"]), "benchmark_settings.json")
+    if not HISTORY_ENABLED or not os.path.exists(f"{prefix}_stats.csv") or not os.path.exists(settings_file):
+        return None
+    with open(settings_file, "r", encoding="utf-8") as f:
+        settings = json.load(f)
+    endpoints = read_run_endpoints(prefix, settings_file)
+    total = next((endpoint for endpoint in endpoints if endpoint["name"] == "Aggregated"), None)
+    if total is None or not total["requests"]:
+        return None
+
+    setup = run_setup(settings)
+    commit, branch, dirty = git_metadata()
+    db = open_history()
+    with db:
+        run_id = db.execute(
+            "INSERT INTO runs (recorded_at, started_at, label, setup, template, host, engine, settings, git_commit, "
+            "git_branch, git_dirty, hostname, platform, python, requests, failures, p50, p95, p99) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (time.strftime("%Y-%m-%d %H:%M:%S"), settings.get("started_at"), RUN_LABEL or None, setup,
+             settings.get("template"), settings.get("host"), settings.get("engine"), json.dumps(settings),
+             commit, branch, dirty, socket.gethostname(), platform.platform(), platform.python_version(),
+             total["requests"], total["failures"], total["p50"], total["p95"], total["p99"]),
+        ).lastrowid
+        db.executemany(
+            "INSERT INTO endpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(run_id, endpoint["method"], endpoint["name"], endpoint["requests"], endpoint["failures"],
+              endpoint["average"], endpoint["min"], endpoint["max"], endpoint["p50"], endpoint["p90"],
+              endpoint["p95"], endpoint["p99"], endpoint["p999"],
+              json.dumps(endpoint["histogram"]) if endpoint["histogram"] else None) for endpoint in endpoints],
+        )
+
+    description, baseline_ids = select_baseline(db, run_id, setup, baseline or config.get("baseline"))
+    results = compare_endpoints(db, endpoints, baseline_ids) if baseline_ids else []
+    regressed = [result for result in results if result["verdict"] == "regressed"]
+    verdict = "regressed" if regressed else ("compared" if baseline_ids else "no baseline")
+    with db:
+        db.execute("UPDATE runs SET baseline = ?, verdict = ? WHERE id = ?",
+                   (" ".join(map(str, baseline_ids)) or None, verdict, run_id))
+        db.executemany(
+            "INSERT INTO verdicts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(run_id, result["endpoint"]["method"], result["endpoint"]["name"], result["verdict"],
+              result["p50_change"], result["p95_change"], result["slower_share"], result["p_slower"],
+              result["p_tail"], result["error_percent"], result["base_error_percent"], result["errors_p"], result["detail"])
+             for result in results],
+        )
+    db.close()
+
+    def rounded(value, digits=1):
+        return "" if value is None else round(value, digits)
+
+    with open(f"{prefix}_regressions.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(REGRESSION_COLUMNS)
+        if not baseline_ids:
+            writer.writerow([run_id, "", "", "Aggregated", "no baseline"] + [""] * 14 + [f"no {description} yet"])
+        for result in results:
+            endpoint = result["endpoint"]
+            writer.writerow([
+                run_id, " ".join(map(str, baseline_ids)), endpoint["method"], endpoint["name"], result["verdict"],
+                endpoint["requests"], result["base_requests"], rounded(endpoint["p50"]), rounded(result["base_p50"]),
+                rounded(result["p50_change"]), rounded(endpoint["p95"]), rounded(result["base_p95"]),
+                rounded(result["p95_change"]), rounded(result["slower_share"], 3), rounded(result["p_slower"], 6),
+                rounded(result["p_tail"], 6),
+                rounded(result["error_percent"], 2), rounded(result["base_error_percent"], 2),
+                rounded(result["errors_p"], 6), result["detail"],
+            ])
+    print(f"Run #{run_id} saved to the history ({HISTORY_DB}) - "
+          + (f"baseline: {description}" if baseline_ids else f"no baseline yet ({description})"))
+    return run_id, len(regressed)
+
+
+def show_history(limit=20):
+    """Print the latest runs in the history - their numbers can be used as a baseline"""
+    if not os.path.exists(HISTORY_DB):
+        print(f"No run history yet ({HISTORY_DB})")
+        return
+    db = open_history()
+    rows = db.execute("SELECT * FROM runs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+    db.close()
+    print(f"{'Run':>5}  {'Recorded':<19}  {'Template':<12} {'Requests':>9} {'p50':>7} {'p95':>7} {'p99':>7}  "
+          f"{'Verdict':<12} {'Commit':<8} Label / host")
+    for row in reversed(rows):
+        print(f"{row['id']:>5}  {row['recorded_at']:<19}  {row['template']:<12} {row['requests']:>9,} "
+              f"{describe_ms(row['p50']):>7} {describe_ms(row['p95']):>7} {describe_ms(row['p99']):>7}  "
+              f"{row['verdict'] or '':<12} {(row['git_commit'] or '')[:8]:<8} {row['label'] or row['host']}")
+
+
 def analyze_performance_and_advise():
-    """Analyze actual test results and provide specific recommendations"""
+    """Analyze actual test results and provide specific recommendations
+
+    Returns True when the run history found a regression against the baseline.
+    """
     import csv
     import os
 
@@ -1359,61 +1915,74 @@ def analyze_performance_and_advise():
     print("YOUR TEST RESULTS ANALYSIS")
     print("=" * 70)
 
-    # Try to read the actual CSV results
+    # Stream the stats file - one pass, only the top endpoints are kept in memory
     csv_file = "reports/benchmark_results_stats.csv"
+    settings_file = "reports/benchmark_settings.json"
+    hdr_file = "reports/benchmark_results_hdr_percentiles.csv"
+    corrected = (
+        os.path.exists(hdr_file)
+        and os.path.exists(settings_file)
+        and os.path.getmtime(hdr_file) >= os.path.getmtime(settings_file)  # Written by this run
+    )
+    correction = None
+    if corrected:
+        # Same layout as Locust's stats, but exact and corrected for coordinated omission
+        csv_file = hdr_file
+        correction = hdr_correction("reports/benchmark_results")
     if os.path.exists(csv_file):
         try:
-            with open(csv_file, "r") as f:
-                reader = csv.DictReader(f)
-                stats = list(reader)
-
-            if stats:
-                # Get the aggregated row (last row usually)
-                main_stats = None
-                for row in stats:
-                    if row.get("Name") == "Aggregated" or "Aggregated" in row.get(
-                        "Name", ""
-                    ):
-                        main_stats = row
-                        break
-
-                if not main_stats:
-                    main_stats = stats[-1]  # Use last row if no Aggregated found
-
-                # Parse the data
-                avg_time = float(main_stats.get("Average Response Time", 0))
-                min_time = float(main_stats.get("Min Response Time", 0))
-                max_time = float(main_stats.get("Max Response Time", 0))
-                total_requests = int(main_stats.get("Request Count", 0))
-                failures = int(main_stats.get("Failure Count", 0))
+            slos = percentile_slos()
+            analysis = read_endpoint_stats(csv_file)
+            main_stats = analysis["aggregated"]
+            if main_stats:
+                total_requests = main_stats["requests"]
+                failures = main_stats["failures"]
                 failure_rate = (
                     (failures / total_requests * 100) if total_requests > 0 else 0
                 )
+                percentiles = main_stats["percentiles"]
 
                 print("ACTUAL TEST RESULTS:")
+                if os.path.exists(settings_file):
+                    with open(settings_file, "r", encoding="utf-8") as f:
+                        settings = json.load(f)
+                    print(f"• Traffic Distribution: {settings.get('traffic_distribution', 'Uniform')}")
                 print(f"• Total Requests: {total_requests:,}")
                 print(f"• Failed Requests: {failures:,} ({failure_rate:.1f}%)")
-                print(f"• Average Response Time: {avg_time:.0f}ms")
-                print(f"• Response Time Range: {min_time:.0f}ms - {max_time:.0f}ms")
+                print(f"• Average Response Time: {main_stats['average']:.0f}ms")
+                print("• Percentiles: " + ", ".join(
+                    f"p{name.rstrip('%')} {describe_ms(percentiles.get(name))}" for name in ANALYSIS_PERCENTILES
+                ))
+                if corrected:
+                    print(f"  (HDR histogram - {correction['description']})")
+                print(f"• Response Time Range: {main_stats['min']:.0f}ms - {main_stats['max']:.0f}ms")
                 print()
 
-                # Analyze response times
+                # Judge the run on its tail latency against the SLOs, not the average
+                missed = {
+                    name: percentiles[name]
+                    for name, limit in slos.items()
+                    if percentiles.get(name) is not None and percentiles[name] > limit
+                }
                 print("PERFORMANCE VERDICT:")
-                if avg_time < 100:
-                    print("🚀 EXCELLENT - Your server is blazing fast!")
-                    print(f"   Average {avg_time:.0f}ms is outstanding performance")
-                    print("   Your server CPU and I/O are handling load very well")
-                elif avg_time < 200:
-                    print("✅ VERY GOOD - Fast and responsive server")
-                    print(f"   Average {avg_time:.0f}ms shows healthy performance")
-                    print("   Server resources are in good shape")
-                elif avg_time < 500:
-                    print("⚠️ ACCEPTABLE - Server working but showing some strain")
-                    print(f"   Average {avg_time:.0f}ms indicates moderate load")
-                    print("   Monitor server resources during peak times")
+                print("   SLOs: " + ", ".join(f"p{name.rstrip('%')} <= {limit:g}ms" for name, limit in slos.items()))
+                if not missed and all(
+                    percentiles.get(name) is None or percentiles[name] <= limit / 2 for name, limit in slos.items()
+                ):
+                    print("🚀 EXCELLENT - Every percentile is well inside your SLOs")
+                    print("   Even the slowest 1% of requests has plenty of headroom")
+                elif not missed:
+                    print("✅ VERY GOOD - Every percentile meets your SLOs")
+                    print("   The tail is getting closer to the limits - watch it as traffic grows")
+                elif "95%" not in missed and "50%" not in missed:
+                    print("⚠️ ACCEPTABLE - Typical requests are fine, but the tail misses its SLO")
+                    for name, value in missed.items():
+                        print(f"   p{name.rstrip('%')} is {value:.0f}ms (SLO {slos[name]:g}ms)")
+                    print("   A few slow requests - look at the slowest endpoints below")
                 else:
-                    print("🔍 CONCERNING - Server struggling under load")
-                    print(f"   Average {avg_time:.0f}ms suggests resource constraints")
+                    print("🔍 CONCERNING - Most users will feel the slowdown")
+                    for name, value in missed.items():
+                        print(f"   p{name.rstrip('%')} is {value:.0f}ms (SLO {slos[name]:g}ms)")
                     print("   Investigate server CPU, memory, or disk I/O immediately")
 
                 print()
@@ -1421,7 +1990,7 @@ def analyze_performance_and_advise():
                 # Analyze failure rate
                 if failure_rate == 0:
                     print("✅ RELIABILITY: Perfect - No failed requests!")
-                elif failure_rate < 1:
+                elif failure_rate <= ERROR_RATE_SLO:
                     print(f"⚠️ RELIABILITY: Good - Only {failure_rate:.1f}% failures")
                 elif failure_rate < 5:
                     print(
@@ -1432,17 +2001,37 @@ def analyze_performance_and_advise():
                         f"❌ RELIABILITY: Poor - {failure_rate:.1f}% failure rate needs attention"
                     )
 
+                # Which endpoints make up the tail and where the time goes
+                if analysis["endpoints"] > 1:
+                    print()
+                    print(f"SLOWEST ENDPOINTS (by p99, {analysis['endpoints']:,} endpoints):")
+                    for endpoint in analysis["slowest"]:
+                        print(
+                            f"• {endpoint['name']} - p95 {describe_ms(endpoint['percentiles'].get('95%'))}, "
+                            f"p99 {describe_ms(endpoint['percentiles'].get('99%'))}, {endpoint['requests']:,} requests"
+                        )
+                    if analysis["missing_slo"]:
+                        print(f"   {analysis['missing_slo']:,} endpoints miss at least one SLO")
+                    print()
+                    print("MOST TIME SPENT (share of all response time):")
+                    for endpoint in analysis["busiest"]:
+                        share = endpoint["time"] / analysis["total_time"] * 100 if analysis["total_time"] else 0
+                        print(
+                            f"• {endpoint['name']} - {share:.1f}% ({endpoint['requests']:,} requests, "
+                            f"avg {endpoint['average']:.0f}ms)"
+                        )
+
                 print()
 
                 # Specific recommendations
                 print("WHAT THIS MEANS FOR YOUR SERVER:")
-                if avg_time < 200 and failure_rate == 0:
+                if not missed and failure_rate == 0:
                     print("🎯 Your server is healthy and can likely handle MORE load")
-                    print("🎯 Try testing with 2x or 3x more users to find your limits")
+                    print("🎯 Run a Capacity Search (Automatic Mode) to find your limits")
                     print("🎯 Current performance suggests good server optimization")
-                elif avg_time < 500 and failure_rate < 1:
+                elif "95%" not in missed and failure_rate <= ERROR_RATE_SLO:
                     print("📊 Server is coping but may be near capacity")
-                    print("📊 Monitor server resources during real traffic spikes")
+                    print("📊 Speed up the slowest endpoints above - they set your tail latency")
                     print(
                         "📊 Consider performance optimization if response times increase"
                     )
@@ -1450,6 +2039,8 @@ def analyze_performance_and_advise():
                     print("⚡ Server needs attention - investigate bottlenecks")
                     print("⚡ Check CPU usage, memory consumption, and disk I/O")
                     print("⚡ May need code optimization or hardware upgrades")
+            else:
+                print("No aggregated results in the CSV file - the test sent no requests")
 
         except Exception as e:
             print(f"Could not analyze results file: {e}")
@@ -1458,7 +2049,175 @@ def analyze_performance_and_advise():
         print("No CSV results file found to analyze")
         print("The test may have been interrupted or files moved")
 
+    # Capacity search - the highest rate that stayed within the SLOs
+    capacity_file = "reports/benchmark_results_capacity.csv"
+    capacity_run = (
+        os.path.exists(capacity_file)
+        and os.path.exists(settings_file)
+        and os.path.getmtime(capacity_file) >= os.path.getmtime(settings_file)  # Written by this run
+    )
+    if capacity_run:
+        with open(capacity_file, "r", encoding="utf-8") as f:
+            steps = list(csv.DictReader(f))
+        best = next((row for row in steps if row["Max Sustainable"] == "1"), None)
+        failed = [row for row in steps if row["Passed"] == "0"]
+        print()
+        print(f"CAPACITY ({len(steps)} steps, curve in reports/benchmark_results_capacity.svg):")
+        if best is None:
+            print(f"❌ Even {float(failed[0]['Target RPS']):g} requests/second broke your limits")
+            print(f"   {failed[0]['Reasons']}")
+        else:
+            print(
+                f"• Max sustainable rate: {float(best['Target RPS']):g} requests/second "
+                f"(p95 {best['95%']}ms, p99 {best['99%']}ms)"
+            )
+            if failed:
+                knee = min(failed, key=lambda row: float(row["Target RPS"]))
+                print(f"• Limits broke at: {float(knee['Target RPS']):g} requests/second ({knee['Reasons']})")
+            else:
+                print("• No step broke your limits - raise the highest rate to find the real ceiling")
+            print(f"🎯 Recommended safe operating point: {float(best['Safe RPS']):.0f} requests/second")
+
+    # Open-model runs - was the target request rate actually delivered?
+    arrival_file = "reports/benchmark_results_arrival_rate.csv"
+    if (
+        not capacity_run  # Failing steps are expected there - the capacity report covers them
+        and os.path.exists(arrival_file)
+        and os.path.exists(settings_file)
+        and os.path.getmtime(arrival_file) >= os.path.getmtime(settings_file)  # Written by this run
+    ):
+        with open(arrival_file, "r", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        seconds = [row for row in rows if row["Achieved RPS"]]
+        dropped = sum(int(row["Dropped Arrivals"]) for row in rows)
+        if seconds:
+            short = [row for row in seconds if row["Below Target"] == "1"]
+            print()
+            print("TARGET RATE:")
+            print(f"• Held for {len(seconds) - len(short)} of {len(seconds)} measured seconds")
+            print(f"• Peak users needed: {max(int(row['Users']) for row in seconds)}")
+            if not short:
+                print("✅ Your server kept up with every requested rate")
+            else:
+                first = short[0]
+                print(
+                    f"🔍 Fell behind from {float(first['Seconds']):.0f}s: {float(first['Achieved RPS']):.0f} "
+                    f"of {float(first['Target RPS']):.0f} requests/second delivered"
+                )
+                if any(row["At User Limit"] == "1" for row in short):
+                    print("   Responses got so slow that the user limit was reached -")
+                    print("   this rate is above what your server can handle right now")
+            if dropped:
+                print(f"• {dropped} requests were never sent - every user was still busy when they were due")
+
+    # Time series - where throughput stopped growing with users, and drift while the load was steady
+    history_file = "reports/benchmark_results_stats_history.csv"
+    if (
+        not capacity_run  # Its steps and cool-downs are judged by the capacity report
+        and os.path.exists(history_file)
+        and os.path.exists(settings_file)
+        and os.path.getmtime(history_file) >= os.path.getmtime(settings_file)  # Written by this run
+    ):
+        timeline = analyze_stats_history("reports/benchmark_results")
+        if timeline and timeline["levels"]:
+            levels = timeline["levels"]
+            print()
+            print("LOAD OVER TIME (per-second table in reports/benchmark_results_timeline.csv):")
+            if len(levels) >= 3:
+                print(f"   {'Users':>7} {'Req/s':>8} {'p50':>8} {'p95':>8} {'Errors':>7}")
+                for level in levels:
+                    print(
+                        f"   {level['users']:>7} {level['rps'] or 0:>8.1f} {describe_ms(level['p50']):>8} "
+                        f"{describe_ms(level['p95']):>8} {level['error_percent'] or 0:>6.1f}%"
+                    )
+            if timeline["knee"]:
+                last, saturated = timeline["knee"]
+                print(f"🔍 Saturation knee: about {last['users']} users at {last['rps']:.1f} requests/second")
+                print(
+                    f"   With {saturated['users']} users throughput only reached {saturated['rps']:.1f} req/s "
+                    f"while p95 went from {describe_ms(last['p95'])} to {describe_ms(saturated['p95'])}"
+                )
+                print(f"🎯 Plan capacity around {last['rps']:.0f} requests/second ({last['users']} users) for this test")
+            elif len(levels) >= 3:
+                print(
+                    f"✅ No knee - throughput kept growing with users up to {levels[-1]['users']} users "
+                    f"({levels[-1]['rps'] or 0:.1f} req/s); the saturation point is above this load"
+                )
+            else:
+                print("• Only one load level - use a lower spawn rate or a Step load shape to find the knee")
+            drift = timeline["drift"]
+            if drift:
+                steady = f"{drift['seconds']}s at {drift['users']} users"
+                if drift["latency_drift"]:
+                    change, _, start, end = drift["latency"]
+                    print(f"⚠️ Latency drifted up {change:.0f}% during the steady {steady} "
+                          f"(p95 {start:.0f}ms → {end:.0f}ms)")
+                    print("   Look for memory leaks, growing queues, or caches and tables filling up")
+                if drift["throughput_drop"]:
+                    change, _, start, end = drift["throughput"]
+                    print(f"⚠️ Throughput fell {-change:.0f}% during the steady {steady} "
+                          f"({start:.1f} → {end:.1f} req/s)")
+                if not (drift["latency_drift"] or drift["throughput_drop"]):
+                    print(f"✅ Steady state ({steady}): latency and throughput held level")
+
+    # Multi-core and distributed runs - which workers took part and how busy they were
+    workers_file = "reports/benchmark_results_workers.csv"
+    if (
+        os.path.exists(workers_file)
+        and os.path.exists(settings_file)
+        and os.path.getmtime(workers_file) >= os.path.getmtime(settings_file)  # Written by this run
+    ):
+        with open(workers_file, "r", encoding="utf-8") as f:
+            workers = list(csv.DictReader(f))
+        print()
+        print(f"LOAD GENERATORS ({len(workers)} workers):")
+        for worker in workers:
+            if worker["Average CPU %"]:
+                cpu = f"CPU avg {float(worker['Average CPU %']):.0f}% / peak {float(worker['Peak CPU %']):.0f}%"
+            else:
+                cpu = "CPU not measured (test too short)"
+            print(f"• Worker {worker['Worker']} on {worker['Host']}: {worker['Peak Users']} users, {cpu}")
+        if any(int(worker["Busy Samples"]) for worker in workers):
+            print("⚠️ A load generator hit 90%+ CPU - it may have slowed the test down,")
+            print("   not your server. Add cores or workers and test again.")
+
+    # Run history - did this run get slower than the runs before it?
+    regressions_file = "reports/benchmark_results_regressions.csv"
+    regressed = []
+    if (
+        os.path.exists(regressions_file)
+        and os.path.exists(settings_file)
+        and os.path.getmtime(regressions_file) >= os.path.getmtime(settings_file)  # Written by this run
+    ):
+        with open(regressions_file, "r", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        print()
+        if rows and rows[0]["Verdict"] == "no baseline":
+            print(f"HISTORY: Run #{rows[0]['Run']} saved - {rows[0]['Detail']} to compare it with")
+        elif rows:
+            baseline_runs = rows[0]["Baseline Runs"].split()
+            print(f"REGRESSIONS (run #{rows[0]['Run']} vs run{'s' if len(baseline_runs) > 1 else ''} "
+                  f"#{', #'.join(baseline_runs)}):")
+            regressed = [row for row in rows if row["Verdict"] == "regressed"]
+            improved = [row for row in rows if row["Verdict"] == "improved"]
+            untested = [row for row in rows if row["Verdict"] in ("new", "too few requests")]
+            if regressed:
+                print(f"❌ Worse than the baseline ({len(regressed)}):")
+                for row in regressed[:TOP_ENDPOINTS * 2]:
+                    share = f", {float(row['Slower Share']):.0%} of requests slower" if row["Slower Share"] else ""
+                    change = f" ({float(row['p95 Change %']):+.0f}% p95)" if row["p95 Change %"] else ""
+                    print(f"• {row['Type']} {row['Name']} - {row['Detail']}{change}{share}".replace("•  ", "• "))
+                if len(regressed) > TOP_ENDPOINTS * 2:
+                    print(f"   ...and {len(regressed) - TOP_ENDPOINTS * 2} more in {regressions_file}")
+            else:
+                print("✅ Nothing got significantly slower or less reliable than the baseline")
+            if improved:
+                print(f"🚀 {len(improved)} got significantly faster")
+            if untested:
+                print(f"   {len(untested)} endpoints were new or had too few requests to compare")
+
     print("=" * 70)
+    return bool(regressed)
 
 
 def install_uv_if_missing():
@@ -1560,8 +2319,39 @@ def install_uv_if_missing():
             return False
 
 
+def dependency_fingerprint():
+    """Hash of the dependency files - None when there is nothing to sync from"""
+    digest = hashlib.sha256(sys.version.encode())
+    found = False
+    for name in DEPENDENCY_FILES:
+        if os.path.exists(name):
+            found = True
+            with open(name, "rb") as f:
+                digest.update(name.encode() + b"\0" + f.read())
+    return digest.hexdigest() if found else None
+
+
+def dependencies_unchanged():
+    """True when the environment was synced from exactly the current dependency files"""
+    fingerprint = dependency_fingerprint()
+    try:
+        return fingerprint is not None and DEPENDENCY_FINGERPRINT.read_text(encoding="utf-8").strip() == fingerprint
+    except OSError:
+        return False
+
+
+def save_dependency_fingerprint():
+    fingerprint = dependency_fingerprint()
+    if fingerprint and DEPENDENCY_FINGERPRINT.parent.is_dir():
+        DEPENDENCY_FINGERPRINT.write_text(fingerprint, encoding="utf-8")
+
+
 def check_and_install_dependencies():
     """Smart dependency installer - creates venv first, then installs dependencies"""
+    if dependencies_unchanged():
+        print("✅ Dependencies unchanged since the last sync - skipping install")
+        return
+
     print("Checking dependencies...")
 
     # Step 1: Install UV if missing
@@ -1629,11 +2419,282 @@ def check_and_install_dependencies():
             )
             sys.exit(1)
 
+    save_dependency_fingerprint()
     print("✅ All dependencies ready!")
 
 
+MATRIX_AXES = {"template": "templates", "host": "hosts", "load_shape": "load_shapes", "engine": "engines"}
+
+
+def load_matrix(matrix_file):
+    """Read a JSON or TOML matrix file and expand it into one test config per cell"""
+    if matrix_file.lower().endswith(".toml"):
+        with open(matrix_file, "rb") as f:
+            matrix = tomllib.load(f)
+    else:
+        with open(matrix_file, "r", encoding="utf-8") as f:
+            matrix = json.load(f)
+
+    presets = {preset["name"].lower(): preset["shape"] for preset in LOAD_SHAPE_PRESETS.values()}
+    shapes = []
+    for shape in matrix.get("load_shapes", []):
+        if isinstance(shape, str):
+            if shape.lower() not in presets:
+                raise ValueError(f"Unknown load shape preset {shape!r} - use one of "
+                                 f"{', '.join(preset['name'] for preset in LOAD_SHAPE_PRESETS.values())}")
+            shape = presets[shape.lower()]
+        shapes.append({"max_users": 1000, **shape})
+    for name in matrix.get("templates", []):
+        if name not in TEST_TEMPLATES:
+            raise ValueError(f"Unknown template {name!r} - use one of {', '.join(TEST_TEMPLATES)}")
+        if TEST_TEMPLATES[name].get("interactive") and "form" not in matrix.get("settings", {}):
+            raise ValueError(f"Template {name!r} needs a \"form\" entry in the matrix settings")
+    for engine in matrix.get("engines", ["requests"]):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine {engine!r} - use one of {', '.join(ENGINES)}")
+    if not (matrix.get("templates") and matrix.get("hosts") and shapes):
+        raise ValueError("A matrix needs at least one entry in templates, hosts and load_shapes")
+    settings = matrix.get("settings", {})
+    for key, axis in MATRIX_AXES.items():
+        if key in settings:
+            # It would run every cell with the same value under different names
+            raise ValueError(f"\"{key}\" can't be a matrix setting - list the values under \"{axis}\" instead")
+
+    output = matrix.get("output", "reports/matrix")
+    cells = []
+    for index, (template, host, shape, engine) in enumerate(itertools.product(
+        matrix["templates"], matrix["hosts"], shapes, matrix.get("engines", ["requests"])
+    ), 1):
+        host = host if host.startswith(("http://", "https://")) else "https://" + host
+        host_name = re.sub(r"[^A-Za-z0-9]+", "-", host.split("://", 1)[1]).strip("-")
+        cell = f"{index:02d}-{template}-{host_name}-{shape['type']}-{engine}"
+        config = {
+            "processes": 1,
+            "custom_urls": [],
+            **settings,
+            # The cell's own values come after the shared settings so they always win
+            "template": template,
+            "host": host,
+            "headless": True,
+            "load_shape": shape,
+            "users": shape["max_users"],
+            "spawn_rate": "Auto",
+            "duration": f"{load_shape_duration(shape)}s",
+            "engine": engine,
+            "cell": cell,
+            "test_name": f"matrix_{cell.replace('-', '_')}",
+            "csv": f"{output}/{cell}/benchmark_results.csv",
+            "html": f"{output}/{cell}/benchmark_report.html",
+            "log_level": "WARNING",
+            "only_summary": True,
+        }
+        cells.append(config)
+    return cells, matrix.get("parallel"), output
+
+
+def matrix_lanes(cells, parallel=None):
+    """Split the cells into lanes that run side by side - one host never runs in two lanes
+
+    Tests of the same host would slow each other down and spoil the comparison,
+    so lanes get whole hosts, longest total run time first, up to one lane per core.
+    """
+    by_host = {}
+    for config in cells:
+        by_host.setdefault(config["host"], []).append(config)
+    lane_count = max(1, min(len(by_host), parallel or os.cpu_count() or 1))
+    lanes = [[] for _ in range(lane_count)]
+    lane_seconds = [0] * lane_count
+
+    def host_seconds(host):
+        return sum(load_shape_duration(config["load_shape"]) for config in by_host[host])
+
+    for host in sorted(by_host, key=host_seconds, reverse=True):
+        lane = lane_seconds.index(min(lane_seconds))
+        lanes[lane].extend(by_host[host])
+        lane_seconds[lane] += host_seconds(host)
+    for lane in lanes:
+        lane.sort(key=lambda config: config["cell"])  # Back in matrix order within a lane
+    return [lane for lane in lanes if lane]
+
+
+def run_matrix_cells(cells, baseline=None):
+    """Run cells one after another in this process - Locust and the runtime stay loaded"""
+    for number, config in enumerate(cells, 1):
+        print(f"\n[{number}/{len(cells)}] {config['cell']}: {describe_load_shape(config['load_shape'])}, "
+              f"{config['duration']}, {config['engine']} engine")
+        config["test_file"] = create_test_file(config)
+        cmd = build_command(config)
+        save_run_settings(config, os.path.join(os.path.dirname(config["csv"]), "benchmark_settings.json"))
+        try:
+            result = run_locust(config, cmd)
+            print(f"[{number}/{len(cells)}] {config['cell']} finished (exit code {result.returncode})")
+            record_run(config, baseline)
+        except KeyboardInterrupt:
+            print("\nMatrix stopped by user - summarising the finished cells")
+            return False
+        except Exception as e:
+            print(f"[{number}/{len(cells)}] {config['cell']} failed: {e}")
+    return True
+
+
+def matrix_cell_summary(config):
+    """One row of the comparative summary, read from the reports the cell wrote"""
+    prefix = config["csv"].replace(".csv", "")
+    row = {
+        "Cell": config["cell"],
+        "Template": config["template"],
+        "Host": config["host"],
+        "Load": describe_load_shape(config["load_shape"]),
+        "Engine": config["engine"],
+    }
+    try:
+        with open(f"{prefix}_stats.csv", "r", encoding="utf-8") as f:
+            total = next(stats for stats in csv.DictReader(f) if stats["Name"] == "Aggregated")
+    except (OSError, StopIteration):
+        row["Result"] = "no results"
+        return row
+
+    requests = int(total["Request Count"])
+    failures = int(total["Failure Count"])
+    row.update({
+        "Result": "ok",
+        "Requests": requests,
+        "Failure %": round(failures / requests * 100, 2) if requests else 0.0,
+        "RPS": round(float(total["Requests/s"]), 1),
+        "Avg ms": round(float(total["Average Response Time"])),
+        "p50 ms": total["50%"],
+        "p95 ms": total["95%"],
+        "p99 ms": total["99%"],
+        "Max ms": round(float(total["Max Response Time"])),
+    })
+    if os.path.exists(f"{prefix}_arrival_rate.csv"):
+        with open(f"{prefix}_arrival_rate.csv", "r", encoding="utf-8") as f:
+            seconds = [second for second in csv.DictReader(f) if second["Achieved RPS"]]
+        held = sum(1 for second in seconds if second["Below Target"] == "0")
+        row["Target Held"] = f"{held}/{len(seconds)}s"
+    if os.path.exists(f"{prefix}_capacity.csv"):
+        with open(f"{prefix}_capacity.csv", "r", encoding="utf-8") as f:
+            best = next((step for step in csv.DictReader(f) if step["Max Sustainable"] == "1"), None)
+        row["Max Sustainable RPS"] = best["Target RPS"] if best else "0"
+    else:
+        timeline = analyze_stats_history(prefix)
+        if timeline and timeline["knee"]:
+            row["Knee Users"] = timeline["knee"][0]["users"]
+            row["Knee RPS"] = round(timeline["knee"][0]["rps"], 1)
+        if timeline and timeline["drift"] and timeline["drift"]["latency_drift"]:
+            row["Latency Drift"] = f"+{timeline['drift']['latency'][0]:.0f}%"
+    settings_file = os.path.join(os.path.dirname(config["csv"]), "benchmark_settings.json")
+    if (
+        os.path.exists(f"{prefix}_regressions.csv")
+        and os.path.exists(settings_file)
+        and os.path.getmtime(f"{prefix}_regressions.csv") >= os.path.getmtime(settings_file)  # Written by this run
+    ):
+        with open(f"{prefix}_regressions.csv", "r", encoding="utf-8") as f:
+            verdicts = [endpoint["Verdict"] for endpoint in csv.DictReader(f)]
+        row["Regressions"] = "no baseline" if verdicts[:1] == ["no baseline"] else verdicts.count("regressed")
+    return row
+
+
+MATRIX_COLUMNS = ["Cell", "Template", "Host", "Load", "Engine", "Result", "Requests", "Failure %", "RPS",
+                  "Avg ms", "p50 ms", "p95 ms", "p99 ms", "Max ms", "Target Held", "Max Sustainable RPS",
+                  "Knee Users", "Knee RPS", "Latency Drift", "Regressions"]
+
+
+def write_matrix_summary(cells, output):
+    """Print the comparative table for every cell and save it as summary.csv - True if a cell regressed"""
+    rows = [matrix_cell_summary(config) for config in cells]
+    columns = [column for column in MATRIX_COLUMNS if any(column in row for row in rows)]
+    summary_file = os.path.join(output, "summary.csv")
+    os.makedirs(output, exist_ok=True)
+    with open(summary_file, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    shown = [column for column in columns if column not in ("Template", "Host", "Engine")]  # Part of the cell name
+    widths = {column: max(len(column), *(len(str(row.get(column, ""))) for row in rows)) for column in shown}
+    print("\n" + "=" * 70)
+    print(f"MATRIX SUMMARY ({len(rows)} cells)")
+    print("=" * 70)
+    print("  ".join(column.ljust(widths[column]) for column in shown))
+    for row in rows:
+        print("  ".join(str(row.get(column, "")).ljust(widths[column]) for column in shown))
+    print(f"\nSummary saved: {summary_file}")
+    print(f"Per-cell reports: {output}/<cell>/")
+    regressed = [row["Cell"] for row in rows if isinstance(row.get("Regressions"), int) and row["Regressions"]]
+    if regressed:
+        print(f"Regressions against the run history in: {', '.join(regressed)}")
+    return bool(regressed)
+
+
+def run_matrix(matrix_file, parallel=None, lane=None, baseline=None):
+    """Batch mode - run every cell of a matrix file without prompts and compare them
+
+    Cells of different hosts run side by side in lane processes (one per spare
+    core); each lane runs its cells back to back in one warm interpreter.
+    Returns True when a cell regressed against its run history.
+    """
+    cells, matrix_parallel, output = load_matrix(matrix_file)
+    lanes = matrix_lanes(cells, parallel or matrix_parallel)
+    if lane is not None:
+        run_matrix_cells(lanes[lane], baseline)  # A lane process started by the matrix run below
+        return False
+
+    print(f"Scenario matrix: {len(cells)} cells in {len(lanes)} lane{'s' if len(lanes) > 1 else ''}")
+    os.makedirs(output, exist_ok=True)
+    if len(lanes) == 1:
+        run_matrix_cells(cells, baseline)
+    else:
+        processes = []
+        for index, lane_cells in enumerate(lanes):
+            log_file = os.path.join(output, f"lane{index + 1}.log")
+            hosts = ", ".join(sorted({config["host"] for config in lane_cells}))
+            print(f"  Lane {index + 1}: {len(lane_cells)} cells on {hosts} - output in {log_file}")
+            cmd = [sys.executable, os.path.abspath(__file__), "--matrix", matrix_file, "--lane", str(index)]
+            if parallel:
+                cmd.extend(["--parallel", str(parallel)])
+            if baseline:
+                cmd.extend(["--baseline", baseline])
+            log = open(log_file, "w", encoding="utf-8")
+            processes.append((subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT), log, index))
+        try:
+            for process, log, index in processes:
+                process.wait()
+                log.close()
+                print(f"  Lane {index + 1} finished (exit code {process.returncode})")
+        except KeyboardInterrupt:
+            print("\nMatrix stopped by user - summarising the finished cells")
+            for process, log, index in processes:
+                process.terminate()
+                process.wait()
+                log.close()
+    return write_matrix_summary(cells, output)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="LRGEX Web Benchmark - starts the wizard, or runs a scenario matrix without prompts"
+    )
+    parser.add_argument("--matrix", help="JSON/TOML file listing templates, hosts, load shapes and engines to run")
+    parser.add_argument("--parallel", type=int, help="most matrix cells to run at once (default: one per core)")
+    parser.add_argument("--lane", type=int, help=argparse.SUPPRESS)  # Set on the lane processes of a matrix run
+    parser.add_argument("--baseline", help="compare with: rolling (default), last, a run number or a run label")
+    parser.add_argument("--history", action="store_true", help="list the latest runs in the run history and exit")
+    return parser.parse_args()
+
+
 def main():
     """Main function to run the smart benchmark"""
+    args = parse_arguments()
+    if args.history:
+        show_history()
+        return
+    if args.matrix:
+        if args.lane is None:
+            check_and_install_dependencies()  # Once for the whole matrix - lanes share the environment
+        if run_matrix(args.matrix, args.parallel, args.lane, args.baseline):
+            sys.exit(REGRESSION_EXIT_CODE)
+        return
     try:
         time.sleep(1)
         print("Launching systems...")
@@ -1645,11 +2706,17 @@ def main():
         print("")
         print("Loaded successfully!")
         print("")
+        if ROLE == "worker":
+            run_worker()
+            return
         config = get_user_input()
+        config["baseline"] = args.baseline
 
         # Create test file automatically and get the path
         test_file_path = create_test_file(config)
         config["test_file"] = test_file_path
+        if ROLE == "master":
+            config["test_file"] = create_bundle_file(config)
 
         # Build command
         cmd = build_command(config)
@@ -1682,8 +2749,9 @@ def main():
             print("Press Ctrl+C to stop the test anytime\n")
 
             # Run the command with proper error handling
+            save_run_settings(config)
             try:
-                result = subprocess.run(cmd, check=False)
+                result = run_locust(config, cmd)
                 if result.returncode != 0 and not config["headless"]:
                     print(f"\nWarning: Locust exited with code {result.returncode}")
             except Exception as e:
@@ -1692,6 +2760,10 @@ def main():
                 return
 
             if config["headless"]:
+                try:
+                    record_run(config)
+                except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+                    print(f"Could not save this run to the history: {e}")
                 print("\n" + "=" * 50)
                 print("TEST COMPLETED SUCCESSFULLY!")
                 print("=" * 50)
@@ -1704,7 +2776,9 @@ def main():
                 print("\n" + "=" * 50)
                 print("PERFORMANCE ANALYSIS")
                 print("=" * 50)
-                analyze_performance_and_advise()
+                if analyze_performance_and_advise():
+                    print(f"\nPerformance regressed - exiting with code {REGRESSION_EXIT_CODE}")
+                    sys.exit(REGRESSION_EXIT_CODE)
         else:
             print("Test cancelled.")
 
@@ -0,0 +1,126 @@
+"""Micro-benchmark: requests per second per CPU core for each HTTP client engine
+
+Runs the same user (one GET per task, no wait time) against a tiny local HTTP
+server with the requests-based HttpUser and with FastHttpUser, each in its own
+process, and reports how many requests the load generator sent per second of
+its own CPU time - the number that decides how much load one core can create.
+The server runs in a separate process so its CPU time is not counted.
+
+    uv run benchmarks/engine_rps.py [--users 50] [--seconds 10]
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+SERVER_BODY = b"<html><body>LRGEX engine benchmark</body></html>"
+
+
+def serve(port):
+    """Minimal keep-alive HTTP server - fast enough that the generator is the bottleneck"""
+    from gevent.pywsgi import WSGIServer
+
+    def app(environ, start_response):
+        start_response("200 OK", [("Content-Type", "text/html"), ("Content-Length", str(len(SERVER_BODY)))])
+        return [SERVER_BODY]
+
+    WSGIServer(("127.0.0.1", port), app, log=None, error_log=None).serve_forever()
+
+
+def measure(engine, host, users, seconds):
+    """Run one engine in this process and return its request count and CPU time"""
+    import gevent
+    from locust import FastHttpUser, HttpUser, constant, task
+    from locust.env import Environment
+
+    base = {"requests": HttpUser, "fast": FastHttpUser}[engine]
+
+    class BenchmarkUser(base):
+        wait_time = constant(0)
+
+        @task
+        def index(self):
+            self.client.get("/")
+
+    environment = Environment(user_classes=[BenchmarkUser], host=host)
+    runner = environment.create_local_runner()
+    runner.start(users, spawn_rate=users)
+    gevent.sleep(1)  # Let every user connect before measuring
+    environment.stats.reset_all()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    gevent.sleep(seconds)
+    cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+    requests = environment.stats.total.num_requests
+    failures = environment.stats.total.num_failures
+    runner.quit()
+    return {"engine": engine, "requests": requests, "failures": failures, "cpu": cpu, "wall": wall}
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_server(port, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Benchmark server did not start on port {port}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50, help="simulated users per engine (default 50)")
+    parser.add_argument("--seconds", type=float, default=10, help="measured seconds per engine (default 10)")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    parser.add_argument("--host", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.host, args.users, args.seconds)))
+        return
+
+    port = free_port()
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", str(port)])
+    try:
+        wait_for_server(port)
+        results = []
+        for engine in ("requests", "fast"):
+            print(f"Measuring {engine} engine ({args.users} users, {args.seconds:g}s)...")
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--measure", engine,
+                 "--host", f"http://127.0.0.1:{port}", "--users", str(args.users), "--seconds", str(args.seconds)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print()
+    print(f"{'Engine':<10} {'Requests':>10} {'Failures':>9} {'RPS':>9} {'CPU s':>7} {'RPS per core':>13}")
+    for result in results:
+        rps = result["requests"] / result["wall"]
+        per_core = result["requests"] / result["cpu"] if result["cpu"] else 0.0
+        print(f"{result['engine']:<10} {result['requests']:>10} {result['failures']:>9} "
+              f"{rps:>9.0f} {result['cpu']:>7.1f} {per_core:>13.0f}")
+    baseline = results[0]["requests"] / results[0]["cpu"] if results[0]["cpu"] else 0.0
+    if baseline:
+        print(f"\nFast client: {results[1]['requests'] / results[1]['cpu'] / baseline:.1f}x the requests per core")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Micro-benchmark: what the raw-sample sink costs per request
+
+First calls the request listener directly - a do-nothing listener, the sink
+with each compression, and csv.writer writing a row per request for
+comparison - and reports CPU microseconds per request (the writer thread
+included) and bytes per request on disk. Then runs FastHttpUser against a
+tiny local server with and without the sink, each in its own process, and
+compares the requests sent per second of load generator CPU time.
+
+    uv run benchmarks/sample_sink_overhead.py [--requests 500000] [--users 50] [--seconds 10]
+"""
+
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # The repo, for lrgex_runtime
+
+from engine_rps import free_port, serve, wait_for_server  # noqa: E402
+
+NAMES = [("GET", "/"), ("GET", "/api/users"), ("GET", "/api/users/[id]"), ("POST", "/api/orders")]
+
+
+class Response:
+    status_code = 200
+
+
+def listener_cost(kind, requests, folder):
+    """CPU seconds and file size for recording `requests` samples with one kind of listener"""
+    import gevent
+
+    from lrgex_runtime.samples import SampleSink
+
+    path = os.path.join(folder, f"{kind}.out")
+    if kind == "no-op":
+        def listener(**kwargs):
+            pass
+        close = None
+    elif kind == "csv":
+        f = open(path, "w", newline="", encoding="utf-8")
+        writer = csv.writer(f)
+
+        def listener(request_type, name, response_time, response_length=0, response=None,
+                     exception=None, start_time=None, **kwargs):
+            writer.writerow([start_time, request_type, name, response.status_code if response else 0,
+                             int(exception is not None), response_time, response_length, 0])
+        close = f.close
+    else:
+        sink = SampleSink(path, compression=kind)
+        listener, close = sink.record, sink.close
+
+    response = Response()
+    start = time.time()
+    cpu_start = time.process_time()
+    for i in range(requests):
+        method, name = NAMES[i % len(NAMES)]
+        listener(request_type=method, name=name, response_time=20 + (i * 7919) % 400 / 10,
+                 response_length=1500 + i % 300, response=response, context={}, exception=None,
+                 start_time=start + i / 1000, url=name)
+        if i % 1000 == 0:
+            gevent.sleep(0)  # Users yield while waiting for responses - lets the writer's results in
+    if close:
+        close()
+    cpu = time.process_time() - cpu_start
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    return {"kind": kind, "cpu": cpu, "size": size}
+
+
+def measure(sink, host, users, seconds):
+    """Run FastHttpUser in this process, with or without the sink, and return its request count and CPU time"""
+    import gevent
+    from locust import FastHttpUser, constant, task
+    from locust.env import Environment
+
+    from lrgex_runtime.samples import SampleSink
+
+    class BenchmarkUser(FastHttpUser):
+        wait_time = constant(0)
+
+        @task
+        def index(self):
+            self.client.get("/")
+
+    environment = Environment(user_classes=[BenchmarkUser], host=host)
+    if sink:
+        folder = tempfile.mkdtemp()
+        samples = SampleSink(os.path.join(folder, "samples.lrs"))
+        environment.events.request.add_listener(samples.record)
+    runner = environment.create_local_runner()
+    runner.start(users, spawn_rate=users)
+    gevent.sleep(1)  # Let every user connect before measuring
+    environment.stats.reset_all()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    gevent.sleep(seconds)
+    runner.quit()
+    if sink:
+        samples.close()  # Writing the last chunk is part of the cost
+    cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+    requests = environment.stats.total.num_requests
+    return {"sink": sink, "requests": requests, "cpu": cpu, "wall": wall}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500000, help="samples per listener (default 500000)")
+    parser.add_argument("--users", type=int, default=50, help="simulated users in the load test (default 50)")
+    parser.add_argument("--seconds", type=float, default=10, help="measured seconds per load test (default 10)")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    parser.add_argument("--host", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+    if args.measure:
+        print(json.dumps(measure(args.measure == "sink", args.host, args.users, args.seconds)))
+        return
+
+    print(f"Recording {args.requests:,} samples per listener...")
+    with tempfile.TemporaryDirectory() as folder:
+        costs = [listener_cost(kind, args.requests, folder) for kind in ("no-op", "none", "zlib", "lzma", "csv")]
+    print()
+    print(f"{'Listener':<10} {'CPU us/request':>15} {'Over no-op':>11} {'Bytes/request':>14}")
+    for cost in costs:
+        per_request = cost["cpu"] / args.requests * 1e6
+        extra = per_request - costs[0]["cpu"] / args.requests * 1e6
+        label = "sink " + cost["kind"] if cost["kind"] in ("none", "zlib", "lzma") else cost["kind"]
+        print(f"{label:<10} {per_request:>15.2f} {extra:>11.2f} {cost['size'] / args.requests:>14.1f}")
+
+    port = free_port()
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", str(port)])
+    try:
+        wait_for_server(port)
+        results = []
+        for mode in ("off", "sink"):
+            print(f"\nLoad test with the sink {'on' if mode == 'sink' else 'off'} ({args.users} users, {args.seconds:g}s)...")
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--measure", mode,
+                 "--host", f"http://127.0.0.1:{port}", "--users", str(args.users), "--seconds", str(args.seconds)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print()
+    print(f"{'Sink':<6} {'Requests':>10} {'RPS':>9} {'CPU s':>7} {'RPS per core':>13}")
+    for result in results:
+        per_core = result["requests"] / result["cpu"] if result["cpu"] else 0.0
+        print(f"{'on' if result['sink'] else 'off':<6} {result['requests']:>10} "
+              f"{result['requests'] / result['wall']:>9.0f} {result['cpu']:>7.1f} {per_core:>13.0f}")
+    off, on = (result["requests"] / result["cpu"] if result["cpu"] else 0.0 for result in results)
+    if off and on:
+        print(f"\nSink overhead: {(1 / on - 1 / off) * 1e6:.1f} us of CPU per request ({(off / on - 1) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
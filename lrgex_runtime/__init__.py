@@ -0,0 +1,13 @@
+"""LRGEX Web Benchmark runtime - the user classes every generated test runs
+
+Each template lives in its own module (smart, website, api, ecommerce, support,
+forms, custom_form) and is configured by a JSON/TOML scenario file instead of
+being generated as code. A test file in tests/ only points LRGEX_SCENARIO at
+its scenario and imports the user class, so the same compiled runtime is
+reused by every run and every worker.
+"""
+
+from . import hdr, samples, workers  # Register the HDR latency recorder, raw samples and the load generator report
+from .scenario import SCENARIO, WORKER_COUNT, WORKER_INDEX, flag, load_scenario, setting, setting_list
+
+__all__ = ["SCENARIO", "WORKER_COUNT", "WORKER_INDEX", "flag", "load_scenario", "setting", "setting_list", "hdr", "samples", "workers"]
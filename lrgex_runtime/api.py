@@ -0,0 +1,61 @@
+"""API Load Test - REST endpoint performance"""
+
+import random
+
+from locust import task
+
+from .arrival import think_time
+from .engine import BaseUser
+from .feeder import FEEDER_FILE, DataFeeder
+from .popularity import PopularityPicker
+from .scenario import setting_list
+
+USER_IDS = PopularityPicker(range(1, 101))
+FEEDER = DataFeeder(FEEDER_FILE) if FEEDER_FILE else None  # Real payloads for create_user
+CUSTOM_URLS = setting_list("custom_urls")  # Endpoints listed in the wizard
+
+
+class APIUser(BaseUser):
+    wait_time = think_time(0.5, 2)
+    default_headers = {"Content-Type": "application/json"}  # Read by the fast client engine
+    
+    def on_start(self):
+        """Setup headers for API calls"""
+        if hasattr(self.client, "headers"):  # requests engine - a session with its own headers
+            self.client.headers.update(self.default_headers)
+    
+    @task(3)
+    def get_users(self):
+        """Get list of users"""
+        self.client.get("/api/users")
+    
+    @task(2)
+    def get_user_by_id(self):
+        """Get specific user"""
+        user_id = USER_IDS.pick()
+        self.client.get(f"/api/users/{user_id}")
+    
+    @task(1)
+    def create_user(self):
+        """Create new user - from your data file when one is set"""
+        if FEEDER:
+            user_data = FEEDER.row_for(self)
+        else:
+            user_data = {
+                "name": f"TestUser{random.randint(1000, 9999)}",
+                "email": f"test{random.randint(1000, 9999)}@example.com"
+            }
+        self.client.post("/api/users", json=user_data)
+    
+    @task(1)
+    def health_check(self):
+        """Check API health"""
+        self.client.get("/api/health")
+    
+    if CUSTOM_URLS:
+        custom_url_picker = PopularityPicker(CUSTOM_URLS)
+        
+        @task(3)
+        def custom_endpoints(self):
+            """Call the endpoints you listed"""
+            self.client.get(self.custom_url_picker.pick())
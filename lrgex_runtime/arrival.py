@@ -0,0 +1,278 @@
+"""Open-model load shapes - requests arrive at a set rate however slowly the server answers
+
+With a load_shape in the scenario, users stop thinking for a fixed time between
+tasks and instead wait for the next arrival slot of a shared pacer, so the
+offered load stays at the target requests/second when the server slows down.
+The shape runs on the master (or the only process), grows the user count to
+keep enough users free for the next arrivals and reports when it fell short.
+"""
+
+import csv
+import json
+import math
+import time
+import weakref
+from collections import deque
+
+import gevent
+from locust import LoadTestShape, between, events
+from locust.runners import MasterRunner, WorkerRunner
+
+from .scenario import setting
+
+RATE_MESSAGE = "lrgex_arrival_rate"
+DROPPED_KEY = "lrgex_arrival_dropped"  # Arrivals a worker dropped since its last report
+HEADROOM = 1.5  # Spare users on top of Little's law so bursts don't queue
+SPARE_USERS = 2
+MAX_BACKLOG = 1.0  # Seconds of late arrivals that are still sent - older ones are dropped
+RATE_WINDOW = 5.0  # Least seconds the achieved rate is measured over
+REPORT_INTERVAL = 4.0  # Workers report their counts every 3s - a count still for longer has stalled
+SHORTFALL = 0.9  # Achieved below 90% of the target counts as not sustained
+IDLE_CHECK = 0.2  # Seconds between looks at the rate while it is zero
+
+
+def load_shape_setting():
+    """The load_shape scenario entry - LRGEX_LOAD_SHAPE holds it as JSON"""
+    shape = setting("load_shape", None)
+    if isinstance(shape, str):
+        shape = json.loads(shape) if shape.strip() else None
+    return shape or None
+
+
+LOAD_SHAPE = load_shape_setting()
+MAX_USERS = int(LOAD_SHAPE.get("max_users", 1000)) if LOAD_SHAPE else 0
+
+
+def shape_rate(shape, run_time):
+    """Target requests/second run_time seconds into the test - None once the shape is over"""
+    kind = shape.get("type", "constant")
+    if kind == "constant":
+        return float(shape["rate"]) if run_time < shape["duration"] else None
+    if kind == "step":
+        step = int(run_time // shape["every"])
+        return float(shape["start"] + shape["step"] * step) if step < shape["steps"] else None
+    if kind == "spike":
+        if run_time >= shape["duration"]:
+            return None
+        in_spike = shape["at"] <= run_time < shape["at"] + shape["length"]
+        return float(shape["peak"] if in_spike else shape["base"])
+    if kind == "ramp-hold-ramp":
+        ramp, hold, rate = shape["ramp"], shape["hold"], float(shape["rate"])
+        if run_time < ramp:
+            return rate * run_time / ramp
+        if run_time < ramp + hold:
+            return rate
+        if run_time < 2 * ramp + hold:
+            return rate * (2 * ramp + hold - run_time) / ramp
+        return None
+    raise ValueError(f"Unknown load shape {kind!r} - use constant, step, spike or ramp-hold-ramp")
+
+
+class ArrivalPacer:
+    """Hands out arrival slots to the users of this process at its share of the target rate"""
+
+    def __init__(self):
+        self.per_user_rate = 0.0  # Requests/second each running user is responsible for
+        self.next_slot = 0.0
+        self.rate = 0.0  # Rate the booked slots were spaced at
+        self.tasks = 0
+        self.requests = 0
+        self.dropped = 0  # Arrivals more than MAX_BACKLOG late - no user was free to send them
+
+    def requests_per_task(self):
+        """Some tasks send several requests (form page + submit) - pace tasks so requests hit the rate"""
+        return self.requests / self.tasks if self.tasks >= 20 and self.requests else 1.0
+
+    def book(self, runner):
+        """Arrival slot (epoch seconds) for the next task - in the past when the users are behind"""
+        self.tasks += 1
+        rate = self.per_user_rate * runner.user_count / self.requests_per_task()
+        now = time.time()
+        if not self.rate:
+            # First booking, or the rate was zero - nothing is overdue
+            self.next_slot = max(self.next_slot, now)
+        elif rate != self.rate and self.next_slot > now:
+            # Slots already booked ahead were spaced for the old rate - respace them for the new one
+            self.next_slot = now + (self.next_slot - now) * self.rate / rate
+        self.rate = rate
+        if self.next_slot < now - MAX_BACKLOG:
+            self.dropped += math.floor((now - MAX_BACKLOG - self.next_slot) * rate + 1e-9)  # 1.9 * 10 is 18.999...
+            self.next_slot = now - MAX_BACKLOG
+        slot = self.next_slot
+        self.next_slot += 1 / rate
+        return slot
+
+
+PACER = ArrivalPacer()
+THINK_TIME = None  # (min, max) seconds of the closed-loop think time, once a template asked for it
+# Slot each user's current task was meant to start at - the HDR recorder charges its first request the delay
+INTENDED_START = weakref.WeakKeyDictionary()
+
+
+def arrival_wait(user):
+    # Nothing is sent while the shape is at zero (or hasn't sent a rate yet) - users stay
+    # in their waiting state, so stopping them here is safe
+    if PACER.per_user_rate <= 0:
+        while PACER.per_user_rate <= 0:
+            gevent.sleep(IDLE_CHECK)
+        PACER.rate = 0.0
+    slot = PACER.book(user.environment.runner)
+    INTENDED_START[gevent.getcurrent()] = slot
+    return max(0.0, slot - time.time())
+
+
+def think_time(min_wait, max_wait):
+    """wait_time for the templates - random think time, or arrival pacing when a load shape is set"""
+    global THINK_TIME
+    if LOAD_SHAPE:
+        return arrival_wait
+    THINK_TIME = (min_wait, max_wait)
+    return between(min_wait, max_wait)
+
+
+def receive_rate(environment, msg, **kwargs):
+    PACER.per_user_rate = msg.data["per_user"]
+
+
+def count_request(**kwargs):
+    PACER.requests += 1
+
+
+def send_dropped(client_id, data):
+    data[DROPPED_KEY] = PACER.dropped
+    PACER.dropped = 0
+
+
+def receive_dropped(client_id, data):
+    PACER.dropped += data.get(DROPPED_KEY, 0)
+
+
+@events.init.add_listener
+def setup_pacer(environment, **kwargs):
+    """Processes that run users take their share of the rate from the shape, the master adds up their drops"""
+    if not LOAD_SHAPE or environment.runner is None:
+        return
+    if isinstance(environment.runner, MasterRunner):
+        environment.events.worker_report.add_listener(receive_dropped)
+        return
+    environment.runner.register_message(RATE_MESSAGE, receive_rate)
+    environment.events.request.add_listener(count_request)
+    if isinstance(environment.runner, WorkerRunner):
+        environment.events.report_to_master.add_listener(send_dropped)
+
+
+class ArrivalRateShape(LoadTestShape):
+    """Sets the user count each second so the target arrival rate can be sustained"""
+
+    def __init__(self):
+        super().__init__()
+        self.users = 0
+        self.response_time = None  # Smoothed seconds per request
+        self.moves = deque()  # (time, requests, total response time ms) where the request count moved
+        self.targets = deque()  # (time, target) since the first of the moves
+        self.rows = []  # One per second for the arrival rate report
+        self.dropped = 0  # Of PACER.dropped, what the rows already show
+
+    def target_rate(self, run_time):
+        """Requests/second to offer now - None ends the test"""
+        return shape_rate(LOAD_SHAPE, run_time)
+
+    def measure(self, now):
+        """Achieved requests/second over the last RATE_WINDOW seconds or more - None until there is enough
+
+        On a master the request count only moves when the workers report, so the
+        rate is taken between the times it moved - dividing by the time since an
+        arbitrary second would swing with where the reports fell.
+        """
+        total = self.runner.stats.total
+        if self.moves and total.num_requests < self.moves[-1][1]:
+            self.moves.clear()  # The stats were reset - start over
+        if not self.moves or total.num_requests != self.moves[-1][1]:
+            self.moves.append((now, total.num_requests, total.total_response_time))
+            while len(self.moves) > 2 and self.moves[-1][0] - self.moves[1][0] >= RATE_WINDOW:
+                self.moves.popleft()
+            first, last = self.moves[0], self.moves[-1]
+            requests = last[1] - first[1]
+            if requests:
+                response_time = (last[2] - first[2]) / requests / 1000
+                self.response_time = (response_time if self.response_time is None
+                                      else 0.7 * self.response_time + 0.3 * response_time)
+        first, last = self.moves[0], self.moves[-1]
+        # Until the next report is overdue the requests since the last move are simply not counted yet
+        end = last[0] if now - last[0] <= REPORT_INTERVAL else now
+        if end - first[0] < RATE_WINDOW - 1.5:
+            return None
+        return (last[1] - first[1]) / (end - first[0])
+
+    def tick(self):
+        run_time = self.get_run_time()
+        target = self.target_rate(run_time)
+        if target is None:
+            return None
+
+        now = time.time()
+        achieved = self.measure(now)
+        self.targets.append((now, target))
+        while self.targets[0][0] < self.moves[0][0]:
+            self.targets.popleft()
+
+        # Little's law: users busy at once = arrivals/second x seconds per request
+        needed = math.ceil(target * (self.response_time or 0.1) * HEADROOM) + SPARE_USERS
+        needed = max(1, min(MAX_USERS, needed))
+        if needed > self.users or needed < self.users * 0.7:  # Grow at once, shrink lazily
+            self.users = needed
+        self.runner.send_message(RATE_MESSAGE, {"per_user": target / self.users})
+
+        # Short only when below every target in the window - a step up takes a window to show
+        short = achieved is not None and achieved < min(sample[1] for sample in self.targets) * SHORTFALL
+        dropped, self.dropped = PACER.dropped - self.dropped, PACER.dropped
+        self.rows.append([round(run_time, 1), round(target, 2), "" if achieved is None else round(achieved, 2),
+                          self.users, int(short), int(short and self.users >= MAX_USERS), dropped])
+        return self.users, max(10, self.users)
+
+
+def load_shape_class():
+    """The shape class for the scenario's load_shape - None for a closed-model test"""
+    if not LOAD_SHAPE:
+        return None
+    if LOAD_SHAPE.get("type") == "capacity-search":
+        from .capacity import CapacitySearchShape  # Imports this module - only loaded when used
+
+        return CapacitySearchShape
+    return ArrivalRateShape
+
+
+# Only a class when the scenario sets a load shape - Locust picks it up from the test file
+LoadShape = load_shape_class()
+
+
+@events.test_stop.add_listener
+def report_arrival_rate(environment, **kwargs):
+    """Say whether the target rate was held and save the per-second record next to the CSV reports"""
+    shape = environment.shape_class
+    if not isinstance(shape, ArrivalRateShape) or not shape.rows:
+        return
+    shape.rows[-1][6] += PACER.dropped - shape.dropped  # Reported after the last tick
+    shape.dropped = PACER.dropped
+    measured = [row for row in shape.rows if row[2] != ""]
+    short = [row for row in measured if row[4]]
+    capped = [row for row in short if row[5]]
+    print(f"Open-model load: target held for {len(measured) - len(short)} of {len(measured)} measured seconds, "
+          f"up to {max(row[3] for row in shape.rows)} users")
+    if short:
+        worst = min(short, key=lambda row: row[2] / row[1] if row[1] else 1)
+        print(f"  Could not sustain the target rate for {len(short)}s - worst {worst[2]:.0f} of "
+              f"{worst[1]:.0f} req/s at {worst[0]:.0f}s")
+        if capped:
+            print(f"  The user limit ({MAX_USERS}) was reached - the server is answering too slowly for this rate")
+    if PACER.dropped:
+        print(f"  {PACER.dropped} arrivals were dropped - no user was free to send them within {MAX_BACKLOG:g}s")
+
+    csv_prefix = getattr(environment.parsed_options, "csv_prefix", None)
+    if not csv_prefix:
+        return
+    with open(f"{csv_prefix}_arrival_rate.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Seconds", "Target RPS", "Achieved RPS", "Users", "Below Target", "At User Limit",
+                         "Dropped Arrivals"])
+        writer.writerows(shape.rows)
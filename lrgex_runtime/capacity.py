@@ -0,0 +1,260 @@
+"""Capacity search - raises the request rate step by step until the SLOs break, then narrows in
+
+Each step holds one arrival rate (see arrival.py), ignores its first seconds
+while users are added, and measures p95/p99 latency, error rate and the rate
+actually sent. Rates grow by a factor until a step fails, then the search
+bisects between the highest passing and lowest failing rate. The report gives
+the highest sustainable rate (the knee of the throughput/latency curve) and a
+safe operating point below it.
+"""
+
+import csv
+import time
+
+from locust import events
+from locust.stats import calculate_response_time_percentile, diff_response_time_dicts
+
+from .arrival import LOAD_SHAPE, REPORT_INTERVAL, SHORTFALL, ArrivalRateShape
+
+SEARCH = LOAD_SHAPE or {}
+START_RATE = float(SEARCH.get("start", 10))
+MAX_RATE = float(SEARCH.get("max_rate", 1000))
+MIN_RATE = 1.0  # Below this a failing server isn't worth narrowing in on
+GROWTH = float(SEARCH.get("growth", 2))  # Rate multiplier while every step passes
+STEP_SECONDS = float(SEARCH.get("step_seconds", 30))
+SETTLE_SECONDS = float(SEARCH.get("settle_seconds", 10))  # Not measured - users are still being added
+COOLDOWN_SECONDS = float(SEARCH.get("cooldown_seconds", 10))  # No load after a failed step - lets queues drain
+PRECISION = float(SEARCH.get("precision", 0.1))  # Stop once passing and failing rates are 10% apart
+MAX_STEPS = int(SEARCH.get("max_steps", 12))
+P95_MS = float(SEARCH.get("p95_ms", 500))
+P99_MS = float(SEARCH.get("p99_ms", 1000))
+ERROR_PERCENT = float(SEARCH.get("error_percent", 1))
+SAFETY = float(SEARCH.get("safety", 0.8))  # Recommended rate as a share of the highest sustainable rate
+
+
+def snapshot(total):
+    """What the aggregated stats hold right now - measurements are differences of two snapshots
+
+    On a master the stats only change when the workers report, so the search
+    takes its snapshots in the seconds the request count moved.
+    """
+    return time.time(), total.num_requests, total.num_failures, dict(total.response_times)
+
+
+class CapacityStep:
+    """One rate the search tried and how the server coped with it"""
+
+    def __init__(self, target, started):
+        self.target = target
+        self.started = started  # Run time the step began
+        self.baseline = None  # Snapshot taken once the step has settled and the request count moved
+        self.achieved = 0.0
+        self.p50 = self.p95 = self.p99 = 0
+        self.error_percent = 0.0
+        self.reasons = []  # Why the step failed - empty when it passed
+        self.measured = False  # False while the step runs, or if the test stopped during it
+
+    @property
+    def passed(self):
+        return not self.reasons
+
+    def measure(self, end):
+        """Judge the step on what happened between the baseline and the end snapshot"""
+        started, requests, failures, response_times = self.baseline
+        ended, end_requests, end_failures, end_response_times = end
+        requests = end_requests - requests
+        failures = end_failures - failures
+        times = diff_response_time_dicts(end_response_times, response_times)
+        count = sum(times.values())
+        self.achieved = requests / max(ended - started, 1e-9)
+        self.p50 = round(calculate_response_time_percentile(times, count, 0.50))
+        self.p95 = round(calculate_response_time_percentile(times, count, 0.95))
+        self.p99 = round(calculate_response_time_percentile(times, count, 0.99))
+        self.error_percent = failures / requests * 100 if requests else 0.0
+        self.measured = True
+
+        if not requests:
+            self.reasons.append("no responses")
+        if self.p95 > P95_MS:
+            self.reasons.append(f"p95 {self.p95}ms > {P95_MS:g}ms")
+        if self.p99 > P99_MS:
+            self.reasons.append(f"p99 {self.p99}ms > {P99_MS:g}ms")
+        if self.error_percent > ERROR_PERCENT:
+            self.reasons.append(f"errors {self.error_percent:.1f}% > {ERROR_PERCENT:g}%")
+        if self.achieved < self.target * SHORTFALL:
+            self.reasons.append(f"only {self.achieved:.0f} of {self.target:.0f} req/s sent")
+
+    def describe(self):
+        verdict = "ok" if self.passed else "FAIL - " + ", ".join(self.reasons)
+        return (f"{self.target:>8.1f} {self.achieved:>9.1f} {self.p50:>6}ms {self.p95:>6}ms "
+                f"{self.p99:>6}ms {self.error_percent:>6.1f}%  {verdict}")
+
+
+def search_result(steps):
+    """(highest passing step below every failure, lowest failing step) - either may be None"""
+    failed = [step for step in steps if not step.passed]
+    lowest_failure = min(failed, key=lambda step: step.target, default=None)
+    passed = [step for step in steps if step.passed
+              and (lowest_failure is None or step.target < lowest_failure.target)]
+    return max(passed, key=lambda step: step.target, default=None), lowest_failure
+
+
+class CapacitySearchShape(ArrivalRateShape):
+    """Arrival-rate shape that picks each step's rate from how the previous steps went"""
+
+    def __init__(self):
+        super().__init__()
+        self.steps = []  # Measured steps plus the one running now
+        self.next_step = None  # (rate, run time it starts) while cooling down after a failed step
+        self.finished = False
+        self.last_count = None  # Request count at the previous tick
+
+    def count_moved(self):
+        """Whether the request count changed since the previous tick - on a master, whether the workers reported"""
+        count = self.runner.stats.total.num_requests
+        moved, self.last_count = count != self.last_count, count
+        return moved
+
+    def target_rate(self, run_time):
+        if self.finished:
+            return None
+        moved = self.count_moved()
+        if self.next_step:
+            rate, starts = self.next_step
+            if run_time < starts:
+                return 0.0
+            self.next_step = None
+            self.start_step(rate, run_time)
+        step = self.steps[-1] if self.steps else None
+        if step is None:
+            step = self.start_step(START_RATE, run_time)
+        elif step.baseline is None:
+            # A count still for longer than a report interval has stalled - snapshot it anyway
+            if run_time - step.started >= SETTLE_SECONDS and (
+                moved or run_time - step.started >= SETTLE_SECONDS + REPORT_INTERVAL
+            ):
+                step.baseline = snapshot(self.runner.stats.total)
+        elif run_time - step.started >= STEP_SECONDS and (
+            moved or run_time - step.started >= STEP_SECONDS + REPORT_INTERVAL
+        ):
+            step.measure(snapshot(self.runner.stats.total))
+            print(f"Capacity search: {step.describe()}")
+            rate = self.next_rate()
+            if rate is None:
+                self.finished = True
+                return None
+            if not step.passed and COOLDOWN_SECONDS:
+                # The server is still working off the failed step's queue - it would spill into the next one
+                self.next_step = rate, run_time + COOLDOWN_SECONDS
+                return 0.0
+            step = self.start_step(rate, run_time)
+        return step.target
+
+    def start_step(self, rate, run_time):
+        step = CapacityStep(round(rate, 2), run_time)
+        self.steps.append(step)
+        return step
+
+    def next_rate(self):
+        """Rate for the next step - None when the search has narrowed in far enough"""
+        if len(self.steps) >= MAX_STEPS:
+            return None
+        best, failure = search_result(self.steps)
+        if failure is None:
+            last = self.steps[-1].target
+            return min(MAX_RATE, last * GROWTH) if last < MAX_RATE else None
+        low = best.target if best else 0.0
+        high = failure.target
+        if high - low <= high * PRECISION:
+            return None
+        rate = (low + high) / 2
+        return rate if rate >= MIN_RATE else None
+
+
+def write_curve_svg(path, steps, best, safe_rate):
+    """Throughput/latency chart - p95 and p99 against the rate sent, with the SLOs and safe point"""
+    width, height, margin = 640, 400, 60
+    max_x = max(max(step.achieved for step in steps), safe_rate) * 1.1 or 1
+    max_y = max(max(step.p99 for step in steps), P99_MS) * 1.1 or 1
+
+    def x(value):
+        return margin + value / max_x * (width - 2 * margin)
+
+    def y(value):
+        return height - margin - value / max_y * (height - 2 * margin)
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="sans-serif" font-size="12">',
+        '<rect width="100%" height="100%" fill="white"/>',
+        f'<text x="{width / 2}" y="24" text-anchor="middle" font-size="15">Capacity search - latency vs throughput</text>',
+        f'<line x1="{margin}" y1="{y(0)}" x2="{width - margin}" y2="{y(0)}" stroke="black"/>',
+        f'<line x1="{margin}" y1="{y(0)}" x2="{margin}" y2="{margin}" stroke="black"/>',
+        f'<text x="{width / 2}" y="{height - 20}" text-anchor="middle">Requests/second sent</text>',
+        f'<text x="18" y="{height / 2}" text-anchor="middle" transform="rotate(-90 18 {height / 2})">Response time (ms)</text>',
+    ]
+    for i in range(6):
+        parts.append(f'<text x="{x(max_x * i / 5):.1f}" y="{y(0) + 16}" text-anchor="middle">{max_x * i / 5:.0f}</text>')
+        parts.append(f'<text x="{margin - 6}" y="{y(max_y * i / 5) + 4:.1f}" text-anchor="end">{max_y * i / 5:.0f}</text>')
+    for limit, label in ((P95_MS, "p95 SLO"), (P99_MS, "p99 SLO")):
+        parts.append(f'<line x1="{margin}" y1="{y(limit):.1f}" x2="{width - margin}" y2="{y(limit):.1f}" '
+                     f'stroke="grey" stroke-dasharray="4 4"/>')
+        parts.append(f'<text x="{width - margin}" y="{y(limit) - 4:.1f}" text-anchor="end" fill="grey">{label}</text>')
+    if best:
+        parts.append(f'<line x1="{x(safe_rate):.1f}" y1="{y(0)}" x2="{x(safe_rate):.1f}" y2="{margin}" '
+                     f'stroke="green" stroke-dasharray="6 3"/>')
+        parts.append(f'<text x="{x(safe_rate) + 4:.1f}" y="{margin + 12}" fill="green">safe {safe_rate:.0f} req/s</text>')
+
+    ordered = sorted(steps, key=lambda step: step.target)
+    for attribute, colour in (("p95", "#1f77b4"), ("p99", "#ff7f0e")):
+        points = " ".join(f"{x(step.achieved):.1f},{y(getattr(step, attribute)):.1f}" for step in ordered)
+        parts.append(f'<polyline points="{points}" fill="none" stroke="{colour}" stroke-width="2"/>')
+        for step in ordered:
+            parts.append(f'<circle cx="{x(step.achieved):.1f}" cy="{y(getattr(step, attribute)):.1f}" r="4" '
+                         f'fill="{colour if step.passed else "red"}"/>')
+        parts.append(f'<text x="{width - margin + 4}" y="{y(getattr(ordered[-1], attribute)):.1f}" '
+                     f'fill="{colour}">{attribute}</text>')
+    parts.append("</svg>")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(parts))
+
+
+@events.test_stop.add_listener
+def report_capacity(environment, **kwargs):
+    """Print the knee-point report and save the steps and the curve next to the CSV reports"""
+    shape = environment.shape_class
+    if not isinstance(shape, CapacitySearchShape):
+        return
+    steps = [step for step in shape.steps if step.measured]
+    if not steps:
+        print("Capacity search: stopped before the first step was measured")
+        return
+
+    best, failure = search_result(steps)
+    safe_rate = best.target * SAFETY if best else 0.0
+    print(f"Capacity search: {len(steps)} steps, SLOs p95 <= {P95_MS:g}ms, p99 <= {P99_MS:g}ms, "
+          f"errors <= {ERROR_PERCENT:g}%")
+    print(f"  {'Target':>8} {'Achieved':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'Errors':>7}")
+    for step in sorted(steps, key=lambda step: step.target):
+        print(f"  {step.describe()}")
+    if best is None:
+        print(f"  Even {failure.target:g} req/s broke the SLOs ({', '.join(failure.reasons)})")
+    else:
+        print(f"  Max sustainable rate: {best.target:g} req/s (p95 {best.p95}ms, p99 {best.p99}ms)")
+        if failure is None:
+            print(f"  No step failed - the limit is above {best.target:g} req/s (raise max_rate to find it)")
+        else:
+            print(f"  Knee: SLOs broke at {failure.target:g} req/s ({', '.join(failure.reasons)})")
+        print(f"  Recommended safe operating point: {safe_rate:.0f} req/s ({SAFETY:.0%} of the max)")
+
+    csv_prefix = getattr(environment.parsed_options, "csv_prefix", None)
+    if not csv_prefix:
+        return
+    with open(f"{csv_prefix}_capacity.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Step", "Target RPS", "Achieved RPS", "50%", "95%", "99%", "Error %", "Passed",
+                         "Reasons", "Max Sustainable", "Safe RPS"])
+        for number, step in enumerate(steps, 1):
+            writer.writerow([number, step.target, round(step.achieved, 2), step.p50, step.p95, step.p99,
+                             round(step.error_percent, 2), int(step.passed), "; ".join(step.reasons),
+                             int(step is best), round(safe_rate, 2) if step is best else ""])
+    write_curve_svg(f"{csv_prefix}_capacity.svg", steps, best, safe_rate)
@@ -0,0 +1,204 @@
+"""Site crawler - breadth-first walk of same-site links from the homepage"""
+
+import codecs
+import hashlib
+import posixpath
+import re
+from html.parser import HTMLParser
+from urllib.parse import quote, unquote, urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+
+import gevent
+from gevent.pool import Pool
+
+from .scenario import flag, setting
+
+CRAWL_MAX_DEPTH = max(0, int(setting("crawl_depth", "3")))
+CRAWL_MAX_PAGES = max(1, int(setting("crawl_max_pages", "500")))
+CRAWL_CONCURRENCY = max(1, int(setting("crawl_concurrency", "4")))
+CRAWL_DELAY = max(0.0, float(setting("crawl_delay", "0.1")))  # Politeness pause after each fetch
+CRAWL_TIMEOUT = float(setting("crawl_timeout", "10"))
+CRAWL_RESPECT_ROBOTS = flag("crawl_respect_robots")
+CRAWL_MAX_LINKS = max(1, int(setting("crawl_max_links", "1000")))  # Stop reading a page after this many links
+CRAWL_CHUNK_SIZE = 16384
+MAX_PATH_LENGTH = 300
+
+
+class SiteGraph:
+    """Pages found by the crawler and the links between them"""
+    
+    def __init__(self):
+        self.pages = {}  # path -> {"status": code, "depth": clicks from homepage}
+        self.links = {}  # path -> set of same-site paths it links to
+    
+    def add_page(self, path, status, depth):
+        self.pages[path] = {"status": status, "depth": depth}
+    
+    def add_link(self, source, target):
+        self.links.setdefault(source, set()).add(target)
+    
+    def statuses(self):
+        return {path: page["status"] for path, page in self.pages.items()}
+    
+    def inlink_counts(self):
+        """How many crawled pages link to each path"""
+        counts = {}
+        for targets in self.links.values():
+            for target in targets:
+                counts[target] = counts.get(target, 0) + 1
+        return counts
+    
+    def to_dict(self):
+        return {"pages": self.pages, "links": {path: sorted(targets) for path, targets in self.links.items()}}
+    
+    @classmethod
+    def from_dict(cls, data):
+        graph = cls()
+        graph.pages = dict((data or {}).get("pages", {}))
+        graph.links = {path: set(targets) for path, targets in (data or {}).get("links", {}).items()}
+        return graph
+
+
+def normalize_link(link, page_url, site):
+    """Same-site path for a link found on page_url, or None for external and non-page links"""
+    link = link.strip()
+    if not link or link.startswith(("#", "mailto:", "tel:", "javascript:", "data:")):
+        return None
+    parts = urlsplit(urljoin(page_url, link))
+    if parts.scheme not in ("http", "https") or parts.netloc.lower() != site:
+        return None
+    # Resolve ./ and ../, collapse duplicate slashes and use one spelling for escapes
+    path = posixpath.normpath(unquote(parts.path or "/"))
+    path = "/" + path.lstrip("/")
+    if parts.path.endswith("/") and path != "/":
+        path += "/"
+    path = quote(path, safe="/:@!$&'()*+,;=-._~")
+    if len(path) > MAX_PATH_LENGTH:
+        return None
+    return path
+
+
+class LinkExtractor(HTMLParser):
+    """Incremental link collector - feed it chunks of HTML until it is full"""
+    
+    # href on <a>, <area> and <link>, src on images/scripts/frames, action on forms
+    LINK_ATTRIBUTES = ("href", "src", "action")
+    
+    def __init__(self, max_links):
+        super().__init__(convert_charrefs=True)
+        self.max_links = max_links
+        self.links = []
+    
+    @property
+    def full(self):
+        return len(self.links) >= self.max_links
+    
+    def handle_starttag(self, tag, attrs):
+        # attrs arrive already unquoted, whichever quote style (or none) the page used
+        for name, value in attrs:
+            if value and name in self.LINK_ATTRIBUTES and not self.full:
+                self.links.append(value)
+
+
+def response_charset(response):
+    """Charset from the Content-Type header - HTML without one is treated as UTF-8"""
+    match = re.search(r"charset=([^;]+)", response.headers.get("Content-Type", ""), re.IGNORECASE)
+    charset = match.group(1).strip().strip('"') if match else "utf-8"
+    try:
+        codecs.lookup(charset)
+    except LookupError:
+        charset = "utf-8"
+    return charset
+
+
+def extract_links(response, max_links=None):
+    """Links from a streamed response, parsed chunk by chunk - returns (links, body_hash)
+    
+    Reading stops as soon as max_links links are collected, so body_hash is
+    only set when the whole page was read.
+    """
+    parser = LinkExtractor(CRAWL_MAX_LINKS if max_links is None else max_links)
+    decoder = codecs.getincrementaldecoder(response_charset(response))(errors="replace")
+    digest = hashlib.sha256()
+    for chunk in response.iter_content(chunk_size=CRAWL_CHUNK_SIZE):
+        digest.update(chunk)
+        parser.feed(decoder.decode(chunk))
+        if parser.full:
+            return parser.links, None
+        gevent.sleep(0)  # Let other users run between chunks of a big page
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    return parser.links, digest.hexdigest()
+
+
+def load_robots(client):
+    """robots.txt rules for the crawler, or None when there are none to respect"""
+    if not CRAWL_RESPECT_ROBOTS:
+        return None
+    try:
+        with client.get("/robots.txt", catch_response=True, name="discovery", timeout=CRAWL_TIMEOUT) as response:
+            response.success()
+            if response.status_code != 200:
+                return None
+            robots = RobotFileParser()
+            robots.parse(response.text.splitlines())
+            return robots
+    except Exception:
+        return None
+
+
+def crawl_site(client, on_page=None, max_depth=None, max_pages=None):
+    """Breadth-first crawl from the homepage - returns a SiteGraph
+    
+    on_page(path, status, headers, body_hash) is called for every fetched
+    page; headers is None when the fetch failed.
+    """
+    max_depth = CRAWL_MAX_DEPTH if max_depth is None else max_depth
+    max_pages = CRAWL_MAX_PAGES if max_pages is None else max_pages
+    site = urlsplit(client.base_url).netloc.lower()
+    robots = load_robots(client)
+    graph = SiteGraph()
+    
+    def visit(path):
+        links = []
+        status = None
+        try:
+            # Stream so non-HTML pages are never downloaded
+            with client.get(path, catch_response=True, name="discovery", timeout=CRAWL_TIMEOUT, stream=True) as response:
+                status = response.status_code
+                body_hash = None
+                if status == 200 and "html" in response.headers.get("Content-Type", "").lower():
+                    page_url = response.url or client.base_url + path
+                    raw_links, body_hash = extract_links(response)
+                    links = [normalize_link(link, page_url, site) for link in raw_links]
+                if on_page:
+                    on_page(path, status, response.headers, body_hash)
+                response.close()
+                response.success()
+        except Exception:
+            if on_page and status is None:
+                on_page(path, None, None, None)
+        gevent.sleep(CRAWL_DELAY)
+        return path, status, [link for link in links if link]
+    
+    seen = {"/"}  # Dedupe set - every path is fetched at most once
+    frontier = ["/"]
+    pool = Pool(CRAWL_CONCURRENCY)
+    for depth in range(max_depth + 1):
+        next_frontier = []
+        for path, status, links in pool.imap_unordered(visit, frontier):
+            if status is None:
+                continue
+            graph.add_page(path, status, depth)
+            for link in links:
+                graph.add_link(path, link)
+                if depth == max_depth or link in seen or len(seen) >= max_pages:
+                    continue
+                if robots and not robots.can_fetch("*", link):
+                    continue
+                seen.add(link)
+                next_frontier.append(link)
+        if not next_frontier:
+            break
+        frontier = next_frontier
+    return graph
@@ -0,0 +1,93 @@
+"""Smart Form Builder test - submits your form with the fields described in the scenario"""
+
+from locust import task
+
+from .arrival import think_time
+from .engine import BaseUser
+from .feeder import FEEDER_FILE, DataFeeder
+from .form_schema import load_form_schema, token_rejected
+from .pools import FAKE_UNIQUE_WINDOW, DataPool, fake_emails, fake_ids, fake_names, fake_phones, id_window
+from .scenario import SCENARIO
+
+FORM = SCENARIO.get("form", {})
+FORM_PAGE = FORM.get("form_page", "/")
+SUBMIT_URL = FORM.get("submit_url", FORM_PAGE)
+FIELDS = FORM.get("fields", [])
+
+# Generated field types draw from pre-built pools - IDs and emails stay unique
+FIELD_POOLS = {
+    1: lambda: DataPool(fake_ids(10000, 99999), id_window(10000, 99999)),  # Student ID
+    2: lambda: DataPool(fake_ids(10000, 99999, "UNI"), id_window(10000, 99999)),  # University ID
+    3: lambda: DataPool(fake_names),
+    4: lambda: DataPool(fake_emails, FAKE_UNIQUE_WINDOW),
+    5: lambda: DataPool(fake_phones),
+}
+TEXT_MESSAGE = "Test submission from load testing - please disregard"
+
+
+def build_fields(fields):
+    """Split the fields into fixed values, pooled values and data file columns"""
+    static_data = {}
+    pools = {}  # One pool per field type, shared by fields of that type
+    pooled_fields = []  # (field name, pool)
+    column_fields = []  # (field name, column)
+    for field in fields:
+        field_type = field.get("type")
+        if field_type in FIELD_POOLS:
+            if field_type not in pools:
+                pools[field_type] = FIELD_POOLS[field_type]()
+            pooled_fields.append((field["name"], pools[field_type]))
+        elif field_type == 6:  # Text message
+            static_data[field["name"]] = TEXT_MESSAGE
+        elif field_type == 7:  # Custom text
+            static_data[field["name"]] = field.get("custom_text", "")
+        elif field_type == 8:  # Data file column
+            column_fields.append((field["name"], field.get("column", field["name"])))
+    static_data["submit"] = "1"
+    return static_data, pooled_fields, column_fields
+
+
+STATIC_FORM_DATA, POOLED_FIELDS, COLUMN_FIELDS = build_fields(FIELDS)
+if COLUMN_FIELDS and not FEEDER_FILE:
+    # Sending the form without these fields would make every submission a different test than the one asked for
+    raise ValueError(f"The form takes {', '.join(name for name, _column in COLUMN_FIELDS)} from a data file, "
+                     "but no feeder_file is set - add it to the scenario or set LRGEX_FEEDER_FILE")
+FEEDER = DataFeeder(FEEDER_FILE) if COLUMN_FIELDS else None
+
+
+class CustomFormUser(BaseUser):
+    wait_time = think_time(1, 3)
+
+    def post_custom_form(self, schema):
+        """POST your fields plus the page's hidden fields - returns the status code"""
+        # Prepare form data with your specific fields
+        form_data = dict(schema["fields"])
+        form_data.update(STATIC_FORM_DATA)
+        for name, pool in POOLED_FIELDS:
+            form_data[name] = pool.next()
+        if FEEDER:
+            row = FEEDER.row_for(self)
+            for name, column in COLUMN_FIELDS:
+                form_data[name] = row.get(column, "")
+        with self.client.post(SUBMIT_URL, data=form_data, headers=schema["headers"], catch_response=True) as post_response:
+            if post_response.status_code in [200, 201, 302, 422]:
+                post_response.success()
+            else:
+                post_response.failure(f"Form submission failed: {post_response.status_code}")
+                print(f"Form submission failed: {post_response.status_code}") # Keep this for critical errors
+            return post_response.status_code
+
+    @task
+    def submit_custom_form(self):
+        """Submit your custom form with realistic test data"""
+        # Load the form page first - or reuse its cached hidden fields and CSRF token
+        schema = load_form_schema(self, FORM_PAGE, fail_missing=True)
+        if schema is None:
+            print("Could not load form page") # Keep this for critical errors
+            return
+        status = self.post_custom_form(schema)
+        if token_rejected(self, FORM_PAGE, status):
+            # Cached token went stale - reload the form page once and resubmit
+            schema = load_form_schema(self, FORM_PAGE, fail_missing=True)
+            if schema is not None:
+                self.post_custom_form(schema)
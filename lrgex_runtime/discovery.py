@@ -0,0 +1,162 @@
+"""Discovery cache and session - what exists on each host, found once and kept out of the load results"""
+
+import csv
+import hashlib
+import json
+import os
+import re
+import time
+
+import gevent
+from locust import events
+from locust.clients import HttpSession
+from locust.event import EventHook
+from locust.runners import MasterRunner
+from locust.stats import RequestStats
+
+from .scenario import WORKER_COUNT, WORKER_INDEX, flag, setting
+
+DISCOVERY_CACHE_ENABLED = flag("discovery_cache")
+DISCOVERY_CACHE_DIR = setting("discovery_cache_dir", ".lrgex_cache")
+DISCOVERY_CACHE_TTL = float(setting("discovery_cache_ttl", "3600"))
+DISCOVERY_WAIT = float(setting("discovery_wait", "120"))  # Seconds extra workers wait for the first one
+
+
+def discovery_cache_file(host, kind):
+    """Cache file for one host and template, e.g. .lrgex_cache/discovery/https_mysite_com-smart.json"""
+    safe_host = re.sub(r"[^A-Za-z0-9]+", "_", host or "default").strip("_")
+    return os.path.join(DISCOVERY_CACHE_DIR, "discovery", f"{safe_host}-{kind}.json")
+
+
+def load_discovery_cache(host, kind):
+    """Return the cached discovery for this host if it is younger than the TTL"""
+    if not DISCOVERY_CACHE_ENABLED:
+        return None
+    try:
+        with open(discovery_cache_file(host, kind), "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if entry.get("host") != host or time.time() - entry.get("saved_at", 0) > DISCOVERY_CACHE_TTL:
+        return None
+    return entry
+
+
+def load_shared_discovery_cache(host, kind):
+    """Like load_discovery_cache, but extra workers wait for the first worker to save its discovery
+
+    Only worker 1 crawls a host nobody has cached yet - the others revalidate its
+    result instead of sending the whole discovery sweep again.
+    """
+    entry = load_discovery_cache(host, kind)
+    if entry is None and WORKER_INDEX > 0 and DISCOVERY_CACHE_ENABLED:
+        print(f"Waiting for worker 1 to finish discovering {host}...")
+        deadline = time.time() + DISCOVERY_WAIT
+        while entry is None and time.time() < deadline:
+            gevent.sleep(0.5)
+            entry = load_discovery_cache(host, kind)
+    return entry
+
+
+def save_discovery_cache(host, kind, validators, statuses, homepage_links, site_graph=None):
+    """Store discovered paths, their status codes, the homepage links and the site graph for the next run"""
+    if not DISCOVERY_CACHE_ENABLED:
+        return
+    entry = {
+        "host": host,
+        "saved_at": time.time(),
+        "statuses": statuses,
+        "working_paths": sorted(p for p, status in statuses.items() if status in [200, 301, 302]),
+        "protected_paths": sorted(p for p, status in statuses.items() if status in [401, 403]),
+        "homepage_links": sorted(homepage_links),
+        "site_graph": site_graph.to_dict() if site_graph is not None else None,
+    }
+    if validators:
+        entry.update(validators)
+    cache_file = discovery_cache_file(host, kind)
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(cache_file + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(entry, f, indent=2)
+        os.replace(cache_file + ".tmp", cache_file)
+    except OSError:
+        pass  # A missing cache only costs a full discovery next time
+
+
+def homepage_validators(headers, body_hash=None):
+    """ETag, Last-Modified and a body hash - read these while the response is fresh"""
+    return {
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "homepage_hash": body_hash,
+    }
+
+
+def revalidate_discovery_cache(client, entry, timeout=None):
+    """Conditional GET of the homepage - returns (unchanged, response)"""
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    with client.get("/", headers=headers, catch_response=True, name="discovery", timeout=timeout) as response:
+        response.success()
+    if response.status_code == 304:
+        return True, response
+    if response.status_code != 200:
+        return False, response
+    # Some servers ignore conditional headers - compare the validators ourselves
+    current = homepage_validators(response.headers, hashlib.sha256(response.content).hexdigest())
+    if entry.get("etag") and current["etag"]:
+        return current["etag"] == entry["etag"], response
+    if entry.get("last_modified") and current["last_modified"]:
+        return current["last_modified"] == entry["last_modified"], response
+    return entry.get("homepage_hash") is not None and current["homepage_hash"] == entry["homepage_hash"], response
+
+
+# Discovery requests are counted on their own - never in the load-phase results
+discovery_stats = RequestStats()
+discovery_request_event = EventHook()
+
+
+def record_discovery_request(request_type, name, response_time, response_length, exception=None, **kwargs):
+    discovery_stats.log_request(request_type, name, response_time, response_length)
+    if exception:
+        discovery_stats.log_error(request_type, name, exception)
+
+
+discovery_request_event.add_listener(record_discovery_request)
+
+
+def discovery_session(host):
+    """HTTP session for discovery - its requests only land in discovery_stats"""
+    return HttpSession(base_url=host, request_event=discovery_request_event, user=None)
+
+
+def runs_users(environment):
+    """Discovery belongs where users run - never on a distributed master"""
+    return not isinstance(environment.runner, MasterRunner)
+
+
+@events.test_stop.add_listener
+def report_discovery_stats(environment, **kwargs):
+    """Show discovery traffic separately and save it next to the CSV reports"""
+    total = discovery_stats.total
+    if not total.num_requests:
+        return
+    print(f"Discovery traffic (not included in results): {total.num_requests} requests, "
+          f"{total.num_failures} failed, avg {total.avg_response_time:.0f}ms")
+    
+    # Workers have no --csv of their own - the launcher passes the report prefix
+    csv_prefix = getattr(environment.parsed_options, "csv_prefix", None) or setting("csv_prefix")
+    if not csv_prefix:
+        return
+    suffix = f"_worker{WORKER_INDEX + 1}" if WORKER_COUNT > 1 else ""
+    with open(f"{csv_prefix}_discovery{suffix}.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Type", "Name", "Request Count", "Failure Count",
+                         "Median Response Time", "Average Response Time", "Max Response Time"])
+        for entry in list(discovery_stats.entries.values()) + [total]:
+            writer.writerow([entry.method or "", entry.name, entry.num_requests, entry.num_failures,
+                             entry.median_response_time, round(entry.avg_response_time, 2),
+                             round(entry.max_response_time, 2)])
@@ -0,0 +1,55 @@
+"""E-commerce Test - shopping, cart and checkout"""
+
+from locust import task
+
+from .arrival import think_time
+from .engine import BaseUser
+from .popularity import PopularityPicker
+from .scenario import setting_list
+
+# Listed most popular first - the popularity model decides how skewed picks are
+PRODUCT_IDS = PopularityPicker(range(1, 51))
+CATEGORIES = PopularityPicker(["electronics", "clothing", "books", "sports"])
+SEARCH_TERMS = PopularityPicker(["laptop", "phone", "book", "shoes", "watch"])
+CUSTOM_URLS = setting_list("custom_urls")  # Pages listed in the wizard
+
+
+class ShopperUser(BaseUser):
+    wait_time = think_time(1, 4)
+    
+    @task(4)
+    def browse_products(self):
+        """Browse product catalog"""
+        category = CATEGORIES.pick()
+        self.client.get(f"/products?category={category}")
+    
+    @task(3)
+    def view_product(self):
+        """View product details"""
+        product_id = PRODUCT_IDS.pick()
+        self.client.get(f"/product/{product_id}")
+    
+    @task(2)
+    def add_to_cart(self):
+        """Add item to cart"""
+        product_id = PRODUCT_IDS.pick()
+        self.client.post(f"/cart/add/{product_id}")
+    
+    @task(1)
+    def view_cart(self):
+        """View shopping cart"""
+        self.client.get("/cart")
+    
+    @task(1)
+    def search_products(self):
+        """Search for products"""
+        term = SEARCH_TERMS.pick()
+        self.client.get(f"/search?q={term}")
+    
+    if CUSTOM_URLS:
+        custom_url_picker = PopularityPicker(CUSTOM_URLS)
+        
+        @task(3)
+        def custom_pages(self):
+            """Visit the pages you listed"""
+            self.client.get(self.custom_url_picker.pick())
@@ -0,0 +1,15 @@
+"""HTTP client engine - requests-based HttpUser or the geventhttpclient-based FastHttpUser"""
+
+from locust import FastHttpUser, HttpUser
+
+from .scenario import setting
+
+# "fast" sends several times more requests per CPU core; "requests" is the compatible default
+ENGINES = {"requests": HttpUser, "fast": FastHttpUser}
+ENGINE = str(setting("engine", "requests")).lower()
+if ENGINE not in ENGINES:
+    raise ValueError(f"Unknown engine {ENGINE!r} - use one of {', '.join(ENGINES)}")
+
+# Every template's user class derives from this - both clients support catch_response,
+# success()/failure(), data=, json=, headers= and name=, which is all the templates use
+BaseUser = ENGINES[ENGINE]
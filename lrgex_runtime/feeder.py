@@ -0,0 +1,107 @@
+"""Data feeder - rows read from a CSV/JSONL file through mmap instead of loaded into memory"""
+
+import csv
+import json
+import mmap
+import os
+import random
+from array import array
+
+from .scenario import WORKER_COUNT, WORKER_INDEX, setting
+
+FEEDER_FILE = setting("feeder_file", "")
+FEEDER_STRATEGY = str(setting("feeder_strategy", "sequential")).lower()  # "per-user", "sequential" or "random"
+FEEDER_STRATEGIES = ("per-user", "sequential", "random")
+
+
+class DataFeeder:
+    """One record per line - each worker reads only its own slice of the file"""
+    
+    def __init__(self, path, strategy=None, worker_index=WORKER_INDEX, worker_count=WORKER_COUNT):
+        self.strategy = (strategy or FEEDER_STRATEGY).lower()
+        if self.strategy not in FEEDER_STRATEGIES:
+            raise ValueError(f"Unknown feeder strategy {self.strategy!r} - use one of {', '.join(FEEDER_STRATEGIES)}")
+        self.jsonl = path.lower().endswith((".jsonl", ".ndjson"))
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError(f"Data file {path} is empty")
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        first = 0
+        self.columns = None
+        if not self.jsonl:
+            header, first = self.read_line(0, len(self.map))
+            self.columns = next(csv.reader([header.decode("utf-8-sig")]))
+        
+        # Disjoint byte ranges per worker, snapped to the start of a line
+        size = len(self.map) - first
+        self.start = self.line_start(first + size * worker_index // worker_count, first)
+        self.end = self.line_start(first + size * (worker_index + 1) // worker_count, first)
+        self.cursor = self.start
+        if self.next_offset(self.start) is None:
+            raise ValueError(f"Data file {path} has no rows for worker {worker_index + 1} of {worker_count}")
+        # Line starts in this slice for random picks - indexed now, before the users start, because
+        # indexing a large file never yields and would hold up every user of the process mid-test
+        self.offsets = self.index_rows() if self.strategy == "random" else None
+    
+    def line_start(self, position, first):
+        if position <= first:
+            return first
+        if position >= len(self.map) or self.map[position - 1:position] == b"\n":
+            return min(position, len(self.map))
+        newline = self.map.find(b"\n", position)
+        return len(self.map) if newline == -1 else newline + 1
+    
+    def read_line(self, position, end):
+        newline = self.map.find(b"\n", position, end)
+        stop = end if newline == -1 else newline
+        return self.map[position:stop], stop + 1
+    
+    def next_offset(self, position):
+        """Start of the first non-blank line at or after position, None past the slice"""
+        while position < self.end:
+            line, following = self.read_line(position, self.end)
+            if line.strip():
+                return position
+            position = following
+        return None
+    
+    def parse(self, line):
+        text = line.decode("utf-8").rstrip("\r")
+        if self.jsonl:
+            return json.loads(text)
+        return dict(zip(self.columns, next(csv.reader([text]))))
+    
+    def next_row(self):
+        """Next row of this slice, shared by all users - wraps around at the end"""
+        position = self.next_offset(self.cursor)
+        if position is None:
+            position = self.next_offset(self.start)
+        line, self.cursor = self.read_line(position, self.end)
+        return self.parse(line)
+    
+    def index_rows(self):
+        """Start offsets of the non-blank lines in this slice"""
+        offsets = array("q")
+        position = self.next_offset(self.start)
+        while position is not None:
+            offsets.append(position)
+            position = self.next_offset(self.read_line(position, self.end)[1])
+        return offsets
+    
+    def random_row(self):
+        """Any row of this slice, with replacement"""
+        if self.offsets is None:
+            self.offsets = self.index_rows()
+        line, _ = self.read_line(self.offsets[random.randrange(len(self.offsets))], self.end)
+        return self.parse(line)
+    
+    def row_for(self, user):
+        """Row for this request - per-user keeps one row for the user's whole session"""
+        if self.strategy == "random":
+            return self.random_row()
+        if self.strategy == "per-user":
+            if getattr(user, "feeder_row", None) is None:
+                user.feeder_row = self.next_row()
+            return user.feeder_row
+        return self.next_row()
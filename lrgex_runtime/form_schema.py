@@ -0,0 +1,121 @@
+"""Form schema cache - hidden fields and CSRF tokens reused instead of a GET before every POST"""
+
+import time
+from html.parser import HTMLParser
+
+from .scenario import setting
+
+FORM_TOKEN_CACHE = str(setting("form_token_cache", "off")).lower()  # "off", "session" or "global"
+FORM_TOKEN_TTL = float(setting("form_token_ttl", "300"))
+TOKEN_REJECTED_STATUSES = [400, 403, 419]  # Typical answers to a stale or missing CSRF token
+CSRF_META_NAMES = ("csrf-token", "csrf_token", "_csrf", "xsrf-token")
+# Shared tokens rejected this often for users that didn't fetch them - the site ties tokens to the session
+GLOBAL_REJECTION_LIMIT = int(setting("form_global_rejection_limit", "5"))
+
+
+class FormSchemaParser(HTMLParser):
+    """Collects hidden inputs and a CSRF meta tag from a form page"""
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.fields = {}
+        self.headers = {}
+    
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "input" and (attrs.get("type") or "").lower() == "hidden" and attrs.get("name"):
+            self.fields.setdefault(attrs["name"], attrs.get("value") or "")
+        elif tag == "meta" and (attrs.get("name") or "").lower() in CSRF_META_NAMES and attrs.get("content"):
+            self.headers["X-CSRF-Token"] = attrs["content"]
+
+
+def parse_form_schema(html):
+    """Hidden fields to send back with the form, and headers carrying its CSRF token"""
+    parser = FormSchemaParser()
+    parser.feed(html)
+    parser.close()
+    return {"fields": parser.fields, "headers": parser.headers}
+
+
+class FormSchemaCache:
+    """Parsed form pages by URL - entries expire after FORM_TOKEN_TTL seconds"""
+    
+    def __init__(self, ttl=FORM_TOKEN_TTL):
+        self.ttl = ttl
+        self.entries = {}  # page url -> (fetched at, schema, id of the user that fetched it)
+    
+    def get(self, page_url):
+        entry = self.entries.get(page_url)
+        if entry and time.time() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+    
+    def put(self, page_url, schema, owner=None):
+        self.entries[page_url] = (time.time(), schema, owner)
+    
+    def owner(self, page_url):
+        entry = self.entries.get(page_url)
+        return entry[2] if entry else None
+    
+    def invalidate(self, page_url):
+        self.entries.pop(page_url, None)
+
+
+GLOBAL_FORM_SCHEMAS = FormSchemaCache()
+global_rejections = 0  # Shared tokens the server refused from a user other than the one that fetched them
+
+
+def form_schema_cache(user):
+    """The cache this user reads - its own per session, shared in global mode, None when off"""
+    if FORM_TOKEN_CACHE == "global":
+        return GLOBAL_FORM_SCHEMAS
+    if FORM_TOKEN_CACHE == "session":
+        if not hasattr(user, "form_schemas"):
+            user.form_schemas = FormSchemaCache()
+        return user.form_schemas
+    return None
+
+
+def load_form_schema(user, page_url, name=None, fail_missing=False):
+    """Schema for a form page - from the cache when allowed, otherwise GET and parse it (None if missing)"""
+    cache = form_schema_cache(user)
+    schema = cache.get(page_url) if cache is not None else None
+    if schema is not None:
+        return schema
+    
+    with user.client.get(page_url, catch_response=True, name=name) as response:
+        if response.status_code != 200:
+            if fail_missing:
+                response.failure(f"Could not load form page: {response.status_code}")
+            else:
+                response.success()
+            return None
+        response.success()
+        schema = parse_form_schema(response.text)
+    if cache is not None:
+        cache.put(page_url, schema, id(user))
+    return schema
+
+
+def use_session_tokens():
+    """Give up on the shared token - every user fetches and keeps its own from now on"""
+    global FORM_TOKEN_CACHE
+    FORM_TOKEN_CACHE = "session"
+    GLOBAL_FORM_SCHEMAS.entries.clear()
+    print(f"Form token cache: {GLOBAL_REJECTION_LIMIT} submissions with a token fetched by another user "
+          "were rejected - this site ties CSRF tokens to the session, switching to one token per user")
+
+
+def token_rejected(user, page_url, status):
+    """Drop a cached schema the server refused - True means refetch the page and retry once"""
+    global global_rejections
+    cache = form_schema_cache(user)
+    if cache is None or status not in TOKEN_REJECTED_STATUSES:
+        return False
+    if cache is GLOBAL_FORM_SCHEMAS and cache.owner(page_url) not in (None, id(user)):
+        global_rejections += 1
+        if global_rejections >= GLOBAL_REJECTION_LIMIT:
+            use_session_tokens()
+            return True
+    cache.invalidate(page_url)
+    return True
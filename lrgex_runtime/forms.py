@@ -0,0 +1,278 @@
+"""Form Submission Test - contact, login, newsletter, search and your own forms"""
+
+import random
+import time
+
+from locust import events, task
+
+from .arrival import think_time
+from .engine import BaseUser
+from .form_schema import load_form_schema, token_rejected
+from .pools import FAKE_UNIQUE_WINDOW, DataPool, fake_emails, fake_names, fake_phones
+from .popularity import PopularityPicker
+from .scenario import setting, setting_list
+
+NAMES = DataPool(fake_names)
+EMAILS = DataPool(fake_emails, FAKE_UNIQUE_WINDOW)
+PHONES = DataPool(fake_phones)
+
+# Statuses that mean the form endpoint took the submission
+ACCEPTED_STATUSES = [200, 201, 302, 422]
+LOGIN_ACCEPTED_STATUSES = ACCEPTED_STATUSES + [401]  # Fake logins are expected to be refused
+FORM_FAILURE_LIMIT = int(setting("form_failure_limit", "3"))
+FORM_BACKOFF = float(setting("form_backoff", "30"))
+FORM_MAX_BACKOFF = float(setting("form_max_backoff", "600"))
+PROBE_LABEL = "[probe]"
+
+
+class FormEndpoints:
+    """Shared per-form resolution table - the first endpoint that accepts a submission is pinned"""
+    
+    def __init__(self):
+        self.resolved = {}  # form name -> (page url, submit url)
+        self.failures = {}  # url -> consecutive failures
+        self.strikes = {}  # url -> times blacklisted, doubles the backoff each time
+        self.blocked_until = {}  # url -> when it may be tried again
+    
+    def pinned(self, form_name):
+        return self.resolved.get(form_name)
+    
+    def pin(self, form_name, page_url, submit_url):
+        self.resolved[form_name] = (page_url, submit_url)
+        self.record_success(page_url)
+        self.record_success(submit_url)
+    
+    def unpin(self, form_name):
+        self.resolved.pop(form_name, None)
+    
+    def is_blocked(self, url):
+        return self.blocked_until.get(url, 0) > time.time()
+    
+    def record_success(self, url):
+        self.failures.pop(url, None)
+        self.strikes.pop(url, None)
+    
+    def record_failure(self, url):
+        """Count a failure - returns True once the URL gets blacklisted"""
+        count = self.failures.get(url, 0) + 1
+        if count < FORM_FAILURE_LIMIT:
+            self.failures[url] = count
+            return False
+        self.failures.pop(url, None)
+        strikes = self.strikes.get(url, 0) + 1
+        self.strikes[url] = strikes
+        self.blocked_until[url] = time.time() + min(FORM_BACKOFF * 2 ** (strikes - 1), FORM_MAX_BACKOFF)
+        return True
+
+
+FORM_ENDPOINTS = FormEndpoints()
+
+
+@events.test_stop.add_listener
+def report_probe_overhead(environment, **kwargs):
+    """Show how much form traffic went to finding endpoints rather than submitting"""
+    probes = real = 0
+    for (name, method), entry in environment.stats.entries.items():
+        if name.startswith(PROBE_LABEL):
+            probes += entry.num_requests
+        else:
+            real += entry.num_requests
+    if not probes:
+        return
+    print(f"Form endpoint probes: {probes} requests ({probes / (probes + real) * 100:.1f}% of traffic) "
+          f"- shown as '{PROBE_LABEL} <form>' rows, not in the real form rows")
+    for form_name, (page_url, submit_url) in sorted(FORM_ENDPOINTS.resolved.items()):
+        print(f"  {form_name}: {page_url} -> {submit_url}")
+
+
+class FormTestUser(BaseUser):
+    wait_time = think_time(1, 3)
+    
+    # CUSTOM FORM URLS - list yours under "custom_urls" in the scenario file, or edit these
+    CUSTOM_FORMS = {
+        # Format: "form_name": {"get_url": "page_url", "post_url": "submit_url"}
+        "contact": {"get_url": "/contact", "post_url": "/contact"},
+        "login": {"get_url": "/login", "post_url": "/login"},
+        "newsletter": {"get_url": "/newsletter", "post_url": "/newsletter"},
+        "search": {"get_url": "/search", "post_url": "/search"},
+        # Add your custom forms here:
+        # "custom_form": {"get_url": "/your-form-page", "post_url": "/submit-url"},
+        # "feedback": {"get_url": "/feedback", "post_url": "/submit-feedback"},
+        # "quote": {"get_url": "/quote", "post_url": "/process-quote"},
+    }
+    custom_form_picker = None  # Built on first use from the custom forms above
+    
+    def generate_fake_email(self):
+        """Fake email for testing - unique within the last LRGEX_FAKE_UNIQUE_WINDOW handed out"""
+        return EMAILS.next()
+    
+    def generate_fake_name(self):
+        """Fake name for testing"""
+        return NAMES.next()
+    
+    def get_form_data_for_type(self, form_type):
+        """Generate appropriate form data based on form type"""
+        base_data = {
+            "name": self.generate_fake_name(),
+            "email": self.generate_fake_email(),
+        }
+        
+        if form_type == "contact":
+            base_data.update({
+                "subject": random.choice([
+                    "Technical Support", "General Inquiry", "Bug Report",
+                    "Feature Request", "Billing Question"
+                ]),
+                "message": "This is a test message from automated load testing. Please disregard.",
+                "phone": PHONES.next()
+            })
+        elif form_type == "newsletter":
+            base_data.update({
+                "subscribe": "1"
+            })
+        elif form_type == "login":
+            # Fake but realistic credentials - the login is expected to fail
+            base_data = {
+                "username": f"testuser{random.randint(1000, 9999)}",
+                "password": "testpassword123",
+                "email": self.generate_fake_email(),
+                "login": "1"
+            }
+        elif form_type == "search":
+            base_data = {
+                "q": random.choice(["help", "support", "contact", "about", "services"]),
+                "category": random.choice(["all", "pages", "products", "help"])
+            }
+        else:
+            # Generic form data for custom forms
+            base_data.update({
+                "message": f"Test submission to {form_type} form",
+                "subject": f"Test {form_type}",
+                "comments": "This is a test submission from load testing",
+                "phone": PHONES.next(),
+                "company": "Test Company Inc.",
+                "submit": "1"
+            })
+        
+        return base_data
+    
+    def form_candidates(self, form_name, fallback_urls=None):
+        """Form pages to look at, each with the submit URLs to try on it - custom URLs first"""
+        candidates = []
+        if form_name in self.CUSTOM_FORMS:
+            custom = self.CUSTOM_FORMS[form_name]
+            candidates.append((custom["get_url"], [custom["post_url"]]))
+        for url in fallback_urls or []:
+            if form_name == "login":
+                candidates.append((url, [url]))
+            else:
+                candidates.append((url, [url, f"{url}/submit", f"/{form_name}/submit", f"/submit-{form_name}"]))
+        return candidates
+    
+    def accepted_statuses(self, form_name):
+        return LOGIN_ACCEPTED_STATUSES if form_name == "login" else ACCEPTED_STATUSES
+    
+    def post_form(self, form_name, submit_url, schema, name=None):
+        """POST fake data plus the page's hidden fields - returns the status code"""
+        form_data = dict(schema["fields"])
+        form_data.update(self.get_form_data_for_type(form_name))
+        with self.client.post(submit_url, data=form_data, headers=schema["headers"],
+                              catch_response=True, name=name) as post_response:
+            if name or post_response.status_code in self.accepted_statuses(form_name):
+                post_response.success()  # Probe misses are expected, not errors
+            return post_response.status_code
+    
+    def submit_form(self, form_name, page_url, submit_url):
+        """Submit to a known endpoint - refetch the form page once if its token was rejected"""
+        schema = load_form_schema(self, page_url)
+        if schema is None:
+            return None
+        status = self.post_form(form_name, submit_url, schema)
+        if token_rejected(self, page_url, status):
+            schema = load_form_schema(self, page_url)
+            if schema is None:
+                return None
+            status = self.post_form(form_name, submit_url, schema)
+        return status
+    
+    def try_form_submission(self, form_name, fallback_urls=None):
+        """Submit to the pinned endpoint, or probe the candidates until one accepts"""
+        accepted = self.accepted_statuses(form_name)
+        
+        pinned = FORM_ENDPOINTS.pinned(form_name)
+        if pinned:
+            page_url, submit_url = pinned
+            status = self.submit_form(form_name, page_url, submit_url)
+            if status in accepted:
+                return True
+            # Keep using it through occasional errors - drop it once it keeps failing
+            failed_url = submit_url if status is not None else page_url
+            if FORM_ENDPOINTS.record_failure(failed_url):
+                FORM_ENDPOINTS.unpin(form_name)
+            return False
+        
+        probe_name = f"{PROBE_LABEL} {form_name}"
+        for page_url, submit_urls in self.form_candidates(form_name, fallback_urls):
+            if FORM_ENDPOINTS.is_blocked(page_url):
+                continue
+            submit_urls = [url for url in submit_urls if not FORM_ENDPOINTS.is_blocked(url)]
+            if not submit_urls:
+                continue
+            schema = load_form_schema(self, page_url, name=probe_name)
+            if schema is None:
+                FORM_ENDPOINTS.record_failure(page_url)
+                continue
+            
+            # The page exists - find which submit URL takes the form
+            for submit_url in submit_urls:
+                if self.post_form(form_name, submit_url, schema, name=probe_name) in accepted:
+                    FORM_ENDPOINTS.pin(form_name, page_url, submit_url)
+                    return True
+                FORM_ENDPOINTS.record_failure(submit_url)
+            break
+        return False
+    
+    @task(3)
+    def contact_form_submission(self):
+        """Submit contact form"""
+        fallback_urls = ["/contact", "/contact-us", "/support", "/help/contact"]
+        self.try_form_submission("contact", fallback_urls)
+    
+    @task(2)
+    def newsletter_signup(self):
+        """Test newsletter/email subscription forms"""
+        fallback_urls = ["/newsletter", "/subscribe", "/signup", "/newsletter/signup"]
+        self.try_form_submission("newsletter", fallback_urls)
+    
+    @task(2)
+    def search_form_test(self):
+        """Test search forms"""
+        fallback_urls = ["/search", "/find", "/query"]
+        self.try_form_submission("search", fallback_urls)
+    
+    @task(2)
+    def custom_form_test(self):
+        """Test any custom forms you've defined"""
+        # Skip standard forms as they have dedicated tasks
+        custom_forms = [k for k in self.CUSTOM_FORMS 
+                        if k not in ["contact", "login", "newsletter", "search"]]
+        
+        if not custom_forms:
+            return  # No custom forms defined
+        
+        # Forms listed first in CUSTOM_FORMS are treated as the most popular
+        if FormTestUser.custom_form_picker is None:
+            FormTestUser.custom_form_picker = PopularityPicker(custom_forms)
+        form_name = FormTestUser.custom_form_picker.pick()
+        self.try_form_submission(form_name)
+    
+    @task(1)
+    def login_form_test(self):
+        """Test login forms (with fake data)"""
+        fallback_urls = ["/login", "/signin", "/auth", "/login.html"]
+        self.try_form_submission("login", fallback_urls)
+
+
+# Form pages listed in the wizard - each one is submitted back to itself
+for url in setting_list("custom_urls"):
+    FormTestUser.CUSTOM_FORMS[url.strip("/") or "home"] = {"get_url": url, "post_url": url}
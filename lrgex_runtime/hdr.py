@@ -0,0 +1,351 @@
+"""HDR latency histograms - exact percentiles, corrected for coordinated omission
+
+Locust keeps response times in rounded buckets, and a user stuck on a slow
+request simply stops sending, so the requests it would have made never show up
+in the tail. Every request is also recorded here in a high-dynamic-range
+histogram (3 significant digits, microseconds up to hours) with the missing
+samples put back:
+
+- With a load shape, each task has an intended start - its arrival slot. A
+  request that started late because no user was free counts the wait as
+  latency.
+- In closed-loop tests the mean think time is the expected interval, and a
+  response longer than that also records the requests the user would have sent
+  meanwhile (HdrHistogram's recordValueWithExpectedInterval).
+
+Histograms merge exactly by adding counts - workers send theirs to the master
+with every stats report. The master (or the only process) writes the
+percentiles next to the CSV reports in Locust's stats layout, a JSON copy that
+later runs can merge, and a table in the HTML report.
+"""
+
+import csv
+import html
+import json
+import math
+import time
+
+import gevent
+from locust import events
+from locust.runners import MasterRunner, WorkerRunner
+from locust.stats import PERCENTILES_TO_REPORT
+
+from . import arrival
+from .scenario import flag, setting
+
+SIGNIFICANT_DIGITS = 3
+HDR_MESSAGE_KEY = "lrgex_hdr"
+HDR_ENABLED = flag("hdr_histogram", True)
+AGGREGATED = ("", "Aggregated")
+LATE_MS = 10.0  # Smaller delays past the arrival slot are timer jitter, not a missing user
+
+
+class HdrHistogram:
+    """Log-linear histogram with a fixed relative precision - the HdrHistogram layout
+
+    Values are whole microseconds. The first 2048 values get a bucket each, then
+    every doubling of the value range gets 1024 buckets twice as wide, so a value
+    is never stored more than 0.1% off. Only used buckets are kept.
+    """
+
+    def __init__(self, significant_digits=SIGNIFICANT_DIGITS):
+        self.significant_digits = significant_digits
+        self.half_magnitude = math.ceil(math.log2(2 * 10 ** significant_digits)) - 1
+        self.half_count = 1 << self.half_magnitude
+        self.sub_bucket_mask = (self.half_count << 1) - 1
+        self.counts = {}  # Bucket index -> count
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def index(self, value):
+        bucket = (value | self.sub_bucket_mask).bit_length() - self.half_magnitude - 1
+        return ((bucket + 1) << self.half_magnitude) + (value >> bucket) - self.half_count
+
+    def bucket_range(self, index):
+        """(lowest, highest) value stored in a bucket"""
+        bucket = (index >> self.half_magnitude) - 1
+        sub_bucket = (index & (self.half_count - 1)) + self.half_count
+        if bucket < 0:
+            sub_bucket -= self.half_count
+            bucket = 0
+        lowest = sub_bucket << bucket
+        return lowest, lowest + (1 << bucket) - 1
+
+    def record(self, value, count=1):
+        value = max(0, int(value))
+        index = self.index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total += count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def record_corrected(self, value, expected_interval):
+        """Record a value plus the samples a stalled closed loop missed - returns how many were added"""
+        self.record(value)
+        added = 0
+        if expected_interval > 0:
+            missing = value - expected_interval
+            while missing >= expected_interval:
+                self.record(missing)
+                missing -= expected_interval
+                added += 1
+        return added
+
+    def percentiles(self, fractions):
+        """Value at each fraction (0-1) of the samples - the highest value its bucket stands for"""
+        if not self.total:
+            return [None for _ in fractions]
+        targets = sorted((max(1, math.ceil(fraction * self.total)), position)
+                         for position, fraction in enumerate(fractions))
+        values = [self.max] * len(fractions)
+        seen = 0
+        pending = iter(targets)
+        target, position = next(pending)
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            while seen >= target:
+                values[position] = min(self.bucket_range(index)[1], self.max)
+                try:
+                    target, position = next(pending)
+                except StopIteration:
+                    return values
+        return values
+
+    def merge(self, other):
+        if other.significant_digits != self.significant_digits:
+            raise ValueError("Can't merge HDR histograms with different precision")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def to_dict(self):
+        """Serialized form - used buckets as a flat [index, count, ...] list"""
+        counts = []
+        for index in sorted(self.counts):
+            counts += [index, self.counts[index]]
+        return {"significant_digits": self.significant_digits, "min": self.min, "max": self.max, "counts": counts}
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data["significant_digits"])
+        counts = data["counts"]
+        histogram.counts = dict(zip(counts[::2], counts[1::2]))
+        histogram.total = sum(histogram.counts.values())
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
+
+
+class EndpointLatency:
+    """Corrected histogram for one request name, with its real request counts and times"""
+
+    def __init__(self):
+        self.histogram = HdrHistogram()
+        # Response times as measured, one sample per request - significance tests need
+        # independent samples, and the corrected ones are derived from their neighbours
+        self.uncorrected = HdrHistogram()
+        self.requests = 0
+        self.failures = 0
+        self.corrected = 0  # Samples added for coordinated omission
+        self.response_time_sum = 0.0  # Real response times, milliseconds
+        self.min = None
+        self.max = 0.0
+
+    def record(self, response_time, failed, late, expected_interval):
+        self.requests += 1
+        self.failures += int(failed)
+        self.response_time_sum += response_time
+        self.min = response_time if self.min is None else min(self.min, response_time)
+        self.max = max(self.max, response_time)
+        self.uncorrected.record(round(response_time * 1000))
+        value = round((response_time + late) * 1000)
+        if late:
+            self.corrected += 1
+        self.corrected += self.histogram.record_corrected(value, expected_interval)
+
+    def merge(self, other):
+        self.histogram.merge(other.histogram)
+        self.uncorrected.merge(other.uncorrected)
+        self.requests += other.requests
+        self.failures += other.failures
+        self.corrected += other.corrected
+        self.response_time_sum += other.response_time_sum
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def to_dict(self):
+        return {"histogram": self.histogram.to_dict(), "uncorrected": self.uncorrected.to_dict(),
+                "requests": self.requests, "failures": self.failures,
+                "corrected": self.corrected, "response_time_sum": self.response_time_sum,
+                "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data):
+        latency = cls()
+        latency.histogram = HdrHistogram.from_dict(data["histogram"])
+        latency.uncorrected = HdrHistogram.from_dict(data["uncorrected"])
+        for name in ("requests", "failures", "corrected", "response_time_sum", "min", "max"):
+            setattr(latency, name, data[name])
+        return latency
+
+
+class LatencyRecorder:
+    """Every request name's histogram plus the aggregate - what one process saw"""
+
+    def __init__(self):
+        self.endpoints = {}  # (method, name) -> EndpointLatency, AGGREGATED for the total
+        self.expected_interval = 0  # Microseconds between a closed-loop user's requests, 0 = no correction
+
+    def record(self, method, name, response_time, failed, late=0.0):
+        for key in ((method, name), AGGREGATED):
+            latency = self.endpoints.get(key)
+            if latency is None:
+                latency = self.endpoints[key] = EndpointLatency()
+            latency.record(response_time, failed, late, self.expected_interval)
+
+    def merge(self, data):
+        """Add a serialized recorder (from a worker or a saved run) - exact, no resampling"""
+        for method, name, endpoint in data["endpoints"]:
+            latency = EndpointLatency.from_dict(endpoint)
+            if (method, name) in self.endpoints:
+                self.endpoints[method, name].merge(latency)
+            else:
+                self.endpoints[method, name] = latency
+
+    def serialize(self):
+        return {"version": 1, "unit": "us",
+                "endpoints": [[method, name, latency.to_dict()] for (method, name), latency in self.endpoints.items()]}
+
+    def reset(self):
+        self.endpoints = {}
+
+    def rows(self):
+        """Locust stats CSV rows - request names sorted, the aggregate last"""
+        keys = sorted(key for key in self.endpoints if key != AGGREGATED)
+        if AGGREGATED in self.endpoints:
+            keys.append(AGGREGATED)
+        for key in keys:
+            latency = self.endpoints[key]
+            percentiles = latency.histogram.percentiles(PERCENTILES_TO_REPORT)
+            average = latency.response_time_sum / latency.requests if latency.requests else 0.0
+            yield [*key, latency.requests, latency.failures, round(average, 2), round(latency.min or 0, 2),
+                   round(latency.max, 2)] + [
+                "N/A" if value is None else round(value / 1000, 1) for value in percentiles
+            ] + [latency.corrected]
+
+
+RECORDER = LatencyRecorder()
+_environment = None  # For the quit event, which doesn't pass it
+
+
+def correction():
+    """How this run's histograms were corrected for coordinated omission - saved with them for the analysis"""
+    if arrival.LOAD_SHAPE:
+        return {"method": "arrival-slot",
+                "description": "counted from each task's arrival slot - waits for a free user are included"}
+    if RECORDER.expected_interval:
+        interval = RECORDER.expected_interval / 1000
+        return {"method": "expected-interval", "expected_interval_ms": interval,
+                "description": f"backfilled for an expected interval of {interval:g}ms between requests"}
+    return {"method": "none",
+            "description": "not corrected for coordinated omission - the test has no think time or load shape"}
+
+
+def percentile_header(fraction):
+    """Locust's column names - 0.5 -> 50%, 0.999 -> 99.9%"""
+    return f"{fraction * 100:g}%"
+
+
+def record_request(request_type, name, response_time, exception=None, start_time=None, **kwargs):
+    late = 0.0
+    intended = arrival.INTENDED_START.pop(gevent.getcurrent(), None)
+    if intended is not None and start_time is not None:
+        # Only the task's first request was due at the slot - the wait for a free user is latency too
+        late = (start_time - intended) * 1000
+        if late < LATE_MS:
+            late = 0.0
+    RECORDER.record(request_type, name, response_time or 0, exception is not None, late)
+
+
+def send_histograms(client_id, data):
+    """Workers send what they recorded since the last report and start over"""
+    data[HDR_MESSAGE_KEY] = RECORDER.serialize()
+    RECORDER.reset()
+
+
+def receive_histograms(client_id, data):
+    if HDR_MESSAGE_KEY in data:
+        RECORDER.merge(data[HDR_MESSAGE_KEY])
+
+
+@events.init.add_listener
+def setup_recorder(environment, **kwargs):
+    """Record on every process that runs users, merge on the master"""
+    global _environment
+    if not HDR_ENABLED or environment.runner is None:
+        return
+    _environment = environment
+    if not arrival.LOAD_SHAPE:
+        interval = setting("co_expected_interval_ms", None)
+        if interval is None and arrival.THINK_TIME:
+            interval = sum(arrival.THINK_TIME) / 2 * 1000  # Mean of the between() think time
+        RECORDER.expected_interval = round(float(interval or 0) * 1000)
+    if isinstance(environment.runner, MasterRunner):
+        environment.events.worker_report.add_listener(receive_histograms)
+        return
+    environment.events.request.add_listener(record_request)
+    if isinstance(environment.runner, WorkerRunner):
+        environment.events.report_to_master.add_listener(send_histograms)
+
+
+@events.quitting.add_listener
+def write_histograms(environment, **kwargs):
+    """Save the corrected percentiles and the mergeable histograms - after the last worker report"""
+    csv_prefix = getattr(environment.parsed_options, "csv_prefix", None)
+    if not csv_prefix or not RECORDER.endpoints or isinstance(environment.runner, WorkerRunner):
+        return
+    with open(f"{csv_prefix}_hdr_percentiles.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Type", "Name", "Request Count", "Failure Count", "Average Response Time",
+                         "Min Response Time", "Max Response Time"]
+                        + [percentile_header(fraction) for fraction in PERCENTILES_TO_REPORT] + ["Corrected Samples"])
+        writer.writerows(RECORDER.rows())
+    with open(f"{csv_prefix}_hdr.json", "w", encoding="utf-8") as f:
+        json.dump({"saved": time.time(), "correction": correction(), **RECORDER.serialize()}, f)
+
+
+@events.quit.add_listener
+def add_html_table(exit_code, **kwargs):
+    """Add the corrected percentiles to the HTML report - Locust has written it by now"""
+    html_file = getattr(getattr(_environment, "parsed_options", None), "html_file", None)
+    if not html_file or not RECORDER.endpoints:
+        return
+    try:
+        with open(html_file, "r", encoding="utf-8") as f:
+            report = f.read()
+    except OSError:
+        return
+    headers = [percentile_header(fraction) for fraction in PERCENTILES_TO_REPORT]
+    rows = []
+    for row in RECORDER.rows():
+        cells = [row[0], row[1], f"{row[2]:,}"] + [str(value) for value in row[7:-1]] + [f"{row[-1]:,}"]
+        rows.append("<tr>" + "".join(f"<td>{html.escape(str(cell))}</td>" for cell in cells) + "</tr>")
+    table = (
+        '<div style="margin: 2em; font-family: sans-serif">'
+        f"<h2>Response time percentiles (HDR histogram, ms)</h2><p>{html.escape(correction()['description'])}</p>"
+        '<table border="1" cellpadding="4" style="border-collapse: collapse">'
+        "<tr>" + "".join(f"<th>{html.escape(name)}</th>" for name in
+                         ["Type", "Name", "Requests", *headers, "Corrected Samples"]) + "</tr>"
+        + "".join(rows) + "</table></div>"
+    )
+    if "</body>" in report:
+        report = report.replace("</body>", table + "</body>", 1)
+    else:
+        report += table
+    with open(html_file, "w", encoding="utf-8") as f:
+        f.write(report)
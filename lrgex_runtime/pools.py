@@ -0,0 +1,112 @@
+"""Fake data pools - values generated in batches ahead of time and handed out by index"""
+
+import random
+import string
+from collections import deque
+
+import gevent
+
+from .scenario import WORKER_COUNT, WORKER_INDEX, setting
+
+FAKE_POOL_SIZE = max(100, int(setting("fake_pool_size", "10000")))
+FAKE_UNIQUE_WINDOW = max(0, int(setting("fake_unique_window", "100000")))
+FAKE_CHUNK_SIZE = 1000  # Values generated between yields to the running users
+FAKE_FIRST_NAMES = ["John", "Jane", "Mike", "Sarah", "David", "Lisa", "Chris", "Emma"]
+FAKE_LAST_NAMES = ["Smith", "Johnson", "Brown", "Davis", "Wilson", "Moore", "Taylor", "Anderson"]
+FAKE_DOMAINS = ["example.com", "test.com", "fake.org", "demo.net"]
+
+
+class UniqueWindow:
+    """Remembers the last few values so none of them is handed out twice"""
+    
+    def __init__(self, size):
+        self.size = size
+        self.recent = deque()
+        self.seen = set()
+    
+    def admit(self, value):
+        if value in self.seen:
+            return False
+        self.recent.append(value)
+        self.seen.add(value)
+        if len(self.recent) > self.size:
+            self.seen.discard(self.recent.popleft())
+        return True
+
+
+class DataPool:
+    """Pre-generated values - the next batch is built in the background once half is used"""
+    
+    def __init__(self, make_values, unique_window=0, size=FAKE_POOL_SIZE):
+        self.make_values = make_values  # count -> list of fresh values
+        self.window = UniqueWindow(unique_window) if unique_window else None
+        self.size = size
+        self.values = self.generate()
+        self.index = 0
+        self.next_values = None
+        self.refiller = None  # Greenlet building next_values
+    
+    def generate(self):
+        values = []
+        while len(values) < self.size:
+            for value in self.make_values(min(FAKE_CHUNK_SIZE, self.size - len(values))):
+                if self.window is None or self.window.admit(value):
+                    values.append(value)
+            gevent.sleep(0)
+        return values
+    
+    def refill(self):
+        self.next_values = self.generate()
+        self.refiller = None
+    
+    def next(self):
+        if self.index >= len(self.values):
+            if self.refiller is not None:
+                self.refiller.join()  # Background refill fell behind - wait rather than race it
+            if self.next_values is None:
+                self.next_values = self.generate()
+            self.values, self.next_values, self.index = self.next_values, None, 0
+        value = self.values[self.index]
+        self.index += 1
+        if self.next_values is None and self.refiller is None and self.index * 2 >= len(self.values):
+            self.refiller = gevent.spawn(self.refill)
+        return value
+
+
+def fake_names(count):
+    return [f"{first} {last}" for first, last in
+            zip(random.choices(FAKE_FIRST_NAMES, k=count), random.choices(FAKE_LAST_NAMES, k=count))]
+
+
+def fake_emails(count):
+    letters = random.choices(string.ascii_lowercase, k=count * 8)
+    domains = random.choices(FAKE_DOMAINS, k=count)
+    return [f"{''.join(letters[i * 8:i * 8 + 8])}@{domains[i]}" for i in range(count)]
+
+
+def fake_phones(count):
+    return [f"555-{middle}-{last}" for middle, last in
+            zip(random.choices(range(100, 1000), k=count), random.choices(range(1000, 10000), k=count))]
+
+
+def worker_range(low, high):
+    """This worker's share of [low, high] - workers never hand out the same ID"""
+    size = high - low + 1
+    if size < WORKER_COUNT:
+        return low, high
+    return low + size * WORKER_INDEX // WORKER_COUNT, low + size * (WORKER_INDEX + 1) // WORKER_COUNT - 1
+
+
+def fake_ids(low, high, prefix=""):
+    """Generator of IDs in [low, high] - pair with a unique window below half the range"""
+    low, high = worker_range(low, high)
+    
+    def make_values(count):
+        return [f"{prefix}{number}" for number in random.choices(range(low, high + 1), k=count)]
+    return make_values
+
+
+def id_window(low, high):
+    """Largest uniqueness window an ID range can keep without stalling generation"""
+    low, high = worker_range(low, high)
+    return min(FAKE_UNIQUE_WINDOW, (high - low + 1) // 2)
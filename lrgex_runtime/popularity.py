@@ -0,0 +1,130 @@
+"""Popularity model - how skewed the picks of IDs and pages are"""
+
+import csv
+import random
+
+from locust import events
+
+from .scenario import setting
+
+POPULARITY = str(setting("popularity", "uniform")).lower()  # uniform, zipf, hotset or empirical
+ZIPF_EXPONENT = float(setting("zipf_exponent", "1.0"))
+HOT_FRACTION = float(setting("hot_fraction", "0.2"))  # Share of items that are hot
+HOT_TRAFFIC = float(setting("hot_traffic", "0.8"))  # Share of picks that go to hot items
+POPULARITY_FILE = setting("popularity_file", "")  # CSV of "item,weight" rows
+_empirical_weights = None
+
+
+class WeightedSampler:
+    """Weighted random items in O(1) per draw (Walker's alias method)
+    
+    A sampler never changes after it is built, so users draw from a shared
+    snapshot without taking a lock - build a new one when the items change.
+    """
+    
+    def __init__(self, weights):
+        self.items = [item for item, weight in weights.items() if weight > 0]
+        count = len(self.items)
+        self._probability = [1.0] * count
+        self._alias = list(range(count))
+        if not count:
+            return
+        total = float(sum(weights[item] for item in self.items))
+        scaled = [weights[item] * count / total for item in self.items]
+        small = [index for index, value in enumerate(scaled) if value < 1.0]
+        large = [index for index, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            short, tall = small.pop(), large.pop()
+            self._probability[short] = scaled[short]
+            self._alias[short] = tall
+            scaled[tall] -= 1.0 - scaled[short]
+            (small if scaled[tall] < 1.0 else large).append(tall)
+        # Whatever is left over is within rounding error of 1.0 and keeps probability 1
+    
+    def __len__(self):
+        return len(self.items)
+    
+    def choice(self):
+        index = random.randrange(len(self.items))
+        if random.random() < self._probability[index]:
+            return self.items[index]
+        return self.items[self._alias[index]]
+
+
+def describe_popularity():
+    """One-line description of the traffic distribution for logs and reports"""
+    if POPULARITY == "zipf":
+        return f"Zipf (exponent {ZIPF_EXPONENT:g})"
+    if POPULARITY == "hotset":
+        return f"Hot/cold ({HOT_TRAFFIC:.0%} of traffic to {HOT_FRACTION:.0%} of items)"
+    if POPULARITY == "empirical":
+        return f"Empirical (from {POPULARITY_FILE or 'no file'})"
+    return "Uniform"
+
+
+def load_empirical_weights():
+    """Item -> weight table from the popularity file, read once per process"""
+    global _empirical_weights
+    if _empirical_weights is None:
+        _empirical_weights = {}
+        try:
+            with open(POPULARITY_FILE, "r", newline="", encoding="utf-8") as f:
+                for row in csv.reader(f):
+                    if not row or row[0].startswith("#"):
+                        continue
+                    try:
+                        _empirical_weights[row[0].strip()] = float(row[1])
+                    except (IndexError, ValueError):
+                        continue  # Header or malformed row
+        except OSError as e:
+            print(f"Could not read popularity file {POPULARITY_FILE}: {e} - using uniform traffic")
+    return _empirical_weights
+
+
+def popularity_weights(items):
+    """Weight per item under the chosen model - items are ranked most popular first"""
+    count = len(items)
+    if POPULARITY == "zipf":
+        return {item: 1.0 / rank ** ZIPF_EXPONENT for rank, item in enumerate(items, 1)}
+    if POPULARITY == "hotset":
+        hot = min(count, max(1, round(count * HOT_FRACTION)))
+        if hot < count:
+            hot_weight = HOT_TRAFFIC / hot
+            cold_weight = (1.0 - HOT_TRAFFIC) / (count - hot)
+            return {item: hot_weight if rank < hot else cold_weight for rank, item in enumerate(items)}
+    if POPULARITY == "empirical":
+        table = load_empirical_weights()
+        weights = {item: table.get(str(item), 0.0) for item in items}
+        if any(weight > 0 for weight in weights.values()):
+            return weights
+    return {item: 1.0 for item in items}
+
+
+class PopularityPicker:
+    """Picks from a fixed list of IDs or pages under the popularity model"""
+    
+    def __init__(self, items):
+        self.sampler = WeightedSampler(popularity_weights(list(items)))
+    
+    def pick(self):
+        return self.sampler.choice()
+
+
+@events.test_start.add_listener
+def _announce_popularity(environment, **kwargs):
+    print(f"Traffic distribution: {describe_popularity()}")
+
+
+# Path sampler - weighted snapshot of the testable pages, rebuilt only when they change
+PATH_WEIGHTS = str(setting("path_weights", "inlinks")).lower()  # "inlinks" or "uniform"
+
+
+def path_weights(paths, site_graph=None):
+    """Weight per path - pages that more of the site links to are visited more often"""
+    inlinks = site_graph.inlink_counts() if site_graph is not None else {}
+    if POPULARITY != "uniform":
+        # The most linked-to pages rank as the most popular
+        return popularity_weights(sorted(paths, key=lambda path: (-inlinks.get(path, 0), path)))
+    if PATH_WEIGHTS == "uniform" or site_graph is None:
+        return {path: 1 for path in paths}
+    return {path: 1 + inlinks.get(path, 0) for path in paths}
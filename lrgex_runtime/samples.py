@@ -0,0 +1,265 @@
+"""Raw request samples - every request's timing written to a compact columnar file
+
+Locust's CSV reports and the HDR histograms only keep aggregates. With
+raw_samples on, each process that runs users also keeps one row per request -
+start time, endpoint, status code, failed, response time, response size and
+worker - for offline analysis.
+
+Rows go into preallocated array-backed columns. When a chunk is full its
+buffers are handed to a native writer thread (gevent's thread pool, so the
+users' greenlets keep running) that compresses each column on its own and
+appends it to {csv_prefix}_samples.lrs (_samples_w<N>.lrs for workers). The
+request listener only stores seven numbers - nothing is formatted or written
+on the greenlet that sent the request. benchmarks/sample_sink_overhead.py
+measures what it costs per request.
+
+File layout (little-endian): b"LRGS", a JSON header with the columns, then
+one b"CHNK" block per chunk (row count and one length-prefixed, compressed
+block per column) and a closing b"NAME" block with the endpoint table.
+load_samples() reads one or more files back as NumPy arrays (NumPy is only
+needed there, not while the test runs).
+"""
+
+import glob
+import json
+import lzma
+import os
+import socket
+import struct
+import sys
+import time
+import zlib
+from array import array
+from collections import deque
+
+from gevent.threadpool import ThreadPool
+from locust import events
+from locust.runners import MasterRunner, WorkerRunner
+
+from .scenario import WORKER_INDEX, flag, setting
+
+MAGIC = b"LRGS"
+VERSION = 1
+CHUNK = b"CHNK"
+NAMES = b"NAME"
+# (column, array typecode, NumPy dtype) - the typecodes have these sizes on every supported platform
+COLUMNS = (
+    ("timestamp_us", "q", "<i8"),  # Request start, microseconds since the epoch
+    ("name_id", "I", "<u4"),  # Index into the endpoint table
+    ("status", "H", "<u2"),  # HTTP status code - 0 when no response came back
+    ("failed", "B", "u1"),
+    ("latency_ms", "f", "<f4"),
+    ("bytes", "I", "<u4"),
+    ("worker", "H", "<u2"),
+)
+COMPRESSORS = {
+    "none": bytes,
+    "zlib": lambda data: zlib.compress(data, 1),  # Fastest level - the columns compress well anyway
+    "lzma": lambda data: lzma.compress(data, preset=1),
+}
+DECOMPRESSORS = {"none": bytes, "zlib": zlib.decompress, "lzma": lzma.decompress}
+
+RAW_SAMPLES = flag("raw_samples", False)
+COMPRESSION = str(setting("raw_samples_compression", "zlib")).lower()
+CHUNK_ROWS = int(setting("raw_samples_chunk", 65536))
+
+
+class SampleSink:
+    """Column buffers for this process's requests and the thread that writes them out"""
+
+    def __init__(self, path, compression=COMPRESSION, chunk_rows=CHUNK_ROWS, worker=WORKER_INDEX):
+        if compression not in COMPRESSORS:
+            raise ValueError(f"Unknown raw_samples_compression {compression!r} - use none, zlib or lzma")
+        self.path = path
+        self.compression = compression
+        self.compress = COMPRESSORS[compression]
+        self.chunk_rows = chunk_rows
+        self.worker = worker
+        self.names = []  # [method, name] per endpoint id
+        self.name_ids = {}
+        self.columns = self.new_columns()
+        self.rows = 0  # Rows used in the current chunk
+        self.total = 0
+        self.free = deque()  # Written chunks come back here to be reused
+        self.error = None  # First write error - the writer stops after it
+        self.pool = ThreadPool(1)  # One thread keeps the chunks in order
+        self.file = open(path, "wb")
+        header = json.dumps({
+            "version": VERSION,
+            "columns": [[column, dtype] for column, _typecode, dtype in COLUMNS],
+            "compression": compression,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "created": time.time(),
+        }).encode()
+        self.file.write(MAGIC + struct.pack("<I", len(header)) + header)
+
+    def new_columns(self):
+        return [array(typecode, bytes(array(typecode).itemsize * self.chunk_rows)) for _c, typecode, _d in COLUMNS]
+
+    def record(self, request_type, name, response_time, response_length=0, response=None,
+               exception=None, start_time=None, **kwargs):
+        key = (request_type, name)
+        name_id = self.name_ids.get(key)
+        if name_id is None:
+            name_id = self.name_ids[key] = len(self.names)
+            self.names.append([request_type, name])
+        row = self.rows
+        timestamp, name_ids, status, failed, latency, size, worker = self.columns
+        timestamp[row] = int((start_time or time.time()) * 1_000_000)
+        name_ids[row] = name_id
+        status[row] = (getattr(response, "status_code", 0) or 0) if response is not None else 0
+        failed[row] = exception is not None
+        latency[row] = response_time or 0
+        size[row] = response_length or 0
+        worker[row] = self.worker
+        self.rows = row + 1
+        if self.rows == self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        """Hand the filled part of the buffers to the writer thread and carry on with a fresh set"""
+        if not self.rows:
+            return
+        self.pool.spawn(self.write_chunk, self.columns, self.rows)
+        self.total += self.rows
+        self.columns = self.free.popleft() if self.free else self.new_columns()
+        self.rows = 0
+
+    def write_chunk(self, columns, rows):
+        """Runs on the writer thread - compress each column and append the chunk"""
+        if self.error:
+            return
+        try:
+            parts = [CHUNK, struct.pack("<I", rows)]
+            for column in columns:
+                data = column[:rows]
+                if sys.byteorder == "big":
+                    data.byteswap()
+                block = self.compress(data)
+                parts += [struct.pack("<I", len(block)), block]
+            self.file.write(b"".join(parts))
+        except Exception as error:  # Reported by close() - the test itself goes on
+            self.error = error
+        self.free.append(columns)
+
+    def close(self):
+        """Write the last rows and the endpoint table - waits for the writer thread"""
+        self.flush()
+        self.pool.join()
+        self.pool.kill()
+        names = json.dumps(self.names).encode()
+        self.file.write(NAMES + struct.pack("<I", len(names)) + names)
+        self.file.close()
+        return self.error
+
+
+SINK = None
+
+
+def samples_path(environment):
+    """{csv_prefix}_samples.lrs - workers add their index so local processes don't share a file"""
+    csv_prefix = (getattr(environment.parsed_options, "csv_prefix", None)
+                  or setting("csv_prefix", None) or "reports/benchmark_results")
+    if isinstance(environment.runner, WorkerRunner):
+        return f"{csv_prefix}_samples_w{WORKER_INDEX}.lrs"
+    return f"{csv_prefix}_samples.lrs"
+
+
+@events.init.add_listener
+def setup_sink(environment, **kwargs):
+    """Every process that runs users writes its own file - the master sends no requests"""
+    global SINK
+    if not RAW_SAMPLES or environment.runner is None or isinstance(environment.runner, MasterRunner):
+        return
+    path = samples_path(environment)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    SINK = SampleSink(path)
+    environment.events.request.add_listener(SINK.record)
+
+
+@events.test_start.add_listener
+def set_worker(environment, **kwargs):
+    """Remote workers all have index 0 locally - the master's numbering tells them apart"""
+    if SINK is not None and getattr(environment.runner, "worker_index", -1) >= 0:
+        SINK.worker = environment.runner.worker_index
+
+
+@events.quitting.add_listener
+def close_sink(environment, **kwargs):
+    if SINK is None or SINK.file.closed:
+        return
+    error = SINK.close()
+    if error:
+        print(f"Raw samples: writing {SINK.path} failed - {error}")
+        return
+    size = os.path.getsize(SINK.path)
+    print(f"Raw samples: {SINK.total:,} requests saved to {SINK.path} "
+          f"({size / 1024 / 1024:.1f} MB, {size / max(SINK.total, 1):.1f} bytes/request, {SINK.compression})")
+
+
+def read_sample_file(path):
+    """(header, endpoint table, {column: [raw little-endian bytes per chunk]}) of one samples file"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:4] != MAGIC:
+        raise ValueError(f"{path} is not a raw samples file")
+    length = struct.unpack_from("<I", data, 4)[0]
+    header = json.loads(data[8:8 + length])
+    decompress = DECOMPRESSORS[header["compression"]]
+    columns = {column: [] for column, _dtype in header["columns"]}
+    names = None
+    offset = 8 + length
+    while offset + 8 <= len(data):
+        tag = data[offset:offset + 4]
+        if tag == NAMES:
+            length = struct.unpack_from("<I", data, offset + 4)[0]
+            names = json.loads(data[offset + 8:offset + 8 + length])
+            break
+        if tag != CHUNK:
+            raise ValueError(f"{path} is damaged at byte {offset}")
+        offset += 8  # The row count follows from the column sizes
+        for column in columns:
+            length = struct.unpack_from("<I", data, offset)[0]
+            columns[column].append(decompress(data[offset + 4:offset + 4 + length]))
+            offset += 4 + length
+    if names is None:
+        raise ValueError(f"{path} has no endpoint table - the process that wrote it did not finish")
+    return header, names, columns
+
+
+def load_samples(paths):
+    """Raw samples as NumPy arrays - one column per field, rows of every file concatenated
+
+    paths is a samples file, a list of them, or a CSV prefix (reports/benchmark_results)
+    whose _samples*.lrs files are all read. Besides the stored columns the result has
+    "timestamp" (epoch seconds, float64) and "method"/"name" string arrays.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("Loading raw samples needs NumPy - install it with: uv add numpy") from None
+
+    if isinstance(paths, str):
+        paths = [paths] if os.path.isfile(paths) else sorted(glob.glob(f"{paths}_samples*.lrs"))
+    if not paths:
+        raise FileNotFoundError("No raw samples files found")
+    endpoints = {}  # (method, name) -> id across all files
+    parts = {}
+    for path in paths:
+        header, names, columns = read_sample_file(path)
+        for column, dtype in header["columns"]:
+            array_ = np.frombuffer(b"".join(columns[column]), dtype=dtype)
+            if column == "name_id":
+                # Each file numbers its endpoints in the order it saw them
+                remap = np.array([endpoints.setdefault(tuple(name), len(endpoints)) for name in names],
+                                 dtype=np.uint32)
+                array_ = remap[array_] if len(remap) else array_
+            parts.setdefault(column, []).append(array_)
+    result = {column: np.concatenate(arrays) for column, arrays in parts.items()}
+    table = list(endpoints)
+    result["failed"] = result["failed"].astype(bool)
+    result["timestamp"] = result["timestamp_us"] / 1_000_000
+    result["method"] = np.array([method for method, _name in table] or [""])[result["name_id"]]
+    result["name"] = np.array([name for _method, name in table] or [""])[result["name_id"]]
+    return result
@@ -0,0 +1,47 @@
+"""Scenario file - the settings the wizard chose for this test"""
+
+import json
+import os
+import tomllib
+
+
+def load_scenario(path=None):
+    """Read a JSON or TOML scenario - no file means every setting uses its default"""
+    path = path or os.environ.get("LRGEX_SCENARIO", "")
+    if not path:
+        return {}
+    if path.lower().endswith(".toml"):
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+SCENARIO = load_scenario()
+
+
+def setting(name, default=None):
+    """A scenario setting - the matching LRGEX_<NAME> environment variable wins if set"""
+    env_name = f"LRGEX_{name.upper()}"
+    if env_name in os.environ:
+        return os.environ[env_name]
+    return SCENARIO.get(name, default)
+
+
+# Which local worker process this is - the launcher sets these for multi-core runs
+WORKER_INDEX = int(setting("worker_index", "0"))
+WORKER_COUNT = max(1, int(setting("worker_count", "1")))
+
+
+def flag(name, default=True):
+    """An on/off setting - accepts 0/1, true/false, yes/no and on/off"""
+    value = setting(name, default)
+    return str(value).strip().lower() not in ("0", "false", "no", "off", "")
+
+
+def setting_list(name):
+    """A list setting - the environment variable form is comma separated"""
+    value = setting(name, [])
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(item).strip() for item in value if str(item).strip()]
@@ -0,0 +1,325 @@
+"""Smart Website Test - discovers what exists on the site, then tests only real pages"""
+
+import threading
+import time
+
+import gevent
+from gevent.event import Event
+from gevent.pool import Pool
+from locust import events, task
+
+from .arrival import think_time
+from .crawler import CRAWL_TIMEOUT, SiteGraph, crawl_site
+from .discovery import (
+    discovery_session,
+    homepage_validators,
+    load_shared_discovery_cache,
+    revalidate_discovery_cache,
+    runs_users,
+    save_discovery_cache,
+)
+from .engine import BaseUser
+from .popularity import WeightedSampler, path_weights
+from .scenario import setting
+
+# Discovery tuning - override in the scenario or with LRGEX_PROBE_* environment variables
+PROBE_CONCURRENCY = max(1, int(setting("probe_concurrency", "10")))
+PROBE_TIMEOUT = float(setting("probe_timeout", "5"))
+PROBE_METHOD = str(setting("probe_method", "head")).lower()  # "head" or "get"
+PROBE_MAX_BYTES = max(0, int(setting("probe_max_bytes", "4096")))
+
+# Global discovery state - shared across ALL users
+_discovery_lock = threading.Lock()
+_discovery_started = False
+_discovery_done = False
+_first_batch_ready = Event()  # Set once the first batch of pages has answered
+_answered = 0
+_working_paths = set()
+_protected_paths = set()  # Pages that exist but require auth (401/403)
+_path_statuses = {}  # Status code seen for every crawled or probed path
+_site_graph = SiteGraph()
+_sampler = WeightedSampler({"/": 1})  # Snapshot users draw from - replaced, never mutated
+_sampler_stale = False  # Paths were found since the snapshot - it is rebuilt on the next pick
+
+# Comprehensive path discovery - including more admin variations
+CANDIDATE_PATHS = [
+    # Standard pages
+    "/about", "/about.html", "/about.php", "/about-us",
+    "/contact", "/contact.html", "/contact.php", "/contact-us",
+    "/services", "/products", "/shop", "/store",
+    "/help", "/support", "/blog", "/news", "/faq", 
+    "/login", "/signin", "/api", "/search",
+    
+    # Admin and management pages - comprehensive list
+    "/admin", "/admin.html", "/admin.php", "/admin/", 
+    "/administrator", "/administration", "/administrator.html",
+    "/dashboard", "/dashboard.html", "/dashboard.php",
+    "/panel", "/control", "/manage", "/manager",
+    "/wp-admin", "/wp-admin/", "/wp-login.php",
+    "/phpmyadmin", "/phpmyadmin/", "/pma",
+    "/cpanel", "/webmail", "/plesk",
+    "/admin-console", "/admin-panel", "/admin-login",
+    "/backend", "/management", "/console",
+    
+    # Security and system pages
+    "/login.html", "/login.php", "/signin.html",
+    "/auth", "/authentication", "/secure",
+    "/user", "/profile", "/account", "/settings",
+    
+    # Common additional pages
+    "/docs", "/documentation", "/privacy", "/terms",
+    "/sitemap", "/sitemap.xml", "/robots.txt",
+    "/test", "/demo", "/example", "/sample"
+]
+
+
+def rebuild_sampler():
+    """Publish a new sampler snapshot - call with _discovery_lock held"""
+    global _sampler, _sampler_stale
+    # Include protected pages in testing (they exist, just require auth)
+    _sampler = WeightedSampler(path_weights(_working_paths | _protected_paths, _site_graph))
+    _sampler_stale = False
+
+
+def current_sampler():
+    """The sampler snapshot, rebuilt first if discovery found paths since the last pick
+
+    Rebuilding costs a pass over every path, so doing it for each path found
+    made discovery quadratic - now it happens at most once per pick, after a change.
+    """
+    if _sampler_stale:
+        with _discovery_lock:
+            if _sampler_stale:
+                rebuild_sampler()
+    return _sampler
+
+
+def record_path(path, status):
+    """Sort a path into the working/protected sets - returns a report line or None"""
+    global _sampler_stale
+    with _discovery_lock:
+        _path_statuses[path] = status
+        if path == "/":
+            _working_paths.add(path)
+            return None  # Homepage is always reported separately
+        if status == 200:
+            result = f"Found: {path} (accessible)"
+            _working_paths.add(path)
+        elif status in [301, 302]:
+            result = f"Found: {path} (redirects)"
+            _working_paths.add(path)
+        elif status in [401, 403]:
+            result = f"Found: {path} (protected)"
+            _protected_paths.add(path)
+        else:
+            # Skip showing 404s and errors - nobody cares what doesn't exist!
+            return None
+        if path not in _sampler.items:
+            _sampler_stale = True
+        return result
+
+
+def note_answered():
+    """Release waiting users once the first batch of pages has answered"""
+    global _answered
+    _answered += 1
+    if _answered == PROBE_CONCURRENCY and not _first_batch_ready.is_set():
+        print(f"First {_answered} pages answered - users start testing while discovery continues")
+        _first_batch_ready.set()
+
+
+def probe_status(client, path):
+    """Status code for a path - HEAD first, bounded streamed GET only if the server rejects HEAD"""
+    if PROBE_METHOD == "head":
+        with client.head(path, catch_response=True, name="discovery", timeout=PROBE_TIMEOUT, allow_redirects=True) as response:
+            status = response.status_code
+            response.success()  # Always mark discovery as success
+        if status not in [405, 501]:
+            return status
+    
+    # Only the status matters - stop reading the body after PROBE_MAX_BYTES
+    with client.get(path, catch_response=True, name="discovery", timeout=PROBE_TIMEOUT, stream=True) as response:
+        status = response.status_code
+        if PROBE_MAX_BYTES:
+            received = 0
+            for chunk in response.iter_content(chunk_size=min(PROBE_MAX_BYTES, 8192)):
+                received += len(chunk)
+                if received >= PROBE_MAX_BYTES:
+                    break
+        response.close()
+        response.success()
+    return status
+
+
+def probe_path(client, path):
+    """Probe a single path and record it if it exists - returns a report line or None"""
+    try:
+        # Silent test - don't count as requests in report
+        status = probe_status(client, path)
+    except Exception:
+        return None  # Silently ignore errors and timeouts during discovery
+    finally:
+        note_answered()
+    return record_path(path, status)
+
+
+def print_discovery_results(found_pages):
+    """Show only what we actually found"""
+    if found_pages:
+        for page in found_pages:
+            print(page)
+    else:
+        print("Only homepage found - simple website detected")
+    
+    print("=" * 50)
+    with _discovery_lock:
+        total_found = len(_working_paths) + len(_protected_paths)
+        # Include protected pages in testing (they exist, just require auth)
+        all_testable = _working_paths.union(_protected_paths)
+    if total_found > 1:
+        print(f"Discovery Results: Found {total_found} testable pages on this website")
+    else:
+        print("Discovery Results: Simple website - focusing on homepage performance")
+    print("=" * 50)
+    
+    if len(all_testable) == 1:
+        print("Simple website detected - focusing on homepage performance")
+    else:
+        print(f"Will test {len(all_testable)} pages that exist on this website")
+
+
+def run_discovery(client):
+    """Crawl the site, then probe the candidate paths the crawl missed - users start after the first batch"""
+    global _discovery_done, _site_graph
+    
+    print("Discovering what exists on this website...")
+    print("=" * 50)
+    
+    # Always test homepage first
+    with _discovery_lock:
+        _working_paths.add("/")
+    print("Found: / (homepage)")
+    
+    # Reuse the last run's results when the homepage hasn't changed
+    host = client.base_url
+    cached = load_shared_discovery_cache(host, "smart")
+    if cached:
+        try:
+            unchanged, _ = revalidate_discovery_cache(client, cached, timeout=PROBE_TIMEOUT)
+        except Exception:
+            unchanged = False
+        if unchanged:
+            print("Homepage unchanged since last run - using cached discovery")
+            found_pages = []
+            for path, status in cached.get("statuses", {}).items():
+                result = record_path(path, status)
+                if result:
+                    found_pages.append(result)
+            with _discovery_lock:
+                _site_graph = SiteGraph.from_dict(cached.get("site_graph"))
+                rebuild_sampler()
+            _first_batch_ready.set()
+            print_discovery_results(found_pages)
+            _discovery_done = True
+            return
+    
+    found_pages = []
+    validators = {}
+    
+    def on_page(path, status, headers, body_hash):
+        if headers is not None:
+            if path == "/" and status == 200:
+                validators.update(homepage_validators(headers, body_hash))
+            result = record_path(path, status)
+            if result:
+                found_pages.append(result)
+        note_answered()
+    
+    try:
+        # Follow same-site links breadth-first from the homepage
+        _site_graph = crawl_site(client, on_page=on_page)
+        
+        # Probe the well-known paths the crawl didn't reach - only show what we FIND
+        test_paths = [path for path in CANDIDATE_PATHS if path not in _site_graph.pages]
+        pool = Pool(PROBE_CONCURRENCY)
+        for result in pool.imap_unordered(lambda path: probe_path(client, path), test_paths):
+            if result:
+                found_pages.append(result)
+    finally:
+        _first_batch_ready.set()
+    
+    print_discovery_results(found_pages)
+    
+    with _discovery_lock:
+        statuses = dict(_path_statuses)
+        rebuild_sampler()  # Final weights from the finished site graph
+    save_discovery_cache(host, "smart", validators, statuses, _site_graph.links.get("/", set()), _site_graph)
+    
+    _discovery_done = True
+
+
+def start_discovery(host):
+    """Run discovery once per process in the background, on its own session"""
+    global _discovery_started
+    with _discovery_lock:
+        if _discovery_started:
+            return
+        _discovery_started = True
+    gevent.spawn(run_discovery, discovery_session(host))
+
+
+@events.test_start.add_listener
+def discover_on_test_start(environment, **kwargs):
+    """Start discovery before the first user spawns"""
+    if runs_users(environment) and environment.host:
+        start_discovery(environment.host)
+
+
+class SmartWebsiteUser(BaseUser):
+    wait_time = think_time(1, 3)
+    
+    def on_start(self):
+        """Wait for discovery to confirm the first pages - it runs once per process"""
+        # Check if there's a duration limit set via environment variable
+        if hasattr(self.environment, 'parsed_options') and hasattr(self.environment.parsed_options, 'run_time'):
+            self.run_time = self.environment.parsed_options.run_time
+        else:
+            self.run_time = None
+        
+        self.start_time = time.time()
+        
+        # Normally already started by test_start - this covers a host set later
+        start_discovery(self.host)
+        
+        # Start generating load as soon as the first batch of pages is confirmed
+        _first_batch_ready.wait(timeout=max(PROBE_TIMEOUT, CRAWL_TIMEOUT) * 2 + 1)
+    
+    @task
+    def visit_pages(self):
+        """Visit pages that actually exist (including protected ones)"""
+        # Immutable snapshot - safe to use without the lock
+        sampler = current_sampler()
+        
+        if len(sampler) <= 1:
+            # Only homepage exists - just test that
+            self.client.get("/")
+        else:
+            # Multiple pages exist - test them all, weighted by how often the site links to them
+            path = sampler.choice()
+            
+            # Test the page but handle expected auth responses
+            with self.client.get(path, catch_response=True) as response:
+                if response.status_code in [200, 301, 302, 401, 403]:
+                    # These are all "expected" responses for pages that exist
+                    response.success()
+                elif response.status_code == 404:
+                    # Page disappeared - remove from future testing
+                    with _discovery_lock:
+                        if path in _working_paths or path in _protected_paths:
+                            _working_paths.discard(path)
+                            _protected_paths.discard(path)
+                            rebuild_sampler()
+                    response.failure("Page no longer exists")
+                else:
+                    # Server errors or other issues
+                    response.failure(f"Unexpected status: {response.status_code}")
@@ -0,0 +1,89 @@
+"""Support Portal Test - help desk and support features"""
+
+import random
+
+from locust import task
+
+from .arrival import think_time
+from .engine import BaseUser
+from .popularity import PopularityPicker
+from .scenario import setting_list
+
+# Listed most popular first - the popularity model decides how skewed picks are
+ARTICLE_IDS = PopularityPicker(range(1, 21))
+HELP_TOPICS = PopularityPicker(["password", "login", "billing", "account", "error"])
+CUSTOM_URLS = setting_list("custom_urls")  # Pages listed in the wizard
+
+
+class SupportUser(BaseUser):
+    wait_time = think_time(1, 3)
+    
+    @task(4)
+    def view_knowledge_base(self):
+        """Browse help articles"""
+        self.client.get("/help")
+    
+    @task(3)
+    def search_help(self):
+        """Search for help topics"""
+        term = HELP_TOPICS.pick()
+        self.client.get(f"/help/search?q={term}")
+    
+    @task(2)
+    def view_article(self):
+        """Read specific help article"""
+        article_id = ARTICLE_IDS.pick()
+        self.client.get(f"/help/article/{article_id}")
+    
+    @task(1)
+    def contact_form(self):
+        """Submit contact form with test data"""
+        # First get the contact form page
+        response = self.client.get("/contact")
+        
+        # Submit the form with test data
+        form_data = {
+            "name": f"Test User {random.randint(1000, 9999)}",
+            "email": f"test{random.randint(100, 999)}@example.com",
+            "subject": random.choice([
+                "Technical Support Request",
+                "Billing Question", 
+                "General Inquiry",
+                "Feature Request",
+                "Bug Report"
+            ]),
+            "message": "This is a test message from load testing. Please ignore."
+        }
+        self.client.post("/contact", data=form_data)
+    
+    @task(1)
+    def newsletter_signup(self):
+        """Test newsletter subscription form"""
+        signup_data = {
+            "email": f"newsletter{random.randint(1000, 9999)}@example.com",
+            "name": f"Test Subscriber {random.randint(100, 999)}"
+        }
+        self.client.post("/newsletter/subscribe", data=signup_data)
+    
+    @task(1)
+    def search_form_submit(self):
+        """Submit search form"""
+        search_terms = ["password", "login", "billing", "account", "error", "help"]
+        search_data = {
+            "q": random.choice(search_terms),
+            "category": random.choice(["all", "technical", "billing", "general"])
+        }
+        self.client.post("/search", data=search_data)
+    
+    @task(1)
+    def faq(self):
+        """View FAQ section"""
+        self.client.get("/faq")
+    
+    if CUSTOM_URLS:
+        custom_url_picker = PopularityPicker(CUSTOM_URLS)
+        
+        @task(3)
+        def custom_pages(self):
+            """Visit the pages you listed"""
+            self.client.get(self.custom_url_picker.pick())
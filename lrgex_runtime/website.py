@@ -0,0 +1,151 @@
+"""Website Load Test - tests the homepage and the pages a crawl of the site finds"""
+
+import random
+import threading
+
+import gevent
+from locust import events, task
+
+from .arrival import think_time
+from .crawler import SiteGraph, crawl_site
+from .discovery import (
+    discovery_session,
+    homepage_validators,
+    load_shared_discovery_cache,
+    revalidate_discovery_cache,
+    runs_users,
+    save_discovery_cache,
+)
+from .engine import BaseUser
+from .popularity import WeightedSampler, path_weights
+
+# The crawl runs once in the background - users test pages as they are found
+_crawl_lock = threading.Lock()
+_crawl_started = False
+_site_graph = None
+_sampler = WeightedSampler({})  # Snapshot users draw from - replaced, never mutated
+_sampler_stale = False  # The crawl added links since the snapshot - it is rebuilt on the next pick
+
+
+def rebuild_sampler():
+    """Publish a new sampler snapshot after the shared link set changes"""
+    global _sampler, _sampler_stale
+    _sampler = WeightedSampler(path_weights(SmartWebsiteUser.discovered_links, _site_graph))
+    _sampler_stale = False
+
+
+def current_sampler():
+    """The sampler snapshot, rebuilt first if the crawl added links since the last pick"""
+    if _sampler_stale:
+        rebuild_sampler()
+    return _sampler
+
+
+def browsable(path, status):
+    """Whether a crawled page goes into discovered_links - the homepage has its own task, redirects aren't pages"""
+    return status == 200 and path != "/"
+
+
+def run_discovery(client):
+    """Crawl the site once and feed every page found into the shared link set"""
+    global _site_graph
+    host = client.base_url
+    discovered_links = SmartWebsiteUser.discovered_links
+    try:
+        cached = load_shared_discovery_cache(host, "website")
+        if cached:
+            unchanged, _ = revalidate_discovery_cache(client, cached)
+            if unchanged:
+                # Homepage unchanged since last run - reuse the cached pages
+                discovered_links.update(path for path, status in cached.get("statuses", {}).items()
+                                        if browsable(path, status))
+                discovered_links.update(SmartWebsiteUser.common_paths)
+                _site_graph = SiteGraph.from_dict(cached.get("site_graph"))
+                rebuild_sampler()
+                return
+        
+        validators = {}
+        
+        def on_page(path, status, headers, body_hash):
+            global _sampler_stale
+            if path == "/" and status == 200:
+                validators.update(homepage_validators(headers, body_hash))
+            elif browsable(path, status) and path not in discovered_links:
+                discovered_links.add(path)
+                _sampler_stale = True
+        
+        graph = crawl_site(client, on_page=on_page)
+        discovered_links.update(SmartWebsiteUser.common_paths)
+        _site_graph = graph
+        rebuild_sampler()  # Final weights from the finished site graph
+        save_discovery_cache(host, "website", validators, graph.statuses(), graph.links.get("/", set()), graph)
+    except Exception:
+        # If discovery fails, use safe defaults
+        discovered_links.update({"/", "/home", "/about", "/contact"})
+        rebuild_sampler()
+
+
+def start_discovery(host):
+    """Crawl once per process in the background - users reuse the shared result"""
+    global _crawl_started
+    with _crawl_lock:
+        if _crawl_started:
+            return
+        _crawl_started = True
+    gevent.spawn(run_discovery, discovery_session(host))
+
+
+@events.test_start.add_listener
+def discover_on_test_start(environment, **kwargs):
+    """Start the crawl before the first user spawns"""
+    if runs_users(environment) and environment.host:
+        start_discovery(environment.host)
+
+
+class SmartWebsiteUser(BaseUser):
+    wait_time = think_time(1, 3)
+    discovered_links = set()
+    safe_paths = ["/", "/home", "/index", "/main"]
+    # Some common fallback paths
+    common_paths = ["/about", "/contact", "/services", "/products", 
+                    "/help", "/support", "/blog", "/news"]
+    
+    def on_start(self):
+        """Make sure the shared crawl is running - normally test_start already began it"""
+        start_discovery(self.host)
+    
+    @task(5)
+    def homepage(self):
+        """Visit homepage - always safe"""
+        self.client.get("/")
+    
+    @task(3)
+    def browse_discovered_pages(self):
+        """Visit discovered pages with error handling"""
+        sampler = current_sampler()  # Immutable snapshot of discovered_links
+        if len(sampler):
+            path = sampler.choice()
+            with self.client.get(path, catch_response=True) as response:
+                if response.status_code == 404:
+                    # Remove 404 pages from future requests
+                    if path in self.discovered_links:
+                        self.discovered_links.discard(path)
+                        rebuild_sampler()
+                    response.failure("Page not found - removed from rotation")
+                elif response.status_code >= 500:
+                    response.failure("Server error")
+                else:
+                    response.success()
+        else:
+            # Fallback to homepage
+            self.client.get("/")
+    
+    @task(1)
+    def safe_navigation(self):
+        """Always use known safe paths"""
+        safe_path = random.choice(self.safe_paths)
+        with self.client.get(safe_path, catch_response=True) as response:
+            if response.status_code >= 400:
+                response.failure(f"Error {response.status_code}")
+            else:
+                response.success()
@@ -0,0 +1,116 @@
+"""Load generator report - which workers took part in a distributed run and how busy they were"""
+
+import csv
+import time
+
+import gevent
+from locust import events
+from locust.runners import MasterRunner
+
+from .scenario import setting
+
+WORKER_SAMPLE_INTERVAL = float(setting("worker_sample_interval", "2"))
+CPU_BUSY_PERCENT = 90  # Same threshold Locust warns at - results from a busier worker are suspect
+
+
+class WorkerUsage:
+    """CPU, memory and user samples for one worker, taken from its heartbeats"""
+
+    def __init__(self, worker_id, index):
+        self.worker_id = worker_id
+        self.index = index
+        self.samples = 0
+        self.cpu_total = 0.0
+        self.cpu_peak = 0.0
+        self.busy_samples = 0
+        self.memory_peak = 0
+        self.first_memory = None  # Memory from the worker's first self-measurement
+        self.users_peak = 0
+        self.first_seen = time.time()
+        self.last_seen = self.first_seen
+
+    def record(self, node):
+        self.users_peak = max(self.users_peak, node.user_count)
+        self.memory_peak = max(self.memory_peak, node.memory_usage)
+        self.last_seen = time.time()
+        # Workers measure themselves every 10s, and the first CPU reading is always 0 -
+        # only count heartbeats from the second measurement on
+        if self.first_memory is None:
+            if node.memory_usage:
+                self.first_memory = node.memory_usage
+            return
+        if node.memory_usage == self.first_memory and not self.samples:
+            return
+        self.samples += 1
+        self.cpu_total += node.cpu_usage
+        self.cpu_peak = max(self.cpu_peak, node.cpu_usage)
+        if node.cpu_usage >= CPU_BUSY_PERCENT:
+            self.busy_samples += 1
+
+    @property
+    def cpu_average(self):
+        return self.cpu_total / self.samples if self.samples else 0.0
+
+    def describe_cpu(self):
+        if not self.samples:
+            return "CPU not measured (test shorter than ~20s)"
+        return f"CPU avg {self.cpu_average:.0f}% / peak {self.cpu_peak:.0f}%"
+
+    @property
+    def host(self):
+        """Locust worker ids are "<hostname>_<random hex>" """
+        return self.worker_id.rsplit("_", 1)[0]
+
+
+_worker_usage = {}  # Worker id -> WorkerUsage, kept after the worker leaves
+_sampler = None
+
+
+def sample_workers(runner):
+    while True:
+        for node in list(runner.clients.values()):
+            usage = _worker_usage.get(node.id)
+            if usage is None:
+                usage = _worker_usage[node.id] = WorkerUsage(node.id, runner.get_worker_index(node.id))
+            usage.record(node)
+        gevent.sleep(WORKER_SAMPLE_INTERVAL)
+
+
+@events.test_start.add_listener
+def track_workers(environment, **kwargs):
+    """Sample every worker's heartbeat on the master for the length of the test"""
+    global _sampler
+    if isinstance(environment.runner, MasterRunner) and _sampler is None:
+        _sampler = gevent.spawn(sample_workers, environment.runner)
+
+
+@events.test_stop.add_listener
+def report_workers(environment, **kwargs):
+    """Print the load generator summary and save it next to the CSV reports"""
+    global _sampler
+    if _sampler is None:
+        return
+    _sampler.kill()
+    _sampler = None
+    if not _worker_usage:
+        return
+
+    workers = sorted(_worker_usage.values(), key=lambda usage: usage.index)
+    print(f"Load generators: {len(workers)} workers")
+    for usage in workers:
+        warning = " - OVERLOADED, results may understate your site's speed" if usage.busy_samples else ""
+        print(f"  Worker {usage.index + 1} ({usage.host}): {usage.users_peak} users, {usage.describe_cpu()}{warning}")
+
+    csv_prefix = getattr(environment.parsed_options, "csv_prefix", None)
+    if not csv_prefix:
+        return
+    with open(f"{csv_prefix}_workers.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Worker", "Host", "Worker ID", "Peak Users", "Average CPU %", "Peak CPU %",
+                         "Busy Samples", "Samples", "Peak Memory MB", "Seconds Seen"])
+        for usage in workers:
+            writer.writerow([usage.index + 1, usage.host, usage.worker_id, usage.users_peak,
+                             round(usage.cpu_average, 1) if usage.samples else "",
+                             round(usage.cpu_peak, 1) if usage.samples else "",
+                             usage.busy_samples, usage.samples, round(usage.memory_peak / 1024 / 1024, 1),
+                             round(usage.last_seen - usage.first_seen, 1)])
@@ -0,0 +1,34 @@
+"""Shared fixtures - the launcher is loaded as a module, since its file name has a hyphen"""
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(scope="session")
+def launcher():
+    spec = importlib.util.spec_from_file_location("lrgex_benchmark", ROOT / "LRGEX-Benchmark.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def fresh_smart(monkeypatch):
+    """The Smart Website Test's module state as before its first discovery"""
+    from gevent.event import Event
+
+    from lrgex_runtime import smart
+    from lrgex_runtime.crawler import SiteGraph
+    from lrgex_runtime.popularity import WeightedSampler
+
+    for name, value in [("_working_paths", set()), ("_protected_paths", set()), ("_path_statuses", {}),
+                        ("_site_graph", SiteGraph()), ("_sampler", WeightedSampler({"/": 1})),
+                        ("_sampler_stale", False), ("_first_batch_ready", Event()), ("_answered", 0),
+                        ("_discovery_done", False)]:
+        monkeypatch.setattr(smart, name, value)
+    monkeypatch.setattr("lrgex_runtime.crawler.CRAWL_DELAY", 0)
+    return smart
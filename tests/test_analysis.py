@@ -0,0 +1,54 @@
+"""Results analysis - percentile SLOs and the per-endpoint tails"""
+
+import csv
+
+import pytest
+
+HEADER = ["Type", "Name", "Request Count", "Failure Count", "Average Response Time", "Min Response Time",
+          "Max Response Time", "50%", "90%", "95%", "99%", "99.9%"]
+
+
+def write_stats(path, endpoints):
+    """Locust stats CSV - endpoints are (name, requests, average, p50, p95, p99)"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for name, requests, average, p50, p95, p99 in endpoints:
+            writer.writerow(["GET", name, requests, 0, average, 1, p99 * 2, p50, p95, p95, p99, "N/A"])
+        writer.writerow(["", "Aggregated", sum(e[1] for e in endpoints), 0, 100, 1, 5000, 100, 300, 400, 900, 2000])
+
+
+@pytest.fixture
+def no_slo_overrides(monkeypatch):
+    for name in ("P50", "P90", "P95", "P99", "P999"):
+        monkeypatch.delenv(f"LRGEX_SLO_{name}_MS", raising=False)
+    return monkeypatch
+
+
+def test_default_slos_and_overrides(launcher, no_slo_overrides):
+    assert launcher.percentile_slos() == {"50%": 200, "95%": 500, "99%": 1000}
+
+    no_slo_overrides.setenv("LRGEX_SLO_P95_MS", "800")
+    no_slo_overrides.setenv("LRGEX_SLO_P50_MS", "0")  # 0 leaves the percentile out
+    no_slo_overrides.setenv("LRGEX_SLO_P999_MS", "3000")
+    assert launcher.percentile_slos() == {"95%": 800, "99%": 1000, "99.9%": 3000}
+
+
+def test_endpoints_ranked_by_tail_and_total_time(launcher, tmp_path, no_slo_overrides):
+    stats = tmp_path / "stats.csv"
+    write_stats(stats, [
+        ("/fast", 10_000, 20, 15, 40, 80),
+        ("/slow-tail", 100, 50, 30, 600, 4000),  # Misses p95 and p99
+        ("/busy", 5_000, 300, 250, 450, 700),  # Misses p50, most total time
+        ("/unused", 0, 0, 0, 0, 0),
+    ])
+
+    result = launcher.read_endpoint_stats(str(stats), top=2)
+
+    assert result["endpoints"] == 3
+    assert result["missing_slo"] == 2
+    assert [endpoint["name"] for endpoint in result["slowest"]] == ["GET /slow-tail", "GET /busy"]
+    assert [endpoint["name"] for endpoint in result["busiest"]] == ["GET /busy", "GET /fast"]
+    assert result["total_time"] == pytest.approx(10_000 * 20 + 100 * 50 + 5_000 * 300)
+    assert result["aggregated"]["percentiles"]["99.9%"] == 2000
+    assert "99.9%" not in result["slowest"][0]["percentiles"]  # N/A is left out
@@ -0,0 +1,153 @@
+"""Open-model load shapes - target rates over time and the arrival pacer"""
+
+import pytest
+
+from lrgex_runtime import arrival
+from lrgex_runtime.arrival import ArrivalPacer, shape_rate
+
+
+@pytest.mark.parametrize("shape, times, rates", [
+    ({"type": "constant", "rate": 20, "duration": 60}, [0, 59.9, 60], [20, 20, None]),
+    ({"type": "step", "start": 10, "step": 5, "every": 30, "steps": 3}, [0, 29, 30, 65, 90], [10, 10, 15, 20, None]),
+    ({"type": "spike", "base": 10, "peak": 100, "at": 30, "length": 10, "duration": 60},
+     [0, 30, 39.9, 40, 60], [10, 100, 100, 10, None]),
+    ({"type": "ramp-hold-ramp", "rate": 100, "ramp": 10, "hold": 20},
+     [0, 5, 10, 29, 35, 40], [0, 50, 100, 100, 50, None]),
+])
+def test_shape_rates(shape, times, rates):
+    assert [shape_rate(shape, time) for time in times] == rates
+
+
+def test_unknown_shape():
+    with pytest.raises(ValueError, match="Unknown load shape"):
+        shape_rate({"type": "sine"}, 0)
+
+
+class Runner:
+    user_count = 10
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(arrival.time, "time", lambda: now[0])
+    return now
+
+
+def test_slots_are_spaced_at_the_process_rate(clock):
+    pacer = ArrivalPacer()
+    pacer.per_user_rate = 2.0  # 10 users -> 20 requests/second
+
+    slots = [pacer.book(Runner()) for _ in range(5)]
+
+    assert slots == pytest.approx([1000.0, 1000.05, 1000.1, 1000.15, 1000.2])
+    assert pacer.dropped == 0
+
+
+def test_arrivals_more_than_the_backlog_late_are_dropped(clock):
+    pacer = ArrivalPacer()
+    pacer.per_user_rate = 1.0  # 10 requests/second
+    pacer.book(Runner())
+    clock[0] += 3.0  # Every user was busy for 3 seconds
+
+    slot = pacer.book(Runner())
+
+    assert slot == pytest.approx(clock[0] - arrival.MAX_BACKLOG)
+    assert pacer.dropped == 19  # 2 of the 3 seconds were beyond the backlog, less the first slot
+
+
+def test_booked_slots_are_respaced_when_the_rate_changes(clock):
+    pacer = ArrivalPacer()
+    pacer.per_user_rate = 1.0
+    for _ in range(10):
+        pacer.book(Runner())  # Booked one second ahead at 10/s
+    pacer.per_user_rate = 2.0
+
+    pacer.book(Runner())
+
+    # The second of slots booked ahead shrinks to half a second at the doubled rate
+    assert pacer.next_slot == pytest.approx(1000.5 + 0.05)
+
+
+class Total:
+    num_requests = 0
+    total_response_time = 0
+
+
+class MasterRunner:
+    """Stats as a master sees them - the count only moves when the workers report"""
+
+    def __init__(self):
+        self.stats = type("Stats", (), {"total": Total()})()
+
+    def send_message(self, *args):
+        pass
+
+
+def make_shape(clock):
+    """A 100 req/s shape on a master"""
+    shape = arrival.ArrivalRateShape()
+    shape.runner = MasterRunner()
+    shape.get_run_time = lambda: clock[0] - 1000
+    shape.target_rate = lambda run_time: 100.0
+    return shape
+
+
+def run_shape(clock, counts):
+    """Tick the shape once a second, the master's request count at each second given by counts"""
+    shape = make_shape(clock)
+    for count in counts:
+        shape.runner.stats.total.num_requests = count
+        shape.runner.stats.total.total_response_time = count * 50
+        shape.tick()
+        clock[0] += 1
+    return shape.rows
+
+
+def test_achieved_rate_is_measured_between_worker_reports(clock):
+    # 100 req/s, reported every 3 seconds
+    rows = run_shape(clock, [300 * (second // 3) for second in range(20)])
+
+    measured = [row for row in rows if row[2] != ""]
+    assert len(measured) >= 14
+    assert all(row[2] == 100 for row in measured)
+    assert not any(row[4] for row in rows)
+
+
+def test_a_stalled_count_falls_below_the_target(clock):
+    rows = run_shape(clock, [300 * min(second // 3, 3) for second in range(20)])
+
+    assert all(row[2] == 100 for row in rows[6:14] if row[2] != "")
+    assert rows[-1][2] < 90 and rows[-1][4] == 1
+
+
+def test_workers_report_their_drops_to_the_master(monkeypatch):
+    worker, master = ArrivalPacer(), ArrivalPacer()
+    worker.dropped = 7
+    data = {}
+
+    monkeypatch.setattr(arrival, "PACER", worker)
+    arrival.send_dropped("worker-1", data)
+    monkeypatch.setattr(arrival, "PACER", master)
+    arrival.receive_dropped("worker-1", data)
+    arrival.receive_dropped("worker-2", {})  # A report from before the shape started
+
+    assert (worker.dropped, master.dropped) == (0, 7)
+
+
+def test_drops_are_recorded_in_the_second_they_were_reported(clock, monkeypatch, tmp_path, capsys):
+    monkeypatch.setattr(arrival, "PACER", ArrivalPacer())
+    shape = make_shape(clock)
+    for dropped in [0, 0, 5, 5, 12]:
+        arrival.PACER.dropped = dropped
+        shape.tick()
+        clock[0] += 1
+    arrival.PACER.dropped = 15  # The workers' final reports
+
+    environment = type("Environment", (), {"shape_class": shape,
+                                           "parsed_options": type("Options", (), {"csv_prefix": str(tmp_path / "run")})})
+    arrival.report_arrival_rate(environment)
+
+    assert [row[6] for row in shape.rows] == [0, 0, 5, 0, 10]
+    assert "15 arrivals were dropped" in capsys.readouterr().out
+    assert (tmp_path / "run_arrival_rate.csv").read_text(encoding="utf-8").splitlines()[0].endswith(",Dropped Arrivals")
@@ -0,0 +1,98 @@
+"""Capacity search - growth, bisection and the knee-point result"""
+
+import pytest
+
+from lrgex_runtime import capacity
+from lrgex_runtime.capacity import CapacitySearchShape, CapacityStep, search_result
+
+
+def step(target, passed=True):
+    result = CapacityStep(target, 0)
+    result.measured = True
+    if not passed:
+        result.reasons.append("p95 too high")
+    return result
+
+
+def shape_with(steps):
+    shape = CapacitySearchShape()
+    shape.steps = list(steps)
+    return shape
+
+
+def test_rate_grows_until_a_step_fails():
+    assert shape_with([step(10)]).next_rate() == 20
+    assert shape_with([step(10), step(20), step(40)]).next_rate() == 80
+
+
+def test_growth_stops_at_the_max_rate():
+    assert shape_with([step(capacity.MAX_RATE * 0.75)]).next_rate() == capacity.MAX_RATE
+    assert shape_with([step(capacity.MAX_RATE)]).next_rate() is None
+
+
+def test_bisects_between_the_best_pass_and_the_lowest_failure():
+    assert shape_with([step(40), step(80, passed=False)]).next_rate() == 60
+    assert shape_with([step(40), step(80, False), step(60), step(70, False)]).next_rate() == 65
+    # 65 passes and 70 fails - within 10% of each other, so the search is done
+    assert shape_with([step(40), step(80, False), step(60), step(70, False), step(65)]).next_rate() is None
+
+
+def test_passes_above_a_failure_are_not_trusted():
+    steps = [step(10), step(20, passed=False), step(40)]
+
+    best, failure = search_result(steps)
+
+    assert (best.target, failure.target) == (10, 20)
+
+
+def test_stops_below_the_minimum_rate():
+    assert shape_with([step(1.5, passed=False)]).next_rate() is None
+
+
+@pytest.mark.parametrize("limit", [7, 137, 450])
+def test_search_converges_on_the_server_limit(limit):
+    shape = shape_with([])
+    rate = capacity.START_RATE
+    while rate is not None and len(shape.steps) < capacity.MAX_STEPS:
+        shape.steps.append(step(round(rate, 2), passed=rate <= limit))
+        rate = shape.next_rate()
+
+    best, failure = search_result(shape.steps)
+    assert best is not None and best.target <= limit
+    if best and failure:
+        assert failure.target - best.target <= failure.target * capacity.PRECISION
+    assert failure is None or failure.target > limit
+
+
+class Total:
+    num_requests = num_failures = total_response_time = 0
+    response_times = {}
+
+
+class MasterRunner:
+    def __init__(self):
+        self.stats = type("Stats", (), {"total": Total()})()
+
+    def send_message(self, *args):
+        pass
+
+
+@pytest.mark.parametrize("phase", [0, 1, 2])
+def test_step_is_measured_between_worker_reports(monkeypatch, phase):
+    now = [1000.0]
+    monkeypatch.setattr(capacity.time, "time", lambda: now[0])
+    shape = shape_with([])
+    shape.runner = MasterRunner()
+    shape.get_run_time = lambda: now[0] - 1000
+    total = shape.runner.stats.total
+    while not shape.steps or not shape.steps[0].measured:
+        # The workers send START_RATE req/s, reported every 3 seconds
+        seconds = int(now[0] - 1000)
+        total.num_requests = int(capacity.START_RATE * 3 * ((seconds + phase) // 3))
+        total.response_times = {50: total.num_requests}
+        shape.tick()
+        now[0] += 1
+        assert seconds < capacity.STEP_SECONDS + 5
+
+    assert shape.steps[0].achieved == pytest.approx(capacity.START_RATE)
+    assert shape.steps[0].passed
@@ -0,0 +1,89 @@
+"""Site crawler - link normalization, streamed link extraction and the site graph"""
+
+from urllib.parse import quote
+
+import pytest
+
+from lrgex_runtime.crawler import MAX_PATH_LENGTH, SiteGraph, extract_links, normalize_link
+
+PAGE = "https://example.com/blog/post/"
+SITE = "example.com"
+
+
+@pytest.mark.parametrize("link, path", [
+    ("/about", "/about"),
+    ("contact", "/blog/post/contact"),
+    ("../archive/", "/blog/archive/"),
+    ("./../../", "/"),
+    ("//example.com//a//b", "/a/b"),
+    ("https://EXAMPLE.com/x?page=2#top", "/x"),
+    ("/caf%C3%A9", "/caf%C3%A9"),
+    ("/café", "/caf%C3%A9"),
+    ("/a%2fb", "/a/b"),
+    ("  /spaces  ", "/spaces"),
+    ("", None),
+    ("#section", None),
+    ("mailto:info@example.com", None),
+    ("javascript:void(0)", None),
+    ("https://other.com/page", None),
+    ("ftp://example.com/file", None),
+    ("/" + "x" * MAX_PATH_LENGTH, None),
+])
+def test_normalize_link(link, path):
+    assert normalize_link(link, PAGE, SITE) == path
+
+
+def test_site_graph_counts_inlinks_and_round_trips():
+    graph = SiteGraph()
+    graph.add_page("/", 200, 0)
+    graph.add_page("/a", 200, 1)
+    graph.add_link("/", "/a")
+    graph.add_link("/", "/b")
+    graph.add_link("/a", "/b")
+    graph.add_link("/a", "/b")  # Counted once per linking page
+
+    assert graph.inlink_counts() == {"/a": 1, "/b": 2}
+    copy = SiteGraph.from_dict(graph.to_dict())
+    assert copy.pages == graph.pages and copy.links == graph.links
+    assert graph.statuses() == {"/": 200, "/a": 200}
+
+
+class StreamedPage:
+    """A streamed response that counts the chunks read from it"""
+
+    def __init__(self, body, content_type="text/html", chunk_size=64):
+        self.headers = {"Content-Type": content_type}
+        self.chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+        self.read = 0
+
+    def iter_content(self, chunk_size=1):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+
+
+def test_link_extraction_stops_reading_at_the_cap():
+    page = StreamedPage("".join(f'<a href="/p{i}">{i}</a>' for i in range(200)).encode())
+    links, body_hash = extract_links(page, max_links=10)
+
+    assert links == [f"/p{i}" for i in range(10)]
+    assert body_hash is None  # The page was not read to the end
+    assert page.read < len(page.chunks) / 4
+
+    links, body_hash = extract_links(StreamedPage(b'<a href="/a"><img src=/b.png></a>'), max_links=10)
+    assert links == ["/a", "/b.png"] and body_hash is not None
+
+
+@pytest.mark.parametrize("content_type, encoding, link", [
+    ("text/html; charset=ISO-8859-1", "latin-1", "/café"),
+    ('text/html; charset="windows-1251"', "cp1251", "/каталог"),
+    ("text/html", "utf-8", "/café/€"),
+    ("text/html; charset=no-such-codec", "utf-8", "/café"),
+])
+def test_link_extraction_decodes_the_declared_charset(content_type, encoding, link):
+    # 3-byte chunks split the multi-byte characters between reads
+    page = StreamedPage(f'<a href="{link}">x</a>'.encode(encoding), content_type, chunk_size=3)
+    links, _ = extract_links(page)
+
+    assert links == [link]
+    assert normalize_link(links[0], PAGE, SITE) == quote(link)
@@ -0,0 +1,89 @@
+"""Discovery in the Smart Website and Website tests - sorting found paths and the sampler users draw from"""
+
+import pytest
+
+from lrgex_runtime import website
+from lrgex_runtime.crawler import SiteGraph
+from lrgex_runtime.popularity import WeightedSampler, path_weights
+
+
+def count_rebuilds(module, monkeypatch):
+    """How many times the module computed sampler weights"""
+    rebuilds = []
+
+    def counted(paths, graph):
+        rebuilds.append(len(paths))
+        return path_weights(paths, graph)
+    monkeypatch.setattr(module, "path_weights", counted)
+    return rebuilds
+
+
+def test_found_paths_reach_the_sampler_on_the_next_pick(fresh_smart, monkeypatch):
+    rebuilds = count_rebuilds(fresh_smart, monkeypatch)
+    for number in range(500):
+        fresh_smart.record_path(f"/page-{number}", 200)
+    fresh_smart.record_path("/admin", 403)
+    fresh_smart.record_path("/missing", 404)
+
+    assert rebuilds == []
+    assert fresh_smart._sampler.items == ["/"]
+    sampler = fresh_smart.current_sampler()
+    assert len(sampler) == 501 and "/admin" in sampler.items and "/missing" not in sampler.items
+    assert fresh_smart.current_sampler() is sampler
+    assert rebuilds == [501]
+
+
+@pytest.fixture
+def fresh_website(monkeypatch):
+    """The Website Load Test's module state as before its crawl, with the discovery cache off"""
+    monkeypatch.setattr(website, "_sampler", WeightedSampler({}))
+    monkeypatch.setattr(website, "_sampler_stale", False)
+    monkeypatch.setattr(website, "_site_graph", None)
+    monkeypatch.setattr(website.SmartWebsiteUser, "discovered_links", set())
+    monkeypatch.setattr(website, "load_shared_discovery_cache", lambda host, kind: None)
+    monkeypatch.setattr(website, "save_discovery_cache", lambda *args: None)
+    return website
+
+
+class Site:
+    base_url = "https://example.com"
+
+
+def crawl(pages):
+    """crawl_site stand-in that reports the (path, status) pairs given and returns their graph"""
+    def crawl_site(client, on_page=None):
+        graph = SiteGraph()
+        for path, status in pages:
+            graph.add_page(path, status, 1)
+            on_page(path, status, {}, None)
+        return graph
+    return crawl_site
+
+
+def test_crawl_rebuilds_the_sampler_once(fresh_website, monkeypatch):
+    rebuilds = count_rebuilds(fresh_website, monkeypatch)
+    monkeypatch.setattr(fresh_website, "crawl_site", crawl([("/", 200)] + [(f"/page-{n}", 200) for n in range(500)]))
+
+    fresh_website.run_discovery(Site())
+
+    assert len(rebuilds) == 1  # The final weights, not one per page
+    assert len(fresh_website.current_sampler()) == 500 + len(website.SmartWebsiteUser.common_paths)
+    assert len(rebuilds) == 1
+
+
+STATUSES = {"/": 200, "/about": 200, "/blog": 200, "/old": 301, "/moved": 302, "/admin": 403, "/gone": 404}
+
+
+def test_cached_and_live_discovery_keep_the_same_pages(fresh_website, monkeypatch):
+    monkeypatch.setattr(fresh_website, "crawl_site", crawl(STATUSES.items()))
+    fresh_website.run_discovery(Site())
+    live = set(fresh_website.SmartWebsiteUser.discovered_links)
+
+    fresh_website.SmartWebsiteUser.discovered_links.clear()
+    cached = {"statuses": STATUSES, "working_paths": ["/", "/about", "/blog", "/moved", "/old"]}
+    monkeypatch.setattr(fresh_website, "load_shared_discovery_cache", lambda host, kind: cached)
+    monkeypatch.setattr(fresh_website, "revalidate_discovery_cache", lambda client, entry: (True, None))
+    fresh_website.run_discovery(Site())
+
+    assert fresh_website.SmartWebsiteUser.discovered_links == live
+    assert live == {"/about", "/blog"} | set(website.SmartWebsiteUser.common_paths)
@@ -0,0 +1,133 @@
+"""Discovery cache - TTL expiry, conditional revalidation and reuse by the Smart Website Test"""
+
+import contextlib
+import hashlib
+import json
+
+import pytest
+
+from lrgex_runtime import discovery
+
+HOST = "https://example.com"
+STATUSES = {"/": 200, "/about": 200, "/old": 301, "/admin": 403, "/missing": 404}
+
+
+class Response:
+    def __init__(self, status_code, headers=None, body=b""):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = body
+        self.url = None
+
+    def iter_content(self, chunk_size=1):
+        yield self.content
+
+    def success(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class Site:
+    """Discovery client - the homepage gives the response under test, every other path is missing"""
+
+    base_url = HOST
+
+    def __init__(self, homepage):
+        self.homepage = homepage
+        self.requests = []
+
+    @contextlib.contextmanager
+    def request(self, method, path, headers=None, **kwargs):
+        self.requests.append((method, path, headers or {}))
+        yield self.homepage if (method, path) == ("GET", "/") else Response(404)
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def head(self, path, **kwargs):
+        return self.request("HEAD", path, **kwargs)
+
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(discovery, "DISCOVERY_CACHE_ENABLED", True)
+    monkeypatch.setattr(discovery, "DISCOVERY_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(discovery, "DISCOVERY_CACHE_TTL", 3600)
+    return discovery
+
+
+def save(cache, age=0, **validators):
+    cache.save_discovery_cache(HOST, "smart", validators, STATUSES, {"/about"})
+    path = cache.discovery_cache_file(HOST, "smart")
+    with open(path, encoding="utf-8") as f:
+        entry = json.load(f)
+    entry["saved_at"] -= age
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+
+
+def test_cache_is_used_inside_the_ttl_only(cache):
+    save(cache, age=3500, etag='"v1"')
+    entry = cache.load_discovery_cache(HOST, "smart")
+    assert entry["working_paths"] == ["/", "/about", "/old"]
+    assert entry["protected_paths"] == ["/admin"]
+    assert entry["etag"] == '"v1"'
+    assert cache.load_discovery_cache("https://other.com", "smart") is None
+
+    save(cache, age=3601, etag='"v1"')
+    assert cache.load_discovery_cache(HOST, "smart") is None
+
+
+def test_disabled_cache_is_never_read(cache, monkeypatch):
+    save(cache)
+    monkeypatch.setattr(discovery, "DISCOVERY_CACHE_ENABLED", False)
+    assert cache.load_discovery_cache(HOST, "smart") is None
+
+
+def test_revalidation_sends_the_validators_and_accepts_304(cache):
+    site = Site(Response(304))
+    entry = {"etag": '"v1"', "last_modified": "Mon, 05 Oct 2026 10:00:00 GMT"}
+
+    unchanged, _ = cache.revalidate_discovery_cache(site, entry)
+    assert unchanged
+    assert site.requests == [("GET", "/", {"If-None-Match": '"v1"', "If-Modified-Since": entry["last_modified"]})]
+
+
+@pytest.mark.parametrize("entry, headers, body, unchanged", [
+    ({"etag": '"v1"'}, {"ETag": '"v1"'}, b"new", True),  # Server ignored If-None-Match
+    ({"etag": '"v1"'}, {"ETag": '"v2"'}, b"new", False),
+    ({"last_modified": "A"}, {"Last-Modified": "B"}, b"", False),
+    ({"homepage_hash": hashlib.sha256(b"old").hexdigest()}, {}, b"new", False),
+])
+def test_revalidation_compares_validators_on_a_full_response(cache, entry, headers, body, unchanged):
+    assert cache.revalidate_discovery_cache(Site(Response(200, headers, body)), entry)[0] is unchanged
+
+
+def test_revalidation_matches_the_body_hash_without_validators(cache):
+    homepage = Response(200, {}, b"<html>same</html>")
+    entry = cache.homepage_validators({}, hashlib.sha256(homepage.content).hexdigest())
+    assert cache.revalidate_discovery_cache(Site(homepage), entry)[0] is True
+    assert cache.revalidate_discovery_cache(Site(Response(500)), entry)[0] is False
+
+
+def test_unchanged_homepage_reuses_the_cached_discovery(cache, fresh_smart):
+    save(cache, etag='"v1"')
+    site = Site(Response(304))
+
+    fresh_smart.run_discovery(site)
+    assert site.requests == [("GET", "/", {"If-None-Match": '"v1"'})]
+    assert fresh_smart._working_paths == {"/", "/about", "/old"}
+    assert fresh_smart._protected_paths == {"/admin"}
+
+
+def test_expired_cache_runs_the_full_discovery(cache, fresh_smart):
+    save(cache, age=7200, etag='"v1"')
+    site = Site(Response(200, {"Content-Type": "text/html", "ETag": '"v2"'}, b"<html></html>"))
+
+    fresh_smart.run_discovery(site)
+    assert ("HEAD", "/about", {}) in site.requests
+    assert all(headers == {} for _method, _path, headers in site.requests)  # Nothing conditional
+    assert fresh_smart._working_paths == {"/"}
+    assert cache.load_discovery_cache(HOST, "smart")["etag"] == '"v2"'
@@ -0,0 +1,38 @@
+"""HTTP client engine - the scenario's engine picks the base class of every template"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+CHECK = """
+from locust import FastHttpUser, HttpUser
+from lrgex_runtime import api, custom_form, ecommerce, engine, forms, smart, support, website
+users = [api.APIUser, custom_form.CustomFormUser, ecommerce.ShopperUser, forms.FormTestUser,
+         smart.SmartWebsiteUser, support.SupportUser, website.SmartWebsiteUser]
+print(engine.BaseUser.__name__, all(issubclass(user, engine.BaseUser) for user in users))
+"""
+
+
+def run_with_engine(engine):
+    env = {key: value for key, value in os.environ.items() if not key.startswith("LRGEX_")}
+    env["LRGEX_ENGINE"] = engine
+    return subprocess.run([sys.executable, "-c", CHECK], cwd=ROOT, env=env, capture_output=True, text=True)
+
+
+@pytest.mark.parametrize("engine, base", [("requests", "HttpUser"), ("fast", "FastHttpUser"), ("FAST", "FastHttpUser")])
+def test_every_template_uses_the_chosen_engine(engine, base):
+    result = run_with_engine(engine)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split()[-2:] == [base, "True"]
+
+
+def test_unknown_engine_is_refused():
+    result = run_with_engine("curl")
+
+    assert result.returncode != 0
+    assert "Unknown engine 'curl'" in result.stderr
@@ -0,0 +1,89 @@
+"""Data feeder - per-worker slices and row strategies"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from lrgex_runtime.feeder import DataFeeder
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def people(tmp_path):
+    path = tmp_path / "people.csv"
+    path.write_text("name,email\n" + "".join(f"user{i},user{i}@example.com\n" for i in range(100)), encoding="utf-8")
+    return str(path)
+
+
+def slice_rows(feeder):
+    return [feeder.parse(feeder.read_line(offset, feeder.end)[0])["name"] for offset in feeder.index_rows()]
+
+
+@pytest.mark.parametrize("workers", [1, 3, 7])
+def test_worker_slices_are_disjoint_and_cover_every_row(people, workers):
+    slices = [slice_rows(DataFeeder(people, "sequential", index, workers)) for index in range(workers)]
+
+    every_row = [name for rows in slices for name in rows]
+    assert every_row == [f"user{i}" for i in range(100)]
+
+
+def test_sequential_rows_wrap_around_the_slice(people):
+    feeder = DataFeeder(people, "sequential", 1, 4)
+    rows = slice_rows(feeder)
+
+    picked = [feeder.row_for(None)["name"] for _ in range(len(rows) + 2)]
+
+    assert picked == rows + rows[:2]
+
+
+def test_per_user_keeps_one_row_per_user(people):
+    class User:
+        pass
+
+    feeder = DataFeeder(people, "per-user")
+    first, second = User(), User()
+
+    assert feeder.row_for(first) == feeder.row_for(first)
+    assert feeder.row_for(first) != feeder.row_for(second)
+
+
+def test_random_rows_come_from_the_slice_and_are_indexed_up_front(people):
+    feeder = DataFeeder(people, "random", 2, 3)
+    rows = set(slice_rows(feeder))
+
+    assert feeder.offsets is not None and len(feeder.offsets) == len(rows)
+    assert {feeder.row_for(None)["name"] for _ in range(200)} <= rows
+
+
+def test_jsonl_rows_and_blank_lines(tmp_path):
+    path = tmp_path / "payloads.jsonl"
+    path.write_text('{"id": 1}\n\n{"id": 2}\n   \n{"id": 3}\n', encoding="utf-8")
+    feeder = DataFeeder(str(path), "sequential")
+
+    assert [feeder.next_row()["id"] for _ in range(4)] == [1, 2, 3, 1]
+
+
+def test_unknown_strategy_and_empty_file(people, tmp_path):
+    with pytest.raises(ValueError, match="Unknown feeder strategy"):
+        DataFeeder(people, "shuffled")
+    empty = tmp_path / "empty.csv"
+    empty.write_bytes(b"")
+    with pytest.raises(ValueError, match="empty"):
+        DataFeeder(str(empty))
+
+
+def test_form_with_data_columns_needs_a_data_file(tmp_path):
+    scenario = tmp_path / "scenario.json"
+    scenario.write_text('{"form": {"fields": [{"name": "email", "type": 8, "column": "email"}]}}', encoding="utf-8")
+    env = {**os.environ, "LRGEX_SCENARIO": str(scenario)}
+    env.pop("LRGEX_FEEDER_FILE", None)
+
+    result = subprocess.run([sys.executable, "-c", "import lrgex_runtime.custom_form"], cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+
+    assert result.returncode != 0
+    assert "no feeder_file is set" in result.stderr
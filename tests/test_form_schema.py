@@ -0,0 +1,97 @@
+"""Form schema cache - hidden fields, CSRF tokens and the shared-token fallback"""
+
+import contextlib
+
+import pytest
+
+from lrgex_runtime import form_schema
+
+
+class Response:
+    def __init__(self, status_code, text=""):
+        self.status_code = status_code
+        self.text = text
+
+    def success(self):
+        pass
+
+    def failure(self, message):
+        pass
+
+
+class SessionBoundSite:
+    """A user's client - the form page hands out a token that only this user's session accepts"""
+
+    def __init__(self, session):
+        self.session = session
+        self.page_loads = 0
+
+    @contextlib.contextmanager
+    def get(self, url, catch_response=False, name=None):
+        self.page_loads += 1
+        yield Response(200, f'<form><input type="hidden" name="csrf" value="{self.session}"></form>')
+
+
+class User:
+    def __init__(self, session):
+        self.client = SessionBoundSite(session)
+
+
+def submit(user):
+    """The templates' submission flow - POST, and on a rejected token reload the page and retry once"""
+    schema = form_schema.load_form_schema(user, "/contact")
+    status = 200 if schema["fields"]["csrf"] == user.client.session else 403
+    if form_schema.token_rejected(user, "/contact", status):
+        schema = form_schema.load_form_schema(user, "/contact")
+        status = 200 if schema["fields"]["csrf"] == user.client.session else 403
+    return status
+
+
+@pytest.fixture
+def token_cache(monkeypatch):
+    def use(mode):
+        monkeypatch.setattr(form_schema, "FORM_TOKEN_CACHE", mode)
+        monkeypatch.setattr(form_schema, "GLOBAL_FORM_SCHEMAS", form_schema.FormSchemaCache())
+        monkeypatch.setattr(form_schema, "global_rejections", 0)
+    return use
+
+
+def test_hidden_fields_and_csrf_meta_are_parsed():
+    schema = form_schema.parse_form_schema(
+        '<meta name="csrf-token" content="abc"><input type="hidden" name="_token" value="t1">'
+        '<input type="text" name="email"><input type="hidden" name="_token" value="t2">'
+    )
+
+    assert schema == {"fields": {"_token": "t1"}, "headers": {"X-CSRF-Token": "abc"}}
+
+
+def test_session_mode_loads_the_page_once_per_user(token_cache):
+    token_cache("session")
+    users = [User(f"session{i}") for i in range(3)]
+
+    assert [submit(user) for user in users for _ in range(4)] == [200] * 12
+    assert [user.client.page_loads for user in users] == [1, 1, 1]
+
+
+def test_global_mode_falls_back_to_per_user_tokens_on_session_bound_sites(token_cache, capsys):
+    token_cache("global")
+    users = [User(f"session{i}") for i in range(20)]
+
+    statuses = [submit(user) for _ in range(3) for user in users]
+
+    assert statuses == [200] * 60  # Every rejected shared token was retried with the user's own
+    assert form_schema.FORM_TOKEN_CACHE == "session"
+    assert "switching to one token per user" in capsys.readouterr().out
+    # After the switch each user keeps its own token - no more page loads for users that already have one
+    loads = [user.client.page_loads for user in users]
+    assert [submit(user) for user in users] == [200] * 20
+    assert [user.client.page_loads for user in users] == loads
+
+
+def test_global_mode_stays_shared_when_tokens_are_not_session_bound(token_cache):
+    token_cache("global")
+    users = [User("shared") for _ in range(20)]
+
+    assert [submit(user) for user in users] == [200] * 20
+    assert form_schema.FORM_TOKEN_CACHE == "global"
+    assert sum(user.client.page_loads for user in users) == 1
@@ -0,0 +1,126 @@
+"""Form endpoints - pinning the endpoint that works, and the failure blacklist with doubling backoff"""
+
+import contextlib
+
+import pytest
+
+from lrgex_runtime import forms
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+class Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.text = "<form></form>"
+
+    def success(self):
+        pass
+
+    def failure(self, message):
+        pass
+
+
+class Site:
+    """Form client - the listed (method, path) pairs answer 200, everything else 404"""
+
+    def __init__(self, *working):
+        self.working = set(working)
+        self.requests = []
+
+    @contextlib.contextmanager
+    def request(self, method, path, name=None, **kwargs):
+        self.requests.append((method, path, name))
+        yield Response(200 if (method, path) in self.working else 404)
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(forms, "time", clock)
+    monkeypatch.setattr(forms, "FORM_FAILURE_LIMIT", 3)
+    monkeypatch.setattr(forms, "FORM_BACKOFF", 30)
+    monkeypatch.setattr(forms, "FORM_MAX_BACKOFF", 100)
+    monkeypatch.setattr(forms, "FORM_ENDPOINTS", forms.FormEndpoints())
+    return clock
+
+
+def test_backoff_doubles_up_to_the_cap_and_expires(clock):
+    endpoints = forms.FORM_ENDPOINTS
+    for backoff in (30, 60, 100, 100):
+        assert not endpoints.record_failure("/form")
+        assert not endpoints.record_failure("/form")
+        assert endpoints.record_failure("/form")  # Third failure in a row blacklists it
+        assert endpoints.is_blocked("/form")
+        clock.now += backoff - 1
+        assert endpoints.is_blocked("/form")
+        clock.now += 1
+        assert not endpoints.is_blocked("/form")
+
+
+def test_success_resets_the_failures_and_the_backoff(clock):
+    endpoints = forms.FORM_ENDPOINTS
+    for _ in range(3):
+        endpoints.record_failure("/form")
+    clock.now += 30
+    endpoints.record_failure("/form")
+    endpoints.record_failure("/form")
+    endpoints.pin("contact", "/page", "/form")
+
+    assert not endpoints.record_failure("/form")  # The count starts over
+    endpoints.record_failure("/form")
+    endpoints.record_failure("/form")
+    assert endpoints.blocked_until["/form"] == clock.now + 30  # Back to the first backoff
+
+
+def user_on(site):
+    user = object.__new__(forms.FormTestUser)
+    user.client = site
+    return user
+
+
+def test_probing_pins_the_first_endpoint_that_accepts(clock):
+    site = Site(("GET", "/contact-us"), ("POST", "/contact-us/submit"))
+    user = user_on(site)
+
+    assert user.try_form_submission("contact", ["/contact", "/contact-us"])
+    assert forms.FORM_ENDPOINTS.pinned("contact") == ("/contact-us", "/contact-us/submit")
+    assert {name for _method, _path, name in site.requests} == {"[probe] contact"}
+    assert ("POST", "/contact-us", "[probe] contact") in site.requests
+
+    site.requests.clear()
+    assert user.try_form_submission("contact", ["/contact", "/contact-us"])
+    assert site.requests == [("GET", "/contact-us", None), ("POST", "/contact-us/submit", None)]
+
+
+def test_failing_pinned_endpoint_is_dropped_and_blacklisted(clock):
+    site = Site(("GET", "/contact"), ("POST", "/contact"))
+    user = user_on(site)
+    assert user.try_form_submission("contact", [])
+
+    site.working.discard(("POST", "/contact"))
+    assert not user.try_form_submission("contact", [])
+    assert not user.try_form_submission("contact", [])
+    assert forms.FORM_ENDPOINTS.pinned("contact")  # Kept through occasional errors
+    assert not user.try_form_submission("contact", [])
+    assert forms.FORM_ENDPOINTS.pinned("contact") is None
+    assert forms.FORM_ENDPOINTS.is_blocked("/contact")
+
+    site.requests.clear()
+    assert not user.try_form_submission("contact", [])
+    assert site.requests == []  # Nothing left to try until the backoff runs out
+    clock.now += 30
+    site.working.add(("POST", "/contact"))
+    assert user.try_form_submission("contact", [])
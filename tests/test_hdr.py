@@ -0,0 +1,111 @@
+"""HDR latency histograms and the coordinated-omission correction"""
+
+import pytest
+
+from lrgex_runtime import arrival, hdr
+
+
+@pytest.mark.parametrize("shape, interval, method", [
+    ({"type": "constant", "rate": 10, "duration": 60}, 0, "arrival-slot"),
+    (None, 2_000_000, "expected-interval"),
+    (None, 0, "none"),
+])
+def test_the_correction_in_use_is_reported(monkeypatch, shape, interval, method):
+    monkeypatch.setattr(arrival, "LOAD_SHAPE", shape)
+    monkeypatch.setattr(hdr.RECORDER, "expected_interval", interval)
+
+    correction = hdr.correction()
+
+    assert correction["method"] == method
+    assert correction["description"]
+    if method == "expected-interval":
+        assert correction["expected_interval_ms"] == 2000
+
+
+def test_analysis_reads_the_correction_saved_with_the_histograms(launcher, tmp_path):
+    prefix = tmp_path / "run"
+    (tmp_path / "run_hdr.json").write_text('{"correction": {"method": "none", "description": "not corrected"}, '
+                                           '"endpoints": []}', encoding="utf-8")
+
+    assert launcher.hdr_correction(str(prefix))["method"] == "none"
+    assert launcher.hdr_correction(str(tmp_path / "missing"))["method"] == "unknown"
+
+
+def test_percentiles_of_a_uniform_range():
+    histogram = hdr.HdrHistogram()
+    for value in range(1, 10_001):
+        histogram.record(value)
+
+    p50, p99, p100 = histogram.percentiles([0.5, 0.99, 1.0])
+
+    assert p50 == pytest.approx(5_000, rel=0.001)
+    assert p99 == pytest.approx(9_900, rel=0.001)
+    assert p100 == 10_000
+    assert (histogram.total, histogram.min, histogram.max) == (10_000, 1, 10_000)
+
+
+@pytest.mark.parametrize("value", [0, 1, 2047, 2048, 2049, 123_456, 7_654_321, 3_600_000_000])
+def test_buckets_keep_three_significant_digits(value):
+    histogram = hdr.HdrHistogram()
+    lowest, highest = histogram.bucket_range(histogram.index(value))
+
+    assert lowest <= value <= highest
+    assert highest - lowest <= max(0, value) / 1000
+    if value < 2048:
+        assert lowest == highest == value  # Small values are exact
+
+
+def test_expected_interval_backfills_the_missed_samples():
+    histogram = hdr.HdrHistogram()
+
+    added = histogram.record_corrected(100_000, 10_000)  # A 100ms stall when a request was due every 10ms
+
+    assert added == 9
+    assert histogram.total == 10
+    for value in range(10_000, 100_001, 10_000):
+        assert histogram.counts[histogram.index(value)] == 1
+    assert hdr.HdrHistogram().record_corrected(5_000, 10_000) == 0  # Faster than the interval - nothing missed
+
+
+def test_correction_moves_the_tail_of_a_stalled_closed_loop():
+    # 99 requests of 1ms and one 1s stall, with a request due every 10ms
+    plain, corrected = hdr.HdrHistogram(), hdr.HdrHistogram()
+    for value in [1_000] * 99 + [1_000_000]:
+        plain.record(value)
+        corrected.record_corrected(value, 10_000)
+
+    assert plain.percentiles([0.9])[0] == 1_000
+    assert corrected.total == 199
+    # Rank 180 of 199: past the 99 fast samples, the 81st backfilled value (10ms steps)
+    assert corrected.percentiles([0.9])[0] == pytest.approx(810_000, rel=0.001)
+
+
+def test_merge_equals_recording_everything_in_one():
+    left, right, both = hdr.HdrHistogram(), hdr.HdrHistogram(), hdr.HdrHistogram()
+    for value in range(0, 50_000, 7):
+        (left if value % 2 else right).record(value)
+        both.record(value)
+
+    left.merge(hdr.HdrHistogram.from_dict(right.to_dict()))
+
+    assert left.counts == both.counts
+    assert (left.total, left.min, left.max) == (both.total, both.min, both.max)
+    with pytest.raises(ValueError):
+        left.merge(hdr.HdrHistogram(significant_digits=2))
+
+
+def test_recorder_counts_late_starts_and_merges_workers():
+    workers = [hdr.LatencyRecorder(), hdr.LatencyRecorder()]
+    for number in range(100):
+        workers[number % 2].record("GET", "/page", 20.0, failed=number % 10 == 0, late=30.0 if number < 4 else 0.0)
+
+    master = hdr.LatencyRecorder()
+    for worker in workers:
+        master.merge(worker.serialize())
+    rows = list(master.rows())
+
+    assert [row[:2] for row in rows] == [["GET", "/page"], ["", "Aggregated"]]
+    page = master.endpoints["GET", "/page"]
+    assert (page.requests, page.failures, page.corrected) == (100, 10, 4)
+    assert page.histogram.percentiles([0.95, 1.0]) == [pytest.approx(20_000, rel=0.001), pytest.approx(50_000, rel=0.001)]
+    assert rows[0][4] == 20.0  # The average is of the real response times, without the late starts
@@ -0,0 +1,157 @@
+"""Run history - the statistical tests behind the regression verdicts"""
+
+import csv
+import json
+import random
+
+import pytest
+
+
+def counts(values):
+    result = {}
+    for value in values:
+        result[value] = result.get(value, 0) + 1
+    return result
+
+
+def test_mann_whitney_known_answer(launcher):
+    # Every new value is above every baseline value: U = 9 of 9 pairs, p (normal approximation,
+    # continuity correction) = 0.0404 - what scipy.stats.mannwhitneyu(method="asymptotic") gives
+    share, p_slower, p_faster = launcher.mann_whitney(counts([4, 5, 6]), counts([1, 2, 3]))
+
+    assert share == 1.0
+    assert p_slower == pytest.approx(0.0404, abs=1e-4)
+    assert p_faster == pytest.approx(0.9854, abs=1e-4)
+
+
+def test_mann_whitney_ties_and_identical_samples(launcher):
+    assert launcher.mann_whitney({7: 5}, {7: 5}) == (0.5, 1.0, 1.0)  # All tied - no variance
+    share, p_slower, p_faster = launcher.mann_whitney(counts(range(100)), counts(range(100)))
+    assert share == 0.5
+    assert p_slower > 0.4 and p_faster > 0.4
+
+
+def test_mann_whitney_finds_a_small_shift_in_large_samples(launcher):
+    share, p_slower, _ = launcher.mann_whitney(counts(range(10, 1010)), counts(range(1000)))
+
+    assert share == pytest.approx(0.51, abs=0.001)
+    assert p_slower > 0.05  # 1% of the range is no evidence
+    _, p_slower, _ = launcher.mann_whitney(counts(range(200, 1200)), counts(range(1000)))
+    assert p_slower < 1e-10
+
+
+def test_proportion_test_known_answer(launcher):
+    # 30% vs 20% of 100: z = 1.633, one-sided p = 0.0512
+    assert launcher.proportion_test(30, 100, 20, 100) == pytest.approx(0.0512, abs=1e-4)
+    assert launcher.proportion_test(0, 100, 0, 100) == 1.0
+
+
+def test_tail_test(launcher):
+    base = counts(range(1000))
+    slower_tail = counts(list(range(900)) + [2000] * 100)  # 10% past the baseline's p95 instead of 5%
+
+    assert launcher.tail_test(slower_tail, base) < 0.001
+    assert launcher.tail_test(base, base) == pytest.approx(0.5)
+    assert launcher.tail_test(slower_tail, counts(range(100))) is None  # Too few baseline requests
+
+
+def test_holm_correction(launcher):
+    # Sorted: 0.005 <= 0.05/4, 0.01 <= 0.05/3, 0.03 > 0.05/2 - stops there
+    assert launcher.holm_significant([0.01, 0.04, 0.03, 0.005], alpha=0.05) == [True, False, False, True]
+    assert launcher.holm_significant([0.2, 0.3], alpha=0.05) == [False, False]
+    assert launcher.holm_significant([], alpha=0.05) == []
+
+
+def test_histograms_merge_bucket_by_bucket(launcher):
+    merged = launcher.merge_histogram_counts([{"counts": [1, 2, 5, 1]}, {"counts": [5, 3, 9, 1]}])
+
+    assert merged == {1: 2, 5: 4, 9: 1}
+
+
+def test_meaningful_change_needs_percent_and_milliseconds(launcher):
+    assert launcher.meaningful_change(120, 100)  # +20%, +20ms
+    assert not launcher.meaningful_change(104, 100)  # Under 10%
+    assert not launcher.meaningful_change(13, 10)  # +30% but only 3ms
+    assert launcher.meaningful_change(80, 100, direction=-1)
+    assert not launcher.meaningful_change(None, 100)
+
+
+def write_run(folder, response_times, late=0.0):
+    """Reports of one finished run, with HDR histograms, as the launcher leaves them"""
+    from lrgex_runtime import hdr
+
+    folder.mkdir(exist_ok=True)
+    settings = {"template": "api", "host": "http://127.0.0.1:8000", "engine": "requests", "users": 10,
+                "spawn_rate": 10, "duration": "30s"}
+    (folder / "benchmark_settings.json").write_text(json.dumps(settings), encoding="utf-8")
+    recorder = hdr.LatencyRecorder()
+    for number, response_time in enumerate(response_times):
+        recorder.record("GET", "/api/users", response_time, failed=False, late=late)
+        recorder.record("GET", "/api/orders", 20.0 + number % 5, failed=False)
+    header = ["Type", "Name", "Request Count", "Failure Count", "Average Response Time", "Min Response Time",
+              "Max Response Time"] + [hdr.percentile_header(fraction) for fraction in hdr.PERCENTILES_TO_REPORT]
+    for name in ("stats", "hdr_percentiles"):
+        with open(folder / f"benchmark_results_{name}.csv", "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(header + ["Corrected Samples"])
+            writer.writerows(recorder.rows())
+    (folder / "benchmark_results_hdr.json").write_text(json.dumps(recorder.serialize()), encoding="utf-8")
+    return {"csv": str(folder / "benchmark_results.csv")}
+
+
+@pytest.fixture
+def history(launcher, tmp_path, monkeypatch):
+    """The launcher with its run history in tmp_path"""
+    open_history = launcher.open_history
+    monkeypatch.setattr(launcher, "open_history", lambda: open_history(str(tmp_path / "history.db")))
+    monkeypatch.setattr(launcher, "git_metadata", lambda: (None, None, None))
+    return launcher
+
+
+def test_record_run_flags_a_slower_endpoint(history, tmp_path):
+    launcher = history
+    random.seed(3)
+
+    def run(shift):
+        return write_run(tmp_path / "reports", [random.gauss(100, 10) + shift for _ in range(500)])
+
+    assert launcher.record_run(run(0)) == (1, 0)  # Nothing to compare with yet
+    assert launcher.record_run(run(0)) == (2, 0)
+    assert launcher.record_run(run(60)) == (3, 2)  # /api/users and the aggregate
+
+    with open(tmp_path / "reports" / "benchmark_results_regressions.csv", newline="", encoding="utf-8") as f:
+        verdicts = {row["Name"]: row["Verdict"] for row in csv.DictReader(f)}
+    assert verdicts == {"/api/users": "regressed", "/api/orders": "unchanged", "Aggregated": "regressed"}
+
+
+def test_latency_is_tested_on_the_uncorrected_histogram(history, tmp_path):
+    launcher = history
+    random.seed(3)
+    response_times = [random.gauss(100, 10) for _ in range(500)]
+    launcher.record_run(write_run(tmp_path / "reports", response_times))
+    launcher.record_run(write_run(tmp_path / "reports", response_times))
+
+    # Same responses, every one 150ms late for its arrival slot - only the corrected percentiles move
+    assert launcher.record_run(write_run(tmp_path / "reports", response_times, late=150.0)) == (3, 0)
+    endpoints = launcher.read_run_endpoints(str(tmp_path / "reports" / "benchmark_results"),
+                                            str(tmp_path / "reports" / "benchmark_settings.json"))
+    users = next(endpoint for endpoint in endpoints if endpoint["name"] == "/api/users")
+    assert users["p50"] > 240
+    assert sum(users["histogram"]["counts"][1::2]) == 500 and users["histogram"]["uncorrected"]
+
+
+def test_corrected_histograms_of_older_runs_are_not_tested(history, tmp_path):
+    launcher = history
+    launcher.record_run(write_run(tmp_path / "reports", [100.0] * 500))
+    db = launcher.open_history()
+    with db:  # What older runs stored
+        for row in db.execute("SELECT rowid, histogram FROM endpoints").fetchall():
+            histogram = json.loads(row["histogram"])
+            del histogram["uncorrected"]
+            db.execute("UPDATE endpoints SET histogram = ? WHERE rowid = ?", (json.dumps(histogram), row["rowid"]))
+    db.close()
+
+    launcher.record_run(write_run(tmp_path / "reports", [100.0] * 500))
+    with open(tmp_path / "reports" / "benchmark_results_regressions.csv", newline="", encoding="utf-8") as f:
+        details = {row["Name"]: row["Detail"] for row in csv.DictReader(f)}
+    assert details["/api/users"] == "latency not tested - no uncorrected HDR histogram on one side"
@@ -0,0 +1,44 @@
+"""Scenario matrix - cells from the product of the axes plus the shared settings"""
+
+import json
+
+import pytest
+
+
+def write_matrix(path, **extra):
+    matrix = {
+        "templates": ["api"],
+        "hosts": ["127.0.0.1:8000", "https://example.com"],
+        "load_shapes": [{"type": "constant", "rate": 5, "duration": 10}],
+        "engines": ["requests", "fast"],
+        **extra,
+    }
+    path.write_text(json.dumps(matrix), encoding="utf-8")
+    return str(path)
+
+
+def test_every_combination_is_a_cell(launcher, tmp_path):
+    cells, parallel, output = launcher.load_matrix(write_matrix(tmp_path / "matrix.json", parallel=2))
+
+    assert [(cell["host"], cell["engine"]) for cell in cells] == [
+        ("https://127.0.0.1:8000", "requests"), ("https://127.0.0.1:8000", "fast"),
+        ("https://example.com", "requests"), ("https://example.com", "fast"),
+    ]
+    assert len({cell["csv"] for cell in cells}) == 4
+    assert (parallel, output) == (2, "reports/matrix")
+
+
+def test_shared_settings_apply_to_every_cell(launcher, tmp_path):
+    settings = {"popularity": "zipf", "processes": 2, "duration": "999s"}
+    cells, _, _ = launcher.load_matrix(write_matrix(tmp_path / "matrix.json", settings=settings))
+
+    assert all(cell["popularity"] == "zipf" and cell["processes"] == 2 for cell in cells)
+    assert all(cell["duration"] == "10s" for cell in cells)  # Derived from the cell's load shape
+
+
+@pytest.mark.parametrize("key", ["template", "host", "load_shape", "engine"])
+def test_settings_cannot_override_an_axis(launcher, tmp_path, key):
+    path = write_matrix(tmp_path / "matrix.json", settings={key: "fast"})
+
+    with pytest.raises(ValueError, match=key):
+        launcher.load_matrix(path)
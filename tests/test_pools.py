@@ -0,0 +1,62 @@
+"""Fake data pools - uniqueness windows, batch refills and ID ranges"""
+
+import itertools
+
+from lrgex_runtime import pools
+from lrgex_runtime.pools import DataPool, UniqueWindow
+
+
+def counter(modulo):
+    """make_values that counts 0, 1, 2... and wraps around at modulo"""
+    numbers = itertools.count()
+
+    def make_values(count):
+        return [next(numbers) % modulo for _ in range(count)]
+    return make_values
+
+
+def test_window_rejects_repeats_until_they_fall_out():
+    window = UniqueWindow(3)
+    assert [window.admit(value) for value in "abca"] == [True, True, True, False]
+    assert window.admit("d")  # "a" is now the oldest of four and leaves the window
+    assert window.admit("a")
+    assert not window.admit("c")
+
+
+def test_values_are_unique_inside_the_window_across_refills():
+    pool = DataPool(counter(50), unique_window=20, size=30)
+    values = [pool.next() for _ in range(500)]
+
+    for start in range(len(values) - 20):
+        assert len(set(values[start:start + 21])) == 21
+    assert set(values) == set(range(50))  # Values come back once they leave the window
+
+
+def test_refill_runs_in_the_background_once_half_is_used():
+    pool = DataPool(counter(1000), size=10)
+    for _ in range(4):
+        pool.next()
+    assert pool.refiller is None
+    pool.next()
+    assert pool.refiller is not None and pool.next_values is None
+
+    pool.refiller.join()  # What the users yielding to it amounts to
+    assert len(pool.next_values) == 10 and pool.refiller is None
+    assert [pool.next() for _ in range(6)] == [5, 6, 7, 8, 9, 10]
+
+
+def test_exhausted_pool_waits_for_the_refill():
+    pool = DataPool(counter(1000), size=10)
+    # Never yielding, so the background refill never gets to run on its own
+    assert [pool.next() for _ in range(35)] == list(range(35))
+
+
+def test_id_window_stays_below_half_the_range(monkeypatch):
+    monkeypatch.setattr(pools, "FAKE_UNIQUE_WINDOW", 100000)
+    assert pools.id_window(1, 10) == 5
+    assert pools.id_window(1, 1000000) == 100000
+
+    ids = DataPool(pools.fake_ids(1, 10, prefix="user"), pools.id_window(1, 10), size=100)
+    values = [ids.next() for _ in range(300)]
+    assert set(values) <= {f"user{number}" for number in range(1, 11)}
+    assert all(len(set(values[start:start + 5])) == 5 for start in range(len(values) - 5))
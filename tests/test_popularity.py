@@ -0,0 +1,84 @@
+"""Popularity model - the alias sampler and the Zipf/hot-set weights"""
+
+import random
+from collections import Counter
+
+import pytest
+
+from lrgex_runtime import popularity
+from lrgex_runtime.crawler import SiteGraph
+from lrgex_runtime.popularity import WeightedSampler
+
+
+def draw(sampler, count=200_000, seed=1):
+    random.seed(seed)
+    return Counter(sampler.choice() for _ in range(count))
+
+
+def test_alias_sampler_follows_the_weights():
+    weights = {"a": 5, "b": 3, "c": 1.5, "d": 0.5, "never": 0}
+    counts = draw(WeightedSampler(weights))
+
+    total = sum(weights.values())
+    assert "never" not in counts
+    for item, weight in weights.items():
+        assert counts[item] / 200_000 == pytest.approx(weight / total, abs=0.005)
+
+
+def test_alias_sampler_edge_cases():
+    assert draw(WeightedSampler({"only": 3}), 100) == {"only": 100}
+    empty = WeightedSampler({"zero": 0})
+    assert len(empty) == 0
+    assert sorted(WeightedSampler({"x": 1, "y": 1}).items) == ["x", "y"]
+
+
+@pytest.fixture
+def model(monkeypatch):
+    def use(name, **settings):
+        monkeypatch.setattr(popularity, "POPULARITY", name)
+        for setting, value in settings.items():
+            monkeypatch.setattr(popularity, setting, value)
+    return use
+
+
+def test_zipf_weights_are_one_over_rank(model):
+    model("zipf", ZIPF_EXPONENT=1.0)
+    assert popularity.popularity_weights(["a", "b", "c", "d"]) == pytest.approx(
+        {"a": 1.0, "b": 1 / 2, "c": 1 / 3, "d": 1 / 4})
+
+    model("zipf", ZIPF_EXPONENT=2.0)
+    assert popularity.popularity_weights(["a", "b", "c"]) == pytest.approx({"a": 1.0, "b": 1 / 4, "c": 1 / 9})
+
+
+def test_hot_set_gets_its_share_of_the_traffic(model):
+    model("hotset", HOT_FRACTION=0.2, HOT_TRAFFIC=0.8)
+    items = list(range(10))
+    weights = popularity.popularity_weights(items)
+
+    assert sum(weights[item] for item in items[:2]) == pytest.approx(0.8)
+    assert sum(weights[item] for item in items[2:]) == pytest.approx(0.2)
+    counts = draw(popularity.PopularityPicker(items).sampler)
+    assert (counts[0] + counts[1]) / 200_000 == pytest.approx(0.8, abs=0.005)
+
+
+def test_empirical_weights_from_a_file(model, tmp_path):
+    table = tmp_path / "weights.csv"
+    table.write_text("item,weight\n# comment\n/a,3\n/b,1\nbroken\n", encoding="utf-8")
+    model("empirical", POPULARITY_FILE=str(table), _empirical_weights=None)
+
+    assert popularity.popularity_weights(["/a", "/b", "/c"]) == {"/a": 3.0, "/b": 1.0, "/c": 0.0}
+
+
+def test_path_weights_follow_the_inlinks(model):
+    graph = SiteGraph()
+    for source, target in [("/", "/a"), ("/b", "/a"), ("/", "/b")]:
+        graph.add_link(source, target)
+    paths = {"/", "/a", "/b"}
+
+    model("uniform", PATH_WEIGHTS="inlinks")
+    assert popularity.path_weights(paths, graph) == {"/": 1, "/a": 3, "/b": 2}
+    model("uniform", PATH_WEIGHTS="uniform")
+    assert popularity.path_weights(paths, graph) == {"/": 1, "/a": 1, "/b": 1}
+    # Other models rank the most linked-to page as the most popular
+    model("zipf", ZIPF_EXPONENT=1.0)
+    assert popularity.path_weights(paths, graph) == pytest.approx({"/a": 1.0, "/b": 1 / 2, "/": 1 / 3})
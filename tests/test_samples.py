@@ -0,0 +1,83 @@
+"""Raw request samples - the .lrs columnar file written by the sink and read back"""
+
+import struct
+
+import pytest
+
+from lrgex_runtime.samples import COLUMNS, SampleSink, load_samples, read_sample_file
+
+
+class Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+def record_requests(path, count, compression="zlib", chunk_rows=1000, worker=2):
+    sink = SampleSink(str(path), compression=compression, chunk_rows=chunk_rows, worker=worker)
+    for number in range(count):
+        sink.record("POST" if number % 3 == 0 else "GET", f"/item/{number % 4}", number / 10,
+                    response_length=number, response=Response(500 if number % 7 == 0 else 200),
+                    exception=ValueError() if number % 7 == 0 else None, start_time=1_700_000_000 + number / 1000)
+    sink.record("GET", "/down", 5.0, response=None, exception=ConnectionError())  # No response at all
+    assert sink.close() is None
+    return count + 1
+
+
+def column(columns, name):
+    typecode = dict((column, typecode) for column, typecode, _dtype in COLUMNS)[name]
+    data = b"".join(columns[name])
+    return list(struct.unpack(f"<{len(data) // struct.calcsize(typecode)}{typecode}", data))
+
+
+@pytest.mark.parametrize("compression", ["none", "zlib", "lzma"])
+def test_every_sample_comes_back_in_order(tmp_path, compression):
+    rows = record_requests(tmp_path / "run.lrs", 2_500, compression)
+
+    header, names, columns = read_sample_file(tmp_path / "run.lrs")
+
+    assert header["compression"] == compression
+    assert len(columns["timestamp_us"]) == 3  # Two full chunks of 1000 plus the rest
+    sizes = column(columns, "bytes")
+    assert sizes == list(range(2_500)) + [0]
+    assert column(columns, "timestamp_us")[:3] == [1_700_000_000_000_000, 1_700_000_000_001_000, 1_700_000_000_002_000]
+    statuses, failed = column(columns, "status"), column(columns, "failed")
+    assert statuses[-1] == 0 and failed[-1] == 1
+    assert sum(failed) == len(range(0, 2_500, 7)) + 1
+    assert column(columns, "worker") == [2] * rows
+    assert column(columns, "latency_ms")[25] == pytest.approx(2.5)
+    assert [names[index] for index in column(columns, "name_id")[:4]] == [
+        ["POST", "/item/0"], ["GET", "/item/1"], ["GET", "/item/2"], ["POST", "/item/3"]]
+
+
+def test_unfinished_and_foreign_files_are_refused(tmp_path):
+    sink = SampleSink(str(tmp_path / "crashed.lrs"), chunk_rows=10)
+    for number in range(25):
+        sink.record("GET", "/", 1.0, start_time=1.0)
+    sink.pool.join()
+    sink.file.flush()  # The process died before close() wrote the endpoint table
+
+    with pytest.raises(ValueError, match="no endpoint table"):
+        read_sample_file(tmp_path / "crashed.lrs")
+    (tmp_path / "other.lrs").write_bytes(b"PK\x03\x04")
+    with pytest.raises(ValueError, match="not a raw samples file"):
+        read_sample_file(tmp_path / "other.lrs")
+    with pytest.raises(ValueError, match="compression"):
+        SampleSink(str(tmp_path / "bad.lrs"), compression="brotli")
+    sink.close()
+
+
+def test_numpy_loader_merges_the_workers_files(tmp_path):
+    np = pytest.importorskip("numpy")
+    record_requests(tmp_path / "run_samples_w0.lrs", 300, worker=0)
+    record_requests(tmp_path / "run_samples_w1.lrs", 200, worker=1)
+
+    samples = load_samples(str(tmp_path / "run"))
+
+    assert len(samples["latency_ms"]) == 502
+    assert np.bincount(samples["worker"]).tolist() == [301, 201]
+    assert samples["failed"].dtype == bool
+    assert set(samples["name"]) == {"/item/0", "/item/1", "/item/2", "/item/3", "/down"}
+    # Endpoint ids are shared across files - the same method and name has one id everywhere
+    endpoints = set(zip(samples["method"].tolist(), samples["name"].tolist(), samples["name_id"].tolist()))
+    assert len(endpoints) == len({(method, name) for method, name, _id in endpoints}) == 9
+    assert samples["timestamp"][0] == pytest.approx(1_700_000_000)
@@ -0,0 +1,67 @@
+"""Scenario files - JSON/TOML settings with LRGEX_<NAME> environment overrides"""
+
+import pytest
+
+from lrgex_runtime import scenario
+
+
+def test_json_and_toml_scenarios(tmp_path):
+    (tmp_path / "test.json").write_text('{"engine": "fast", "form": {"fields": []}}', encoding="utf-8")
+    (tmp_path / "test.toml").write_text('engine = "fast"\n[form]\nfields = []\n', encoding="utf-8")
+
+    assert scenario.load_scenario(str(tmp_path / "test.json")) == {"engine": "fast", "form": {"fields": []}}
+    assert scenario.load_scenario(str(tmp_path / "test.toml")) == {"engine": "fast", "form": {"fields": []}}
+
+
+def test_no_scenario_means_defaults(monkeypatch):
+    monkeypatch.delenv("LRGEX_SCENARIO", raising=False)
+    assert scenario.load_scenario() == {}
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    monkeypatch.setattr(scenario, "SCENARIO", {"crawl_depth": 2, "hdr_histogram": False, "custom_urls": ["/a", " /b "]})
+    return monkeypatch
+
+
+def test_environment_overrides_the_scenario(settings):
+    assert scenario.setting("crawl_depth", 3) == 2
+    assert scenario.setting("missing", "default") == "default"
+    settings.setenv("LRGEX_CRAWL_DEPTH", "5")
+    assert scenario.setting("crawl_depth", 3) == "5"
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1", True), ("true", True), ("Yes", True), ("on", True),
+    ("0", False), ("false", False), ("NO", False), ("off", False), ("", False),
+])
+def test_flags(settings, value, expected):
+    settings.setenv("LRGEX_SOME_FLAG", value)
+    assert scenario.flag("some_flag") is expected
+
+
+def test_flag_defaults_and_scenario_booleans(settings):
+    assert scenario.flag("hdr_histogram") is False
+    assert scenario.flag("missing") is True
+    assert scenario.flag("missing", False) is False
+
+
+def test_setting_lists(settings):
+    assert scenario.setting_list("custom_urls") == ["/a", "/b"]
+    settings.setenv("LRGEX_CUSTOM_URLS", "/x, /y,,")
+    assert scenario.setting_list("custom_urls") == ["/x", "/y"]
+    assert scenario.setting_list("missing") == []
+
+
+def test_generated_test_is_a_shim_plus_a_scenario(launcher, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = {"template": "api", "host": "http://127.0.0.1:8000", "custom_urls": ["/health"], "engine": "fast"}
+
+    test_file = launcher.create_test_file(config)
+
+    shim = (tmp_path / test_file).read_text(encoding="utf-8")
+    assert "from lrgex_runtime.api import" in shim
+    saved = scenario.load_scenario(config["scenario_file"])
+    assert saved["engine"] == "fast"
+    assert saved["custom_urls"] == ["/health"]
+    assert (tmp_path / "lrgex_runtime" / "scenario.py").exists()  # The runtime the shim imports
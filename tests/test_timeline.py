@@ -0,0 +1,90 @@
+"""Saturation knee and steady-state drift from Locust's stats history"""
+
+import csv
+
+import pytest
+
+COLUMNS = ["Timestamp", "User Count", "Type", "Name", "Requests/s", "Failures/s", "50%", "95%", "99%",
+           "Total Request Count", "Total Failure Count"]
+
+
+def write_history(path, seconds, report_every=1, start=1_700_000_000):
+    """Stats history for (users, requests/second, p95) per second - the counts only move every report_every seconds"""
+    requests = reported = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        writer.writerow([start, 0, "", "Aggregated", 0, 0, "N/A", "N/A", "N/A", 0, 0])
+        for second, (users, rps, p95) in enumerate(seconds, 1):
+            requests += rps
+            if second % report_every == 0:
+                reported = requests
+            writer.writerow([start + second, users, "", "Aggregated", rps, 0, p95 / 2, p95, p95 * 1.5, reported, 0])
+
+
+def ramp_to_saturation():
+    """10 users more every 10s - throughput grows 10 req/s per user up to 30 users, then stops while p95 climbs"""
+    seconds = []
+    for users in (10, 20, 30, 40, 50):
+        rps = 10 * min(users, 30)
+        p95 = 100 if users <= 30 else 100 * (users - 20) / 10
+        seconds += [(users, rps, p95)] * 10
+    return seconds
+
+
+@pytest.mark.parametrize("report_every", [1, 3])
+def test_knee_found_with_per_second_and_master_style_counts(launcher, tmp_path, report_every):
+    history = tmp_path / "run_stats_history.csv"
+    write_history(history, ramp_to_saturation(), report_every)
+
+    samples = launcher.read_stats_history(history)
+    levels = launcher.load_levels(samples)
+    knee = launcher.find_knee(levels)
+
+    assert [level["users"] for level in levels] == [10, 20, 30, 40, 50]
+    assert [level["rps"] for level in levels] == pytest.approx([100, 200, 300, 300, 300])
+    assert knee is not None
+    assert (knee[0]["users"], knee[1]["users"]) == (30, 40)
+    assert knee[0]["rps"] == pytest.approx(300)
+
+
+def test_bursty_counts_are_spread_over_the_seconds_since_the_last_report(launcher, tmp_path):
+    history = tmp_path / "run_stats_history.csv"
+    write_history(history, [(10, 30, 100)] * 7, report_every=3)
+
+    samples = launcher.read_stats_history(history)
+
+    # Seconds 1-6 are covered by the reports at 3 and 6, second 7 has not been reported yet
+    assert [sample["rps"] for sample in samples] == [30, 30, 30, 30, 30, 30, None]
+
+
+def test_no_knee_while_throughput_keeps_up(launcher, tmp_path):
+    history = tmp_path / "run_stats_history.csv"
+    write_history(history, [(users, 10 * users, 100) for users in (10, 20, 30, 40) for _ in range(10)], 3)
+
+    levels = launcher.load_levels(launcher.read_stats_history(history))
+
+    assert launcher.find_knee(levels) is None
+
+
+@pytest.mark.parametrize("report_every", [1, 3])
+def test_latency_drift_in_steady_state(launcher, tmp_path, report_every):
+    history = tmp_path / "run_stats_history.csv"
+    write_history(history, [(50, 200, 100 + second * 2) for second in range(60)], report_every)
+
+    drift = launcher.steady_state_drift(launcher.read_stats_history(history))
+
+    assert drift["users"] == 50
+    assert drift["latency_drift"]
+    assert not drift["throughput_drop"]
+
+
+@pytest.mark.parametrize("report_every", [1, 3])
+def test_flat_steady_state_has_no_drift(launcher, tmp_path, report_every):
+    history = tmp_path / "run_stats_history.csv"
+    write_history(history, [(50, 200, 100 + second % 3) for second in range(60)], report_every)
+
+    drift = launcher.steady_state_drift(launcher.read_stats_history(history))
+
+    assert not drift["latency_drift"]
+    assert not drift["throughput_drop"]
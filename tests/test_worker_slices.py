@@ -0,0 +1,69 @@
+"""Worker slices - ID ranges and data file rows split between local worker processes"""
+
+import pytest
+
+from lrgex_runtime import pools
+from lrgex_runtime.feeder import DataFeeder
+
+
+def ranges(monkeypatch, low, high, workers):
+    monkeypatch.setattr(pools, "WORKER_COUNT", workers)
+    result = []
+    for index in range(workers):
+        monkeypatch.setattr(pools, "WORKER_INDEX", index)
+        result.append(pools.worker_range(low, high))
+    return result
+
+
+@pytest.mark.parametrize("low, high, workers", [(1, 10, 3), (1, 10, 1), (0, 99, 7), (5, 12, 8), (1000, 1006, 4)])
+def test_id_ranges_cover_the_range_without_overlap(monkeypatch, low, high, workers):
+    slices = ranges(monkeypatch, low, high, workers)
+    ids = [number for start, end in slices for number in range(start, end + 1)]
+
+    assert ids == list(range(low, high + 1))  # In order: no gaps and no ID in two slices
+    assert max(end - start for start, end in slices) - min(end - start for start, end in slices) <= 1
+
+
+def test_fewer_ids_than_workers_are_shared(monkeypatch):
+    # Every worker needs IDs to send - with fewer than one each they all use the whole range
+    assert ranges(monkeypatch, 1, 3, 5) == [(1, 3)] * 5
+
+
+def rows_per_worker(path, workers):
+    """Rows each worker reads, None for a worker whose slice is empty"""
+    result = []
+    for index in range(workers):
+        try:
+            feeder = DataFeeder(str(path), strategy="per-user", worker_index=index, worker_count=workers)
+        except ValueError as error:
+            assert "has no rows for worker" in str(error)
+            result.append(None)
+            continue
+        rows = []
+        position = feeder.next_offset(feeder.start)
+        while position is not None:
+            line, following = feeder.read_line(position, feeder.end)
+            rows.append(feeder.parse(line)["id"])
+            position = feeder.next_offset(following)
+        result.append(rows)
+    return result
+
+
+@pytest.mark.parametrize("rows, workers", [(10, 3), (7, 4), (100, 6), (1, 1), (3, 8), (5, 16)])
+@pytest.mark.parametrize("jsonl", [False, True])
+def test_data_file_slices_cover_every_row_once(tmp_path, rows, workers, jsonl):
+    if jsonl:
+        path = tmp_path / "data.jsonl"
+        # Rows of different lengths, so byte slices don't line up with rows
+        path.write_text("".join(f'{{"id": "{i}", "pad": "{"x" * (i % 7)}"}}\n' for i in range(rows)), encoding="utf-8")
+    else:
+        path = tmp_path / "data.csv"
+        path.write_text("id,pad\n" + "".join(f"{i},{'x' * (i % 7)}\n" for i in range(rows)), encoding="utf-8")
+
+    slices = rows_per_worker(path, workers)
+    read = [row for rows_read in slices if rows_read for row in rows_read]
+    assert read == [str(i) for i in range(rows)]  # No gaps, no row read by two workers
+    if workers > rows:
+        assert slices.count(None) >= workers - rows  # Workers without a row are told so
+    else:
+        assert None not in slices